@@ -0,0 +1,567 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Local stand-in for Azure Resource Manager.
+
+Serves just enough of ARM for the modules of the azure.rm collection to run
+against it without a subscription:
+
+  - cloud metadata (/metadata/endpoints) and a token endpoint, so the standard
+    credentials work with AZURE_CLOUD_ENVIRONMENT=http://127.0.0.1:<port>
+  - generic PUT / GET / DELETE / PATCH of resources under any provider, which
+    covers the Microsoft.ApiManagement, Microsoft.Management,
+    Microsoft.Subscription and Microsoft.ContainerService routes
+  - list operations with nextLink paging, $top, $skip and simple $filter expressions
+  - ETag, If-Match and If-None-Match
+  - optional 202 responses with Azure-AsyncOperation / Location polling
+  - optional 429 throttling with Retry-After and x-ms-ratelimit-remaining-* headers
+  - a few POST actions: key regeneration and subscription creation
+  - the /batch endpoint, grouping up to 20 requests in one round trip
+
+Control endpoints under /_standin allow to seed data, read request statistics
+and reset state. Run 'python arm_standin.py --help' for the options.
+'''
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import re
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+try:
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from socketserver import ThreadingMixIn
+    from urllib.parse import urlsplit, parse_qsl, urlencode
+except ImportError:
+    from BaseHTTPServer import BaseHTTPRequestHandler, HTTPServer
+    from SocketServer import ThreadingMixIn
+    from urlparse import urlsplit, parse_qsl
+    from urllib import urlencode
+
+
+# last segments of list endpoints which return an empty list rather than 404 when nothing is stored
+KNOWN_COLLECTIONS = ['apis', 'operations', 'policies', 'products', 'groups', 'users', 'properties', 'backends',
+                     'loggers', 'diagnostics', 'templates', 'tags', 'apiVersionSets', 'subscriptions', 'schemas',
+                     'releases', 'issues', 'comments', 'attachments', 'caches', 'certificates', 'identityProviders',
+                     'authorizationServers', 'openidConnectProviders', 'notifications', 'recipientUsers',
+                     'recipientEmails', 'service', 'managementGroups', 'openShiftManagedClusters', 'descendants',
+                     'resourceGroups']
+
+MAX_BATCH_SIZE = 20
+
+
+def route_template(path):
+    '''
+    Replace resource names in an ARM path by placeholders, e.g.
+    /subscriptions/{}/resourceGroups/{}/providers/Microsoft.ApiManagement/service/{}/apis/{}
+    '''
+    segments = [x for x in path.split('/') if x]
+    result = []
+    name_next = False
+    after_providers = False
+    for segment in segments:
+        if name_next:
+            result.append('{}')
+            name_next = False
+        elif after_providers:
+            result.append(segment)
+            after_providers = False
+        elif segment.lower() == 'providers':
+            result.append(segment)
+            after_providers = True
+        else:
+            result.append(segment)
+            name_next = True
+    return '/' + '/'.join(result)
+
+
+def resource_type(path):
+    segments = [x for x in path.split('/') if x]
+    providers = [i for i, x in enumerate(segments) if x.lower() == 'providers']
+    if not providers:
+        return '/'.join(segments[0:len(segments):2])
+    index = providers[-1]
+    return '/'.join([segments[index + 1]] + segments[index + 2::2])
+
+
+FILTER_COMPARISON = re.compile(r"^\(?\s*([\w/]+)\s+(eq|ne)\s+'((?:[^']|'')*)'\s*\)?$")
+FILTER_FUNCTION = re.compile(r"^\(?\s*(contains|startswith|endswith)\(\s*([\w/]+)\s*,\s*'((?:[^']|'')*)'\s*\)\s*\)?$")
+
+
+def filter_field(item, field):
+    if field == 'name':
+        return item.get('name')
+    value = item.get('properties') or {}
+    for part in field.split('/'):
+        value = value.get(part) if isinstance(value, dict) else None
+    return value
+
+
+def apply_filter(items, expression):
+    '''
+    Evaluate a small subset of OData $filter: eq, ne, contains, startswith and
+    endswith on string fields, combined with 'and'. Other expressions are ignored.
+    '''
+    for clause in re.split(r'\s+and\s+', expression or ''):
+        comparison = FILTER_COMPARISON.match(clause)
+        function = FILTER_FUNCTION.match(clause)
+        if comparison:
+            field, operator, value = comparison.groups()
+            value = value.replace("''", "'")
+            if operator == 'eq':
+                items = [x for x in items if filter_field(x, field) == value]
+            else:
+                items = [x for x in items if filter_field(x, field) != value]
+        elif function:
+            name, field, value = function.groups()
+            value = value.replace("''", "'").lower()
+            check = dict(contains=lambda x: value in x,
+                         startswith=lambda x: x.startswith(value),
+                         endswith=lambda x: x.endswith(value))[name]
+            items = [x for x in items if check(str(filter_field(x, field) or '').lower())]
+    return items
+
+
+class ArmState(object):
+    def __init__(self, page_size=100, latency=0.0, async_mode=False, async_duration=0.0,
+                 throttle_rate=0, retry_after=1, read_limit=12000, write_limit=1200):
+        self.lock = threading.RLock()
+        self.page_size = page_size
+        self.latency = latency
+        self.async_mode = async_mode
+        self.async_duration = async_duration
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.read_limit = read_limit
+        self.write_limit = write_limit
+        self.reset()
+
+    def reset(self):
+        with self.lock:
+            self.resources = OrderedDict()
+            self.operations = {}
+            self.etag_counter = 0
+            self.window = (int(time.time()), 0)
+            self.reads = self.read_limit
+            self.writes = self.write_limit
+            self.stats = dict(requests=0, bytes_in=0, bytes_out=0, throttled=0, batched=0, routes={})
+
+    def record(self, method, path, status, bytes_in, bytes_out):
+        key = method + ' ' + route_template(path)
+        with self.lock:
+            self.stats['requests'] += 1
+            self.stats['bytes_in'] += bytes_in
+            self.stats['bytes_out'] += bytes_out
+            if status == 429:
+                self.stats['throttled'] += 1
+            route = self.stats['routes'].setdefault(key, dict(requests=0, bytes_in=0, bytes_out=0, statuses={}))
+            route['requests'] += 1
+            route['bytes_in'] += bytes_in
+            route['bytes_out'] += bytes_out
+            route['statuses'][str(status)] = route['statuses'].get(str(status), 0) + 1
+
+    def throttled(self):
+        if not self.throttle_rate:
+            return False
+        with self.lock:
+            second = int(time.time())
+            start, count = self.window
+            if start != second:
+                start, count = second, 0
+            count += 1
+            self.window = (start, count)
+            return count > self.throttle_rate
+
+    def next_etag(self):
+        self.etag_counter += 1
+        return '"{0}"'.format(self.etag_counter)
+
+    def put(self, path, body):
+        key = path.lower()
+        with self.lock:
+            existing = self.resources.get(key)
+            resource = OrderedDict()
+            resource['id'] = path
+            resource['name'] = path.rstrip('/').split('/')[-1]
+            resource['type'] = resource_type(path)
+            for k, v in (body or {}).items():
+                if k not in ['id', 'name', 'type']:
+                    resource[k] = v
+            resource.setdefault('properties', {})
+            resource['etag'] = self.next_etag()
+            self.resources[key] = resource
+            return resource, existing is None
+
+    def delete(self, path):
+        key = path.lower()
+        with self.lock:
+            found = key in self.resources
+            for k in [x for x in self.resources if x == key or x.startswith(key + '/')]:
+                del self.resources[k]
+            return found
+
+    def children(self, path):
+        prefix = path.lower().rstrip('/') + '/'
+        with self.lock:
+            return [v for k, v in self.resources.items()
+                    if k.startswith(prefix) and '/' not in k[len(prefix):]]
+
+    def start_operation(self, action, path, result=None):
+        operation_id = str(uuid.uuid4())
+        with self.lock:
+            self.operations[operation_id] = dict(action=action,
+                                                 path=path,
+                                                 result=result,
+                                                 done_at=time.time() + self.async_duration,
+                                                 status='InProgress')
+        return operation_id
+
+    def finish_operations(self):
+        now = time.time()
+        with self.lock:
+            for operation in self.operations.values():
+                if operation['status'] == 'InProgress' and operation['done_at'] <= now:
+                    if operation['action'] == 'delete':
+                        self.delete(operation['path'])
+                    operation['status'] = 'Succeeded'
+
+
+class ArmHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    state = None
+    # headers of the request of a batch being processed, None outside of batches
+    batch_headers = None
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_GET(self):
+        self.handle_request('GET')
+
+    def do_PUT(self):
+        self.handle_request('PUT')
+
+    def do_PATCH(self):
+        self.handle_request('PATCH')
+
+    def do_DELETE(self):
+        self.handle_request('DELETE')
+
+    def do_POST(self):
+        self.handle_request('POST')
+
+    def handle_request(self, method):
+        parts = urlsplit(self.path)
+        path = parts.path
+        query = dict(parse_qsl(parts.query, keep_blank_values=True))
+        length = int(self.headers.get('Content-Length') or 0)
+        raw = self.rfile.read(length) if length else b''
+        try:
+            body = json.loads(raw.decode('utf-8')) if raw else None
+        except ValueError:
+            body = None
+        self.bytes_in = len(raw)
+
+        state = self.state
+        if not path.startswith('/_standin'):
+            if state.latency:
+                time.sleep(state.latency)
+            state.finish_operations()
+
+        status, headers, payload = self.route(method, path, query, body)
+        data = b''
+        if payload is not None:
+            data = json.dumps(payload).encode('utf-8')
+        self.send_response(status)
+        headers = headers or {}
+        headers.setdefault('x-ms-request-id', str(uuid.uuid4()))
+        for k, v in headers.items():
+            self.send_header(k, v)
+        if data:
+            self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        if data:
+            self.wfile.write(data)
+        if not path.startswith('/_standin'):
+            state.record(method, path, status, self.bytes_in, len(data))
+
+    def header(self, name):
+        if self.batch_headers is not None:
+            for k, v in self.batch_headers.items():
+                if k.lower() == name.lower():
+                    return v
+            return None
+        return self.headers.get(name)
+
+    def base_url(self):
+        return 'http://' + (self.headers.get('Host') or '127.0.0.1')
+
+    def error(self, status, code, message, headers=None):
+        return status, headers, dict(error=dict(code=code, message=message))
+
+    def route(self, method, path, query, body):
+        state = self.state
+
+        if path.startswith('/_standin'):
+            return self.control(method, path, body)
+        if path == '/metadata/endpoints':
+            return self.metadata()
+        if re.match(r'^/[^/]+/oauth2(/v2\.0)?/token$', path):
+            return 200, None, dict(token_type='Bearer',
+                                   access_token='standin-token',
+                                   expires_in='3600',
+                                   expires_on=str(int(time.time()) + 3600),
+                                   resource=self.base_url() + '/')
+
+        if state.throttled():
+            return self.error(429, 'TooManyRequests', 'Throttled by stand-in',
+                              {'Retry-After': str(state.retry_after)})
+
+        headers = {}
+        with state.lock:
+            if method == 'GET':
+                state.reads = max(0, state.reads - 1)
+            else:
+                state.writes = max(0, state.writes - 1)
+            headers['x-ms-ratelimit-remaining-subscription-reads'] = str(state.reads)
+            headers['x-ms-ratelimit-remaining-subscription-writes'] = str(state.writes)
+
+        if path == '/batch' and method == 'POST' and self.batch_headers is None:
+            return self.batch(body, headers)
+
+        operation = re.match(r'^/_operations/([^/]+)$', path)
+        if operation:
+            return self.operation_status(operation.group(1), query, headers)
+
+        if method == 'GET':
+            return self.get(path, query, headers)
+        if method in ['PUT', 'PATCH']:
+            return self.put(method, path, query, body, headers)
+        if method == 'DELETE':
+            return self.delete(path, headers)
+        return self.post(path, query, body, headers)
+
+    def batch(self, body, headers):
+        requests = (body or {}).get('requests') or []
+        if len(requests) > MAX_BATCH_SIZE:
+            return self.error(400, 'BatchRequestTooLarge',
+                              'A batch is limited to {0} requests'.format(MAX_BATCH_SIZE), headers)
+        responses = []
+        try:
+            for request in requests:
+                parts = urlsplit(request.get('url', ''))
+                self.batch_headers = request.get('requestHeaderDetails') or {}
+                status, item_headers, content = self.route(request.get('httpMethod', 'GET').upper(),
+                                                           parts.path,
+                                                           dict(parse_qsl(parts.query, keep_blank_values=True)),
+                                                           request.get('content'))
+                responses.append(dict(name=request.get('name'),
+                                      httpStatusCode=status,
+                                      headers=item_headers or {},
+                                      content=content,
+                                      contentLength=len(json.dumps(content)) if content is not None else 0))
+        finally:
+            self.batch_headers = None
+        with self.state.lock:
+            self.state.stats['batched'] += len(requests)
+        return 200, headers, dict(responses=responses)
+
+    def metadata(self):
+        base = self.base_url()
+        return 200, None, dict(galleryEndpoint=base + '/',
+                               graphEndpoint=base + '/',
+                               portalEndpoint=base + '/',
+                               resourceManager=base + '/',
+                               authentication=dict(loginEndpoint=base,
+                                                   audiences=[base + '/']))
+
+    def control(self, method, path, body):
+        state = self.state
+        if path == '/_standin/stats':
+            with state.lock:
+                return 200, None, json.loads(json.dumps(state.stats))
+        if path == '/_standin/reset' and method == 'POST':
+            state.reset()
+            return 204, None, None
+        if path == '/_standin/config' and method == 'POST':
+            for k, v in (body or {}).items():
+                if hasattr(state, k):
+                    setattr(state, k, v)
+            return 204, None, None
+        if path == '/_standin/seed' and method == 'POST':
+            count = 0
+            for item in (body or {}).get('resources', []):
+                state.put(item['path'], item.get('body'))
+                count += 1
+            for spec in (body or {}).get('generate', []):
+                for i in range(spec.get('count', 0)):
+                    name = spec.get('name', 'item{0}').format(i)
+                    item_body = json.loads(json.dumps(spec.get('body', {})).replace('{0}', str(i)))
+                    state.put(spec['collection'].rstrip('/') + '/' + name, item_body)
+                    count += 1
+            return 200, None, dict(seeded=count)
+        return self.error(404, 'NotFound', 'Unknown control endpoint')
+
+    def async_headers(self, operation_id, query, headers):
+        url = self.base_url() + '/_operations/' + operation_id + '?' + urlencode(dict(query))
+        headers['Azure-AsyncOperation'] = url
+        headers['Location'] = url
+        headers['Retry-After'] = '1'
+        return headers
+
+    def operation_status(self, operation_id, query, headers):
+        state = self.state
+        with state.lock:
+            operation = state.operations.get(operation_id)
+        if operation is None:
+            return self.error(404, 'NotFound', 'Unknown operation')
+        if operation['status'] == 'InProgress':
+            headers['Retry-After'] = '1'
+        result = dict(id=operation_id, status=operation['status'])
+        if operation['result'] is not None:
+            result.update(operation['result'])
+        return 200, headers, result
+
+    def get(self, path, query, headers):
+        state = self.state
+        with state.lock:
+            resource = state.resources.get(path.lower())
+        if resource is not None:
+            headers['ETag'] = resource['etag']
+            if self.header('If-None-Match') == resource['etag']:
+                return 304, headers, None
+            return 200, headers, resource
+
+        items = state.children(path)
+        if not items and path.rstrip('/').split('/')[-1] not in KNOWN_COLLECTIONS:
+            return self.error(404, 'ResourceNotFound', 'Resource {0} not found'.format(path), headers)
+
+        if query.get('$filter'):
+            items = apply_filter(items, query['$filter'])
+        offset = int(query.get('$skiptoken') or query.get('$skip') or 0)
+        page_size = state.page_size
+        if query.get('$top'):
+            page_size = min(page_size, int(query['$top']))
+        page = items[offset:offset + page_size]
+        result = dict(value=page)
+        if offset + page_size < len(items):
+            next_query = dict((k, v) for k, v in query.items() if k not in ['$skip', '$skiptoken'])
+            next_query['$skiptoken'] = str(offset + page_size)
+            result['nextLink'] = self.base_url() + path + '?' + urlencode(next_query)
+        return 200, headers, result
+
+    def put(self, method, path, query, body, headers):
+        state = self.state
+        with state.lock:
+            existing = state.resources.get(path.lower())
+            if_match = self.header('If-Match')
+            if if_match and if_match != '*' and (existing is None or existing['etag'] != if_match):
+                return self.error(412, 'PreconditionFailed', 'ETag does not match', headers)
+            if method == 'PATCH':
+                if existing is None:
+                    return self.error(404, 'ResourceNotFound', 'Resource {0} not found'.format(path), headers)
+                merged = json.loads(json.dumps(existing))
+                for k, v in (body or {}).items():
+                    if isinstance(v, dict) and isinstance(merged.get(k), dict):
+                        merged[k].update(v)
+                    else:
+                        merged[k] = v
+                body = merged
+            resource, created = state.put(path, body)
+        headers['ETag'] = resource['etag']
+        if state.async_mode:
+            operation_id = state.start_operation('put', path)
+            return 201 if created else 202, self.async_headers(operation_id, query, headers), resource
+        return 201 if created else 200, headers, resource
+
+    def delete(self, path, headers):
+        state = self.state
+        with state.lock:
+            existing = state.resources.get(path.lower())
+            if existing is None:
+                return 204, headers, None
+            if_match = self.header('If-Match')
+            if if_match and if_match != '*' and existing['etag'] != if_match:
+                return self.error(412, 'PreconditionFailed', 'ETag does not match', headers)
+        if state.async_mode:
+            operation_id = state.start_operation('delete', path)
+            return 202, self.async_headers(operation_id, {'api-version': 'standin'}, headers), None
+        state.delete(path)
+        return 200, headers, None
+
+    def post(self, path, query, body, headers):
+        state = self.state
+        action = path.rstrip('/').split('/')[-1]
+        parent = path.rstrip('/').rsplit('/', 1)[0]
+        if action in ['regeneratePrimaryKey', 'regenerateSecondaryKey']:
+            with state.lock:
+                resource = state.resources.get(parent.lower())
+                if resource is None:
+                    return self.error(404, 'ResourceNotFound', 'Resource {0} not found'.format(parent), headers)
+                key = 'primaryKey' if action == 'regeneratePrimaryKey' else 'secondaryKey'
+                resource['properties'][key] = uuid.uuid4().hex
+                resource['etag'] = state.next_etag()
+            return 204, headers, None
+        if action == 'createSubscription':
+            subscription_id = str(uuid.uuid4())
+            state.put('/subscriptions/' + subscription_id,
+                      dict(properties=dict(displayName=(body or {}).get('displayName'), state='Enabled')))
+            operation_id = state.start_operation('post', path, dict(subscriptionLink='/subscriptions/' + subscription_id))
+            headers = self.async_headers(operation_id, query, headers)
+            return 202, headers, None
+        return 200, headers, {}
+
+
+class ThreadingArmServer(ThreadingMixIn, HTTPServer):
+    daemon_threads = True
+
+
+def create_server(host='127.0.0.1', port=0, **kwargs):
+    '''
+    Create a stand-in server, port 0 picks a free port. Call serve_forever() to run it.
+    '''
+    state = ArmState(**kwargs)
+    handler = type('BoundArmHandler', (ArmHandler,), dict(state=state))
+    server = ThreadingArmServer((host, port), handler)
+    server.state = state
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Local Azure Resource Manager stand-in')
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8080)
+    parser.add_argument('--page-size', type=int, default=100, help='items per list page')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every ARM request')
+    parser.add_argument('--async-mode', action='store_true', help='answer PUT and DELETE with 201/202 and an async operation')
+    parser.add_argument('--async-duration', type=float, default=0.0, help='seconds until async operations complete')
+    parser.add_argument('--throttle-rate', type=int, default=0, help='requests per second above which 429 is returned')
+    parser.add_argument('--retry-after', type=int, default=1, help='Retry-After seconds sent with 429')
+    args = parser.parse_args()
+
+    server = create_server(args.host,
+                           args.port,
+                           page_size=args.page_size,
+                           latency=args.latency,
+                           async_mode=args.async_mode,
+                           async_duration=args.async_duration,
+                           throttle_rate=args.throttle_rate,
+                           retry_after=args.retry_after)
+    print('ARM stand-in listening on http://{0}:{1}'.format(*server.server_address))
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == '__main__':
+    main()
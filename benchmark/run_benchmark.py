@@ -0,0 +1,176 @@
+#!/usr/bin/env python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+'''
+Run the modules of the azure.rm collection against the local ARM stand-in
+and report wall time, request count and bytes transferred per scenario.
+
+Scenarios are read from a YAML file (scenarios.yml next to this script by
+default). Each scenario seeds the stand-in, runs its tasks in a generated
+playbook and collects the stand-in statistics:
+
+  - name: list_users_paged
+    seed:
+      generate:
+        - collection: /subscriptions/{subscription_id}/.../users
+          count: 1000
+          name: user{0}
+          body: {properties: {email: 'user{0}@contoso.com'}}
+    tasks:
+      - azure.rm.apimanagementuser_info:
+          resource_group: myResourceGroup
+          service_name: myService
+
+{subscription_id} in seed paths is replaced by the subscription used for the run.
+'''
+
+from __future__ import absolute_import, division, print_function
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+
+import yaml
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from arm_standin import create_server  # noqa: E402
+
+
+SUBSCRIPTION_ID = '00000000-0000-0000-0000-000000000000'
+COLLECTION_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'collections', 'rm')
+
+
+def control(base_url, method, path, body=None):
+    try:
+        from urllib.request import Request, urlopen
+    except ImportError:
+        from urllib2 import Request, urlopen
+    data = json.dumps(body).encode('utf-8') if body is not None else None
+    request = Request(base_url + path, data=data, headers={'Content-Type': 'application/json'})
+    request.get_method = lambda: method
+    response = urlopen(request)
+    text = response.read()
+    return json.loads(text.decode('utf-8')) if text else None
+
+
+def prepare_collections_path(work_dir):
+    '''
+    ansible-playbook expects ansible_collections/<namespace>/<name>, link the collection there.
+    '''
+    target = os.path.join(work_dir, 'ansible_collections', 'azure')
+    os.makedirs(target)
+    os.symlink(os.path.abspath(COLLECTION_PATH), os.path.join(target, 'rm'))
+    return work_dir
+
+
+def run_scenario(scenario, base_url, work_dir, env, config, verbose=False):
+    # seeding goes through the control endpoints, which are not counted
+    control(base_url, 'POST', '/_standin/reset')
+    control(base_url, 'POST', '/_standin/config', dict(config, **scenario.get('config', {})))
+    if scenario.get('seed'):
+        seed = json.loads(json.dumps(scenario['seed']).replace('{subscription_id}', SUBSCRIPTION_ID))
+        control(base_url, 'POST', '/_standin/seed', seed)
+
+    playbook = [dict(hosts='localhost',
+                     connection='local',
+                     gather_facts=False,
+                     tasks=scenario['tasks'])]
+    playbook_path = os.path.join(work_dir, scenario['name'] + '.yml')
+    with open(playbook_path, 'w') as f:
+        json.dump(playbook, f, indent=2)
+
+    start = time.time()
+    process = subprocess.Popen(['ansible-playbook', playbook_path],
+                               env=env,
+                               stdout=subprocess.PIPE,
+                               stderr=subprocess.STDOUT)
+    output = process.communicate()[0].decode('utf-8', 'replace')
+    elapsed = time.time() - start
+    stats = control(base_url, 'GET', '/_standin/stats')
+
+    if verbose or process.returncode != 0:
+        sys.stderr.write(output)
+
+    return dict(name=scenario['name'],
+                modules=sorted(set(k for task in scenario['tasks'] for k in task if '.' in k)),
+                rc=process.returncode,
+                wall_time=round(elapsed, 3),
+                requests=stats['requests'],
+                bytes_in=stats['bytes_in'],
+                bytes_out=stats['bytes_out'],
+                throttled=stats['throttled'],
+                batched=stats['batched'],
+                routes=stats['routes'])
+
+
+def print_report(results, stream):
+    header = '{0:<40} {1:>4} {2:>10} {3:>9} {4:>12} {5:>9}'
+    stream.write(header.format('scenario', 'rc', 'wall [s]', 'requests', 'bytes', 'throttled') + '\n')
+    for result in results:
+        stream.write(header.format(result['name'],
+                                   result['rc'],
+                                   '{0:.2f}'.format(result['wall_time']),
+                                   result['requests'],
+                                   result['bytes_in'] + result['bytes_out'],
+                                   result['throttled']) + '\n')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark azure.rm modules against a local ARM stand-in')
+    parser.add_argument('--scenarios', default=os.path.join(os.path.dirname(os.path.abspath(__file__)), 'scenarios.yml'))
+    parser.add_argument('--only', action='append', help='run only the named scenario, can be repeated')
+    parser.add_argument('--page-size', type=int, default=100)
+    parser.add_argument('--latency', type=float, default=0.05, help='seconds added to every ARM request')
+    parser.add_argument('--async-mode', action='store_true')
+    parser.add_argument('--async-duration', type=float, default=0.0)
+    parser.add_argument('--throttle-rate', type=int, default=0)
+    parser.add_argument('--output', help='write the full results as JSON to this file')
+    parser.add_argument('--verbose', action='store_true', help='show ansible-playbook output')
+    args = parser.parse_args()
+
+    with open(args.scenarios) as f:
+        scenarios = yaml.safe_load(f)
+    if args.only:
+        scenarios = [x for x in scenarios if x['name'] in args.only]
+
+    config = dict(page_size=args.page_size,
+                  latency=args.latency,
+                  async_mode=args.async_mode,
+                  async_duration=args.async_duration,
+                  throttle_rate=args.throttle_rate)
+    server = create_server(**config)
+    thread = threading.Thread(target=server.serve_forever)
+    thread.daemon = True
+    thread.start()
+    base_url = 'http://{0}:{1}'.format(*server.server_address)
+
+    work_dir = tempfile.mkdtemp(prefix='azure_rm_benchmark_')
+    env = dict(os.environ)
+    env.update(ANSIBLE_COLLECTIONS_PATHS=prepare_collections_path(work_dir),
+               AZURE_CLOUD_ENVIRONMENT=base_url,
+               AZURE_SUBSCRIPTION_ID=SUBSCRIPTION_ID,
+               AZURE_CLIENT_ID='standin',
+               AZURE_SECRET='standin',
+               AZURE_TENANT='standin',
+               OAUTHLIB_INSECURE_TRANSPORT='1')
+
+    results = [run_scenario(x, base_url, work_dir, env, config, args.verbose) for x in scenarios]
+    server.shutdown()
+
+    print_report(results, sys.stdout)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(x['rc'] == 0 for x in results) else 1
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+DOCUMENTATION = '''
+    callback: azure_rm_perf
+    type: aggregate
+    short_description: Summarize Azure Resource Manager requests per module.
+    description:
+      - >-
+        Aggregates the request statistics the azure.rm modules add to their
+        results as C(_perf) and prints, at the end of the playbook, the number of
+        tasks, requests, time spent in requests, bytes transferred, retries,
+        throttled requests and lowest remaining ARM rate limits per module.
+    requirements:
+      - Enable this callback with C(callback_whitelist = azure.rm.azure_rm_perf).
+      - Set the C(AZURE_RM_PERF) environment variable, so the modules collect the statistics.
+'''
+
+from ansible.plugins.callback import CallbackBase
+
+
+class CallbackModule(CallbackBase):
+    CALLBACK_VERSION = 2.0
+    CALLBACK_TYPE = 'aggregate'
+    CALLBACK_NAME = 'azure.rm.azure_rm_perf'
+    CALLBACK_NEEDS_WHITELIST = True
+
+    def __init__(self):
+        super(CallbackModule, self).__init__()
+        self.modules = {}
+
+    def _record(self, result):
+        results = [result._result] + [x for x in result._result.get('results', []) if isinstance(x, dict)]
+        for item in results:
+            perf = item.get('_perf')
+            if not perf:
+                continue
+            module = self.modules.setdefault(result._task.action, dict(tasks=0,
+                                                                       requests=0,
+                                                                       elapsed=0.0,
+                                                                       bytes_sent=0,
+                                                                       bytes_received=0,
+                                                                       retries=0,
+                                                                       throttled=0,
+                                                                       ratelimit_remaining={}))
+            module['tasks'] += 1
+            for key in ['requests', 'elapsed', 'bytes_sent', 'bytes_received', 'retries', 'throttled']:
+                module[key] += perf.get(key, 0)
+            for header, value in perf.get('ratelimit_remaining', {}).items():
+                module['ratelimit_remaining'][header] = min(value, module['ratelimit_remaining'].get(header, value))
+
+    def v2_runner_on_ok(self, result):
+        self._record(result)
+
+    def v2_runner_on_failed(self, result, ignore_errors=False):
+        self._record(result)
+
+    def v2_playbook_on_stats(self, stats):
+        if not self.modules:
+            return
+        line = '{0:<45} {1:>6} {2:>9} {3:>10} {4:>12} {5:>8} {6:>10} {7:>10}'
+        self._display.banner('AZURE RM REQUESTS')
+        self._display.display(line.format('module', 'tasks', 'requests', 'time [s]', 'bytes', 'retries',
+                                          'throttled', 'min reads'))
+        for name, module in sorted(self.modules.items(), key=lambda x: -x[1]['elapsed']):
+            reads = module['ratelimit_remaining'].get('x-ms-ratelimit-remaining-subscription-reads', '-')
+            self._display.display(line.format(name,
+                                              module['tasks'],
+                                              module['requests'],
+                                              '{0:.2f}'.format(module['elapsed']),
+                                              module['bytes_sent'] + module['bytes_received'],
+                                              module['retries'],
+                                              module['throttled'],
+                                              reads))
@@ -0,0 +1,176 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import time
+
+try:
+    from urllib.parse import urlencode
+except ImportError:
+    from urllib import urlencode
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+from ansible.module_utils.six import string_types
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller
+
+
+BATCH_URL = '/batch'
+BATCH_API_VERSION = '2020-06-01'
+# ARM refuses batches of more than 20 requests
+MAX_BATCH_SIZE = 20
+# throttled requests of a batch are sent again in the next round, at most this many times
+MAX_BATCH_RETRIES = 3
+
+
+def batch_request(url, query_parameters=None, method='GET', body=None):
+    '''
+    Describe one request of a batch. 'url' is relative to the resource manager endpoint.
+    '''
+    return dict(url=url, query_parameters=query_parameters or {}, method=method, body=body)
+
+
+def send_batch(mgmt_client,
+               requests,
+               header_parameters=None,
+               batch_size=MAX_BATCH_SIZE,
+               max_workers=1,
+               timeout=600):
+    '''
+    Send requests created with batch_request() through the ARM batch endpoint,
+    'batch_size' requests per round trip and up to 'max_workers' round trips in
+    parallel.
+
+    Returns one dict(status_code, headers, body) per request, in the order of
+    'requests'; 'body' is the parsed JSON content or None. Requests throttled
+    within a batch are retried in a later batch after their Retry-After interval.
+    When the cloud doesn't offer the batch endpoint, requests are sent one by one.
+    CloudError of the batch call itself is propagated to the caller.
+    '''
+    header_parameters = dict(header_parameters or {})
+    batch_size = max(1, min(batch_size, MAX_BATCH_SIZE))
+    results = [None] * len(requests)
+    pending = list(range(len(requests)))
+    attempt = 0
+
+    while pending:
+        chunks = [pending[i:i + batch_size] for i in range(0, len(pending), batch_size)]
+
+        def send_chunk(indices):
+            return _send_chunk(mgmt_client, [requests[i] for i in indices], header_parameters, timeout)
+
+        throttled = []
+        retry_after = 0
+        for indices, outcome in zip(chunks, run_concurrently(send_chunk, chunks, max_workers)):
+            if outcome[1] is not None:
+                raise outcome[1]
+            for index, result in zip(indices, outcome[0]):
+                results[index] = result
+                if result['status_code'] == 429 and attempt < MAX_BATCH_RETRIES:
+                    throttled.append(index)
+                    retry_after = max(retry_after, _retry_after(result['headers']))
+        pending = throttled
+        attempt += 1
+        if pending:
+            time.sleep(retry_after)
+    return results
+
+
+def _send_chunk(mgmt_client, chunk, header_parameters, timeout):
+    body = dict(requests=[])
+    for index, request in enumerate(chunk):
+        item = dict(name=str(index),
+                    httpMethod=request['method'],
+                    url=_full_url(request['url'], request['query_parameters']))
+        if request['body'] is not None:
+            item['content'] = request['body']
+        body['requests'].append(item)
+
+    try:
+        response = mgmt_client.query(BATCH_URL,
+                                     'POST',
+                                     {'api-version': BATCH_API_VERSION},
+                                     header_parameters,
+                                     body,
+                                     [200, 202],
+                                     0,
+                                     0)
+    except CloudError as e:
+        # batch endpoint not available in this cloud
+        if e.status_code not in [404, 405]:
+            raise
+        return [_send_single(mgmt_client, x, header_parameters) for x in chunk]
+
+    if response.status_code == 202:
+        poller = AsyncOperationPoller(mgmt_client, header_parameters, timeout)
+        response = poller.wait(response)
+
+    responses = {}
+    for item in json.loads(response.text).get('responses') or []:
+        responses[item.get('name')] = item
+
+    results = []
+    for index in range(len(chunk)):
+        item = responses.get(str(index)) or {}
+        content = item.get('content')
+        if isinstance(content, string_types) and content:
+            try:
+                content = json.loads(content)
+            except ValueError:
+                pass
+        results.append(dict(status_code=item.get('httpStatusCode'),
+                            headers=item.get('headers') or {},
+                            body=content))
+    return results
+
+
+def _send_single(mgmt_client, request, header_parameters):
+    try:
+        response = mgmt_client.query(request['url'],
+                                     request['method'],
+                                     request['query_parameters'],
+                                     header_parameters,
+                                     request['body'],
+                                     [200, 201, 202, 204],
+                                     0,
+                                     0)
+    except CloudError as e:
+        response = getattr(e, 'response', None)
+        return dict(status_code=e.status_code,
+                    headers=dict(getattr(response, 'headers', None) or {}),
+                    body=_parse(response))
+    return dict(status_code=response.status_code,
+                headers=dict(response.headers or {}),
+                body=_parse(response))
+
+
+def _full_url(url, query_parameters):
+    if not query_parameters:
+        return url
+    return url + ('&' if '?' in url else '?') + urlencode(sorted(query_parameters.items()))
+
+
+def _parse(response):
+    try:
+        return json.loads(response.text) if response is not None and response.text else None
+    except ValueError:
+        return None
+
+
+def _retry_after(headers):
+    for key in headers:
+        if key.lower() == 'retry-after':
+            try:
+                return max(0, int(headers[key]))
+            except (TypeError, ValueError):
+                break
+    return 1
@@ -0,0 +1,47 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+
+from ansible.module_utils.six.moves import queue
+
+
+def run_concurrently(func, items, max_workers=8):
+    '''
+    Call func(item) for every item using a bounded pool of worker threads.
+
+    Returns a list of (result, exception) tuples in the same order as 'items'.
+    Exceptions raised by 'func' are captured, so a failing item never stops
+    the remaining ones.
+    '''
+    items = list(items)
+    results = [None] * len(items)
+    if not items:
+        return results
+
+    work = queue.Queue()
+    for index, item in enumerate(items):
+        work.put((index, item))
+
+    def worker():
+        while True:
+            try:
+                index, item = work.get_nowait()
+            except queue.Empty:
+                return
+            try:
+                results[index] = (func(item), None)
+            except Exception as e:
+                results[index] = (None, e)
+
+    threads = [threading.Thread(target=worker) for x in range(max(1, min(max_workers, len(items))))]
+    for thread in threads:
+        thread.daemon = True
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return results
@@ -0,0 +1,200 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import hashlib
+import io
+import json
+import os
+import re
+import tempfile
+
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_xml import canonical_xml
+
+
+DEFAULT_HASH_DIR = '~/.ansible/azure_rm_content_hashes'
+HASH_MARKER = '<!-- ansible-content-sha256:{0} -->'
+HASH_MARKER_RE = re.compile(r'\s*<!-- ansible-content-sha256:([0-9a-f]{64}) -->\s*$')
+CHUNK_SIZE = 1024 * 1024
+
+
+def normalized_lines(value=None, path=None):
+    '''
+    Yield the lines of 'value', or of the file at 'path' read one line at a time,
+    with line endings unified, trailing whitespace and a leading BOM removed.
+    '''
+    if path is not None:
+        with io.open(path, 'r', encoding='utf-8-sig', newline=None) as f:
+            for line in f:
+                yield line.rstrip()
+    else:
+        value = value or ''
+        if value.startswith(u'\ufeff'):
+            value = value[1:]
+        for line in value.splitlines():
+            yield line.rstrip()
+
+
+def content_hash(value=None, path=None, extra=None):
+    '''
+    Stable sha256 of a document given as 'value' or as a file 'path'. Line endings,
+    trailing whitespace and trailing empty lines don't change the hash. 'extra' is
+    any JSON serializable data which changes the meaning of the document, e.g. its format.
+    '''
+    digest = hashlib.sha256()
+    digest.update(json.dumps(extra, sort_keys=True).encode('utf-8'))
+    digest.update(b'\n')
+    empty_lines = 0
+    for line in normalized_lines(value, path):
+        # empty lines count once followed by content
+        if not line:
+            empty_lines += 1
+            continue
+        digest.update(b'\n' * empty_lines)
+        empty_lines = 0
+        digest.update(line.encode('utf-8') + b'\n')
+    return digest.hexdigest()
+
+
+def document_digest(value=None, path=None, content_type=None):
+    '''
+    sha256 of the canonical form of a document given as 'value' or as a file 'path'.
+    JSON documents are compared by their data, XML documents by canonical_xml() and
+    anything else, or documents failing to parse, by content_hash().
+    '''
+    content_type = (content_type or '').lower()
+    try:
+        if content_type.endswith('json'):
+            if path is not None:
+                with io.open(path, 'r', encoding='utf-8-sig') as f:
+                    data = json.load(f)
+            else:
+                data = json.loads(value)
+            canonical = json.dumps(data, sort_keys=True, separators=(',', ':'))
+        elif content_type.endswith('xml'):
+            canonical = canonical_xml(read_content(path) if path is not None else value)
+        else:
+            return content_hash(value, path)
+    except ValueError:
+        return content_hash(value, path)
+    return hashlib.sha256(canonical.encode('utf-8')).hexdigest()
+
+
+def read_content(path):
+    '''
+    Read a document from disk in chunks, the whole content is only needed when it's sent.
+    '''
+    chunks = []
+    with io.open(path, 'r', encoding='utf-8-sig') as f:
+        while True:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return u''.join(chunks)
+
+
+def file_digest(path):
+    '''
+    sha256 of the raw bytes of the file at 'path', or None if it can't be read.
+    '''
+    digest = hashlib.sha256()
+    try:
+        with open(path, 'rb') as f:
+            while True:
+                chunk = f.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                digest.update(chunk)
+    except (IOError, OSError):
+        return None
+    return digest.hexdigest()
+
+
+def stream_to_file(stream, path):
+    '''
+    Copy the file-like 'stream' to 'path' in chunks, through a temporary file in the
+    same directory. An existing file is only replaced when its content differs, new
+    files are created with mode 0600. Returns (sha256, size, changed).
+    '''
+    digest = hashlib.sha256()
+    size = 0
+    fd, temp_name = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)),
+                                     prefix='.{0}.'.format(os.path.basename(path)))
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            while True:
+                chunk = stream.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                if not isinstance(chunk, bytes):
+                    chunk = chunk.encode('utf-8')
+                digest.update(chunk)
+                size += len(chunk)
+                f.write(chunk)
+        checksum = digest.hexdigest()
+        if checksum == file_digest(path):
+            os.remove(temp_name)
+            return checksum, size, False
+        if os.path.exists(path):
+            os.chmod(temp_name, os.stat(path).st_mode & 0o7777)
+        os.rename(temp_name, path)
+    except BaseException:
+        if os.path.exists(temp_name):
+            os.remove(temp_name)
+        raise
+    return checksum, size, True
+
+
+def get_hash_marker(text):
+    '''
+    Return the hash stored at the end of 'text' with add_hash_marker(), or None.
+    '''
+    match = HASH_MARKER_RE.search(text or '')
+    return match.group(1) if match else None
+
+
+def strip_hash_marker(text):
+    if text is None:
+        return None
+    return HASH_MARKER_RE.sub('', text)
+
+
+def add_hash_marker(text, digest):
+    text = strip_hash_marker(text) or ''
+    return (text + '\n' if text else '') + HASH_MARKER.format(digest)
+
+
+class LocalHashStore(object):
+    '''
+    Content hashes of resources kept on the controller, one 0600 file per resource url.
+    '''
+
+    def __init__(self, path=None):
+        self.path = os.path.expanduser(path or DEFAULT_HASH_DIR)
+
+    def get(self, url):
+        try:
+            with open(self._file_name(url)) as f:
+                return json.load(f).get('hash')
+        except (IOError, OSError, ValueError):
+            return None
+
+    def set(self, url, digest):
+        file_name = self._file_name(url)
+        temp_name = '{0}.{1}.tmp'.format(file_name, os.getpid())
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(url=url, hash=digest), f)
+            os.rename(temp_name, file_name)
+        except (IOError, OSError):
+            pass
+
+    def _file_name(self, url):
+        return os.path.join(self.path, hashlib.sha256(url.lower().encode('utf-8')).hexdigest() + '.json')
@@ -0,0 +1,107 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import get_header
+
+
+DEFAULT_CACHE_DIR = '~/.ansible/azure_rm_etag_cache'
+
+
+class EtagCache(object):
+    '''
+    Tracks ETags of resources read by a module.
+
+    ETags are always remembered in memory for the current run. When 'enabled',
+    bodies are also kept in a per-user directory keyed by resource url, reads
+    send If-None-Match and reuse the cached body on 304 Not Modified, and writes
+    send If-Match so a resource changed by somebody else since it was read is
+    never overwritten.
+    '''
+
+    def __init__(self, enabled=False, path=None):
+        self.enabled = enabled
+        self.path = os.path.expanduser(path or DEFAULT_CACHE_DIR)
+        self.etags = {}
+
+    def get(self, mgmt_client, url, query_parameters, header_parameters, status_code,
+            polling_timeout=600, polling_interval=30):
+        '''
+        GET the resource and return its parsed body. CloudError is propagated.
+        '''
+        headers = dict(header_parameters)
+        entry = self._load(url) if self.enabled else None
+        if entry:
+            headers['If-None-Match'] = entry['etag']
+        response = mgmt_client.query(url,
+                                     'GET',
+                                     query_parameters,
+                                     headers,
+                                     None,
+                                     status_code + [304],
+                                     polling_timeout,
+                                     polling_interval)
+        if response.status_code == 304 and entry:
+            self.etags[url] = entry['etag']
+            return entry['body']
+        body = json.loads(response.text)
+        etag = get_header(response, 'ETag') or (body.get('etag') if isinstance(body, dict) else None)
+        if etag:
+            self.etags[url] = etag
+            if self.enabled:
+                self._store(url, etag, body)
+        return body
+
+    def write_headers(self, url, header_parameters):
+        '''
+        Return headers for a PUT, PATCH or DELETE of 'url' and drop its cached body,
+        as the write is going to change the ETag anyway.
+        '''
+        headers = dict(header_parameters)
+        if self.enabled:
+            if self.etags.get(url):
+                headers['If-Match'] = self.etags[url]
+            self.invalidate(url)
+        return headers
+
+    def invalidate(self, url):
+        self.etags.pop(url, None)
+        try:
+            os.remove(self._file_name(url))
+        except OSError:
+            pass
+
+    def _file_name(self, url):
+        return os.path.join(self.path, hashlib.sha256(url.lower().encode('utf-8')).hexdigest() + '.json')
+
+    def _load(self, url):
+        try:
+            with open(self._file_name(url), 'r') as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get('url') != url or not entry.get('etag'):
+            return None
+        return entry
+
+    def _store(self, url, etag, body):
+        # bodies may contain secrets, so the cache is only readable by the current user
+        try:
+            if not os.path.isdir(self.path):
+                os.makedirs(self.path, 0o700)
+            file_name = self._file_name(url)
+            temp_name = file_name + '.' + str(os.getpid())
+            fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(dict(url=url, etag=etag, body=body), f)
+            os.rename(temp_name, file_name)
+        except (IOError, OSError):
+            # the cache is an optimization only
+            pass
@@ -0,0 +1,155 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import threading
+import time
+
+try:
+    from urllib.parse import urlsplit
+except ImportError:
+    from urlparse import urlsplit
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+
+# set to any non empty value to add '_perf' to module results
+PERF_ENV = 'AZURE_RM_PERF'
+# path of a file to which every request is appended as one JSON line
+PERF_TRACE_ENV = 'AZURE_RM_PERF_TRACE'
+
+RATELIMIT_HEADERS = ['x-ms-ratelimit-remaining-subscription-reads',
+                     'x-ms-ratelimit-remaining-subscription-writes',
+                     'x-ms-ratelimit-remaining-tenant-reads',
+                     'x-ms-ratelimit-remaining-tenant-writes']
+
+
+def url_template(url):
+    '''
+    Strip host and query from a url and replace resource names by placeholders, e.g.
+    /subscriptions/{}/resourceGroups/{}/providers/Microsoft.ApiManagement/service/{}/apis/{}
+    '''
+    segments = [x for x in urlsplit(url).path.split('/') if x]
+    result = []
+    name_next = False
+    after_providers = False
+    for segment in segments:
+        if name_next:
+            result.append('{}')
+            name_next = False
+        elif after_providers:
+            result.append(segment)
+            after_providers = False
+        else:
+            result.append(segment)
+            after_providers = segment.lower() == 'providers'
+            name_next = not after_providers
+    return '/' + '/'.join(result)
+
+
+def instrument_client(client, results):
+    '''
+    Wrap a GenericRestClient so every query is measured, when enabled through the
+    AZURE_RM_PERF or AZURE_RM_PERF_TRACE environment variables. Otherwise the
+    client is returned as is.
+    '''
+    report = bool(os.environ.get(PERF_ENV))
+    trace_file = os.environ.get(PERF_TRACE_ENV)
+    if not report and not trace_file:
+        return client
+    return InstrumentedClient(client, results if report else None, trace_file)
+
+
+class InstrumentedClient(object):
+    '''
+    Proxy of GenericRestClient recording method, url template, status, latency, bytes,
+    retries and remaining ARM rate limits of every query. The summary is kept up to
+    date in results['_perf'].
+    '''
+
+    def __init__(self, client, results=None, trace_file=None):
+        self.client = client
+        self.results = results
+        self.trace_file = trace_file
+        self.lock = threading.Lock()
+        self.summary = dict(requests=0,
+                            elapsed=0.0,
+                            bytes_sent=0,
+                            bytes_received=0,
+                            retries=0,
+                            throttled=0,
+                            ratelimit_remaining={},
+                            routes={})
+        if self.results is not None:
+            self.results['_perf'] = self.summary
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes,
+              polling_timeout, polling_interval):
+        start = time.time()
+        response = None
+        status = None
+        try:
+            response = self.client.query(url, method, query_parameters, header_parameters, body,
+                                         expected_status_codes, polling_timeout, polling_interval)
+            status = response.status_code
+            return response
+        except CloudError as e:
+            status = e.status_code
+            response = getattr(e, 'response', None)
+            raise
+        finally:
+            self.record(url, method, body, status, response, time.time() - start)
+
+    def record(self, url, method, body, status, response, elapsed):
+        headers = getattr(response, 'headers', None) or {}
+        content = getattr(response, 'content', None) or b''
+        retries = getattr(getattr(getattr(response, 'raw', None), 'retries', None), 'history', None) or []
+        entry = dict(time=time.time(),
+                     method=method,
+                     url=url_template(url),
+                     status=status,
+                     elapsed=round(elapsed, 4),
+                     bytes_sent=len(json.dumps(body)) if body is not None else 0,
+                     bytes_received=len(content),
+                     retries=len(retries) + getattr(self.client, 'last_retries', 0))
+        for header in RATELIMIT_HEADERS:
+            if headers.get(header) is not None:
+                entry[header] = int(headers.get(header))
+
+        with self.lock:
+            summary = self.summary
+            summary['requests'] += 1
+            summary['elapsed'] = round(summary['elapsed'] + elapsed, 4)
+            summary['bytes_sent'] += entry['bytes_sent']
+            summary['bytes_received'] += entry['bytes_received']
+            summary['retries'] += entry['retries']
+            if status == 429:
+                summary['throttled'] += 1
+            for header in RATELIMIT_HEADERS:
+                if header in entry:
+                    summary['ratelimit_remaining'][header] = min(entry[header],
+                                                                 summary['ratelimit_remaining'].get(header, entry[header]))
+            route = summary['routes'].setdefault(method + ' ' + entry['url'],
+                                                 dict(requests=0, elapsed=0.0, bytes_received=0, statuses={}))
+            route['requests'] += 1
+            route['elapsed'] = round(route['elapsed'] + elapsed, 4)
+            route['bytes_received'] += entry['bytes_received']
+            route['statuses'][str(status)] = route['statuses'].get(str(status), 0) + 1
+            if self.trace_file:
+                try:
+                    with open(self.trace_file, 'a') as f:
+                        f.write(json.dumps(entry) + '\n')
+                except (IOError, OSError):
+                    pass
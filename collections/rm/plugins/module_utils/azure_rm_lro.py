@@ -0,0 +1,270 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import base64
+import json
+import random
+import time
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+
+TERMINAL_STATES = ['succeeded', 'failed', 'canceled', 'cancelled']
+OPERATION_HANDLE_VERSION = 1
+OPERATION_KINDS = ['async', 'location', 'resource']
+
+
+class AsyncOperationError(Exception):
+    pass
+
+
+class AsyncOperationTimeout(AsyncOperationError):
+    pass
+
+
+def get_header(response, name):
+    '''
+    Case insensitive header lookup on a raw response, returns None if missing.
+    '''
+    headers = getattr(response, 'headers', None) or {}
+    for key in headers:
+        if key.lower() == name.lower():
+            return headers[key]
+    return None
+
+
+def get_retry_after(response):
+    value = get_header(response, 'Retry-After')
+    try:
+        return max(0, int(value))
+    except (TypeError, ValueError):
+        return None
+
+
+def operation_handle(response, resource_url, method, api_version):
+    '''
+    Serialize what is needed to follow the long running operation started by 'response'
+    into an opaque string, so another task can poll it with AsyncOperationPoller.check().
+    Operations answered without Azure-AsyncOperation or Location headers are followed
+    through the provisioning state of the resource, or its absence after DELETE.
+    '''
+    async_url = get_header(response, 'Azure-AsyncOperation')
+    location = get_header(response, 'Location')
+    if async_url:
+        kind, url = 'async', async_url
+    elif location and response.status_code in [201, 202]:
+        kind, url = 'location', location
+    else:
+        kind, url = 'resource', resource_url
+    handle = dict(v=OPERATION_HANDLE_VERSION,
+                  kind=kind,
+                  url=url,
+                  resource=resource_url,
+                  method=method,
+                  api_version=api_version,
+                  started=int(time.time()))
+    return base64.urlsafe_b64encode(json.dumps(handle, sort_keys=True).encode('utf-8')).decode('ascii')
+
+
+def parse_operation_handle(handle):
+    '''
+    Return the dict serialized by operation_handle(), raise ValueError for anything else.
+    '''
+    try:
+        operation = json.loads(base64.urlsafe_b64decode(handle.encode('ascii')).decode('utf-8'))
+    except (AttributeError, TypeError, ValueError):
+        raise ValueError('Invalid operation handle')
+    if (not isinstance(operation, dict) or operation.get('v') != OPERATION_HANDLE_VERSION or
+            operation.get('kind') not in OPERATION_KINDS or not operation.get('url')):
+        raise ValueError('Invalid operation handle')
+    return operation
+
+
+class AsyncOperationPoller(object):
+    '''
+    Waits for completion of ARM long running operations.
+
+    The operation is tracked through the Azure-AsyncOperation header when present,
+    then through the Location header. When the service answered synchronously
+    the resource itself can be polled until it disappears. Poll intervals start at
+    'initial_delay' and grow exponentially with jitter up to 'max_delay', unless
+    the service asks for a specific interval with Retry-After. Waiting never
+    exceeds 'timeout' seconds in total.
+    '''
+
+    def __init__(self, mgmt_client, header_parameters=None, timeout=600, initial_delay=1, max_delay=30):
+        self.mgmt_client = mgmt_client
+        self.header_parameters = header_parameters if header_parameters is not None else {}
+        self.timeout = timeout
+        self.initial_delay = initial_delay
+        self.max_delay = max_delay
+        self.deadline = None
+        self.delay = None
+
+    def wait(self, response, url=None, query_parameters=None, wait_for_absence=False):
+        '''
+        Wait for the operation started by 'response' and return the last response received.
+        If 'wait_for_absence' is set, additionally wait until GET on 'url' returns 404.
+        '''
+        self.deadline = time.time() + self.timeout
+        self.delay = self.initial_delay
+
+        async_url = get_header(response, 'Azure-AsyncOperation')
+        location = get_header(response, 'Location')
+        retry_after = get_retry_after(response)
+
+        if async_url:
+            response = self._wait_async_operation(async_url, retry_after)
+        elif location and response.status_code in [201, 202]:
+            response = self._wait_location(location, retry_after)
+
+        if wait_for_absence:
+            self._wait_absent(url, query_parameters)
+        return response
+
+    def poll_status(self, async_url):
+        '''
+        Query an Azure-AsyncOperation url once and return (status, body).
+        '''
+        response = self._get(async_url, None, [200, 202])
+        body = self._parse(response)
+        return (body.get('status') or 'InProgress'), body
+
+    def check(self, operation):
+        '''
+        Query the state of an operation parsed by parse_operation_handle() once and
+        return (status, error). The status is the terminal state reported by the
+        service, Succeeded, Failed or Canceled, or InProgress.
+        '''
+        error = None
+        if operation['kind'] == 'async':
+            status, body = self.poll_status(operation['url'])
+            error = (body.get('error') or {}).get('message')
+        elif operation['kind'] == 'location':
+            response = self._get(operation['url'], None, [200, 201, 202, 204])
+            status = 'InProgress' if response.status_code == 202 else 'Succeeded'
+        else:
+            try:
+                response = self._get(operation['url'], {'api-version': operation['api_version']}, [200, 201, 202])
+            except CloudError as e:
+                if e.status_code != 404:
+                    raise
+                if operation['method'] == 'DELETE':
+                    return 'Succeeded', None
+                return 'Failed', 'Resource not found'
+            if operation['method'] == 'DELETE':
+                return 'InProgress', None
+            status = (self._parse(response).get('properties') or {}).get('provisioningState') or 'Succeeded'
+            if status.lower() not in TERMINAL_STATES:
+                status = 'InProgress'
+        return status, error
+
+    def wait_operation(self, operation):
+        '''
+        Poll an operation parsed by parse_operation_handle() until it reaches a terminal
+        state or the timeout expires, and return (status, error) like check().
+        '''
+        self.deadline = time.time() + self.timeout
+        self.delay = self.initial_delay
+        while True:
+            status, error = self.check(operation)
+            if status.lower() in TERMINAL_STATES:
+                return status, error
+            self._sleep()
+
+    def wait_for(self, url, query_parameters, ready, not_found_timeout=None):
+        '''
+        GET 'url' until 'ready' returns true for the parsed body or the timeout expires,
+        and return the last body. Not found is retried, the resource may not be visible yet,
+        for at most 'not_found_timeout' seconds if set, after which None is returned.
+        '''
+        started = time.time()
+        self.deadline = started + self.timeout
+        self.delay = self.initial_delay
+        retry_after = 0
+        while True:
+            self._sleep(retry_after)
+            retry_after = None
+            try:
+                response = self._get(url, query_parameters, [200])
+            except CloudError as e:
+                if e.status_code != 404:
+                    raise
+                if not_found_timeout is not None and time.time() - started >= not_found_timeout:
+                    return None
+                continue
+            not_found_timeout = None
+            body = self._parse(response)
+            if ready(body):
+                return body
+            retry_after = get_retry_after(response)
+
+    def _wait_async_operation(self, async_url, retry_after):
+        while True:
+            self._sleep(retry_after)
+            response = self._get(async_url, None, [200, 202])
+            body = self._parse(response)
+            status = (body.get('status') or '').lower()
+            if status in TERMINAL_STATES:
+                if status != 'succeeded':
+                    error = body.get('error') or {}
+                    raise AsyncOperationError('Operation {0}: {1}'.format(body.get('status'),
+                                                                          error.get('message', json.dumps(error))))
+                return response
+            retry_after = get_retry_after(response)
+
+    def _wait_location(self, location, retry_after):
+        while True:
+            self._sleep(retry_after)
+            response = self._get(location, None, [200, 201, 202, 204])
+            if response.status_code != 202:
+                return response
+            retry_after = get_retry_after(response)
+
+    def _wait_absent(self, url, query_parameters):
+        # the first check is done right away, most resources are gone by now
+        retry_after = 0
+        while True:
+            self._sleep(retry_after)
+            try:
+                response = self._get(url, query_parameters, [200, 201, 202])
+            except CloudError as e:
+                if e.status_code == 404:
+                    return
+                raise
+            retry_after = get_retry_after(response)
+
+    def _get(self, url, query_parameters, status_code):
+        return self.mgmt_client.query(url,
+                                      'GET',
+                                      query_parameters if query_parameters is not None else {},
+                                      self.header_parameters,
+                                      None,
+                                      status_code,
+                                      0,
+                                      0)
+
+    def _parse(self, response):
+        try:
+            return json.loads(response.text) or {}
+        except ValueError:
+            return {}
+
+    def _sleep(self, retry_after=None):
+        remaining = self.deadline - time.time()
+        if remaining <= 0:
+            raise AsyncOperationTimeout('Operation did not complete within {0} seconds'.format(self.timeout))
+        if retry_after is not None:
+            interval = retry_after
+        else:
+            interval = random.uniform(self.delay / 2.0, self.delay)
+            self.delay = min(self.delay * 2, self.max_delay)
+        time.sleep(min(interval, remaining))
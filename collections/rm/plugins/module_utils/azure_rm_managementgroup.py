@@ -0,0 +1,278 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+from collections import deque, OrderedDict
+
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+
+MANAGEMENT_GROUPS_URL = '/providers/Microsoft.Management/managementGroups'
+SUBSCRIPTION_TYPE = '/subscriptions'
+
+
+def management_group_id(name):
+    return MANAGEMENT_GROUPS_URL + '/' + name
+
+
+def get_hierarchy(mgmt_client, name, query_parameters, header_parameters, recurse=True):
+    '''
+    GET a management group with all its descendants, or only its children
+    without 'recurse', in a single request. CloudError is propagated.
+    '''
+    query_parameters = dict(query_parameters)
+    query_parameters['$expand'] = 'children'
+    if recurse:
+        query_parameters['$recurse'] = 'true'
+    response = mgmt_client.query(management_group_id(name),
+                                 'GET',
+                                 query_parameters,
+                                 header_parameters,
+                                 None,
+                                 [200],
+                                 0,
+                                 0)
+    return json.loads(response.text)
+
+
+def flatten_hierarchy(group):
+    '''
+    Flatten a group read by get_hierarchy() into a dict with
+      - nodes, every group and subscription of the subtree keyed by id, with its
+        name, type (group or subscription), display_name, parent name, parent_id and depth,
+      - children, ids of the children of every group keyed by the group id,
+      - levels, ids of the nodes at every depth, the requested group alone at depth 0.
+    '''
+    properties = group.get('properties') or {}
+    parent = (properties.get('details') or {}).get('parent') or {}
+    nodes = OrderedDict()
+    children = OrderedDict()
+    levels = []
+
+    root = dict(id=group['id'],
+                name=group['name'],
+                type='group',
+                display_name=properties.get('displayName'),
+                parent=parent.get('name'),
+                parent_id=parent.get('id'),
+                depth=0)
+    pending = deque([(root, properties.get('children') or [])])
+    while pending:
+        node, node_children = pending.popleft()
+        nodes[node['id']] = node
+        if len(levels) <= node['depth']:
+            levels.append([])
+        levels[node['depth']].append(node['id'])
+        if node['type'] == 'group':
+            children[node['id']] = []
+        if node['depth'] > 0:
+            children[node['parent_id']].append(node['id'])
+        for child in node_children:
+            is_subscription = (child.get('type') or '').lower() == SUBSCRIPTION_TYPE
+            pending.append((dict(id=child['id'],
+                                 name=child['name'],
+                                 type='subscription' if is_subscription else 'group',
+                                 display_name=child.get('displayName'),
+                                 parent=node['name'],
+                                 parent_id=node['id'],
+                                 depth=node['depth'] + 1),
+                            child.get('children') or []))
+    return dict(nodes=nodes, children=children, levels=levels)
+
+
+def flatten_tree(items, parent=None):
+    '''
+    Flatten desired groups, which may be nested in 'children' or linked by 'parent',
+    into a list of dicts with name, parent and display_name, parents before children
+    when nested. Raises ValueError for items which are not dicts with a name.
+    '''
+    flat = []
+    for item in items:
+        if not isinstance(item, dict) or not item.get('name'):
+            raise ValueError('management group without name in children of {0}: {1}'.format(parent, item))
+        flat.append(dict(name=item['name'],
+                         parent=item.get('parent') or parent,
+                         display_name=item.get('display_name')))
+        flat.extend(flatten_tree(item.get('children') or [], item['name']))
+    return flat
+
+
+def tree_levels(hierarchy, desired, root):
+    '''
+    Sort desired groups topologically. Returns lists of desired groups, one per depth
+    below 'root', so every group is in a later list than its parent. Raises ValueError
+    for duplicate names, cycles and parents which are neither desired nor in the hierarchy.
+    '''
+    by_name = OrderedDict()
+    for item in desired:
+        if item['name'].lower() == root.lower():
+            raise ValueError('cannot list the root group in tree')
+        if item['name'].lower() in by_name:
+            raise ValueError('management group {0} is listed twice'.format(item['name']))
+        by_name[item['name'].lower()] = item
+    existing = set(x['name'].lower() for x in hierarchy['nodes'].values() if x['type'] == 'group')
+
+    depths = {}
+
+    def depth(name, path):
+        key = name.lower()
+        if key == root.lower():
+            return 0
+        if key not in by_name:
+            if key not in existing:
+                raise ValueError('parent management group {0} is neither in tree nor below {1}'.format(name, root))
+            return 0
+        if key not in depths:
+            if key in path:
+                raise ValueError('management group {0} is its own ancestor'.format(name))
+            depths[key] = depth(by_name[key].get('parent') or root, path | set([key])) + 1
+        return depths[key]
+
+    levels = []
+    for item in desired:
+        d = depth(item['name'], set())
+        while len(levels) < d:
+            levels.append([])
+        levels[d - 1].append(item)
+    return [x for x in levels if x]
+
+
+def diff_tree(hierarchy, desired, root):
+    '''
+    Compare desired groups, dicts with name, parent and display_name, with a hierarchy
+    flattened by flatten_hierarchy(). Groups without parent belong directly to 'root'.
+    Returns one change per desired group, with action create, move, update or unchanged.
+    Groups keep their current display name unless a new one is desired, the API resets
+    it when it is missing from a PUT.
+    '''
+    groups = dict((x['name'].lower(), x) for x in hierarchy['nodes'].values() if x['type'] == 'group')
+    changes = []
+    for item in desired:
+        parent = item.get('parent') or root
+        current = groups.get(item['name'].lower())
+        if current is None:
+            action = 'create'
+        elif current['depth'] > 0 and current['parent'].lower() != parent.lower():
+            action = 'move'
+        elif item.get('display_name') and item['display_name'] != current['display_name']:
+            action = 'update'
+        else:
+            action = 'unchanged'
+        changes.append(dict(name=item['name'],
+                            parent=parent,
+                            display_name=item.get('display_name') or (current or {}).get('display_name'),
+                            action=action))
+    return changes
+
+
+def stale_groups(hierarchy, desired):
+    '''
+    Groups of the hierarchy below its top group which are not desired, as lists of
+    names per depth, deepest first, so every group is deleted after its children.
+    '''
+    names = set(x['name'].lower() for x in desired)
+    levels = []
+    for ids in reversed(hierarchy['levels'][1:]):
+        level = [hierarchy['nodes'][x]['name'] for x in ids
+                 if hierarchy['nodes'][x]['type'] == 'group' and hierarchy['nodes'][x]['name'].lower() not in names]
+        if level:
+            levels.append(level)
+    return levels
+
+
+def subscription_placements(hierarchy):
+    '''
+    Map the subscriptions of a hierarchy flattened by flatten_hierarchy(), by lower
+    case subscription id, to the name of the management group containing them.
+    '''
+    return dict((x['name'].lower(), x['parent']) for x in hierarchy['nodes'].values() if x['type'] == 'subscription')
+
+
+def get_management_group(mgmt_client, name, query_parameters, header_parameters):
+    '''
+    GET a management group, None if it does not exist. Other CloudErrors are propagated.
+    '''
+    try:
+        response = mgmt_client.query(management_group_id(name),
+                                     'GET',
+                                     query_parameters,
+                                     dict(header_parameters),
+                                     None,
+                                     [200],
+                                     0,
+                                     0)
+    except CloudError as e:
+        if e.status_code == 404:
+            return None
+        raise
+    return json.loads(response.text)
+
+
+def put_management_group(mgmt_client, name, parent, display_name, query_parameters, header_parameters,
+                         polling_timeout=600):
+    '''
+    Create a management group, or update its display name and parent, and wait for
+    the operation to complete. CloudError and AsyncOperationError are propagated.
+    '''
+    body = dict(name=name,
+                properties=dict(details=dict(parent=dict(id=management_group_id(parent)))))
+    if display_name:
+        body['properties']['displayName'] = display_name
+    response = mgmt_client.query(management_group_id(name),
+                                 'PUT',
+                                 query_parameters,
+                                 dict(header_parameters),
+                                 body,
+                                 [200, 201, 202],
+                                 0,
+                                 0)
+    poller = AsyncOperationPoller(mgmt_client, dict(header_parameters), polling_timeout)
+    return poller.wait(response)
+
+
+def delete_management_group(mgmt_client, name, query_parameters, header_parameters, polling_timeout=600):
+    '''
+    Delete a management group and wait until it is gone. The group must not have
+    children. CloudError and AsyncOperationError are propagated.
+    '''
+    url = management_group_id(name)
+    response = mgmt_client.query(url,
+                                 'DELETE',
+                                 query_parameters,
+                                 dict(header_parameters),
+                                 None,
+                                 [200, 202, 204],
+                                 0,
+                                 0)
+    poller = AsyncOperationPoller(mgmt_client, dict(header_parameters), polling_timeout)
+    return poller.wait(response, url, query_parameters, wait_for_absence=True)
+
+
+def place_subscription(mgmt_client, group, subscription_id, query_parameters, header_parameters, state='present',
+                       polling_timeout=600):
+    '''
+    Move a subscription into a management group or, with state absent, out of it
+    and back to the tenant root group, and wait for the operation to complete.
+    CloudError and AsyncOperationError are propagated.
+    '''
+    url = management_group_id(group) + '/subscriptions/' + subscription_id
+    response = mgmt_client.query(url,
+                                 'PUT' if state == 'present' else 'DELETE',
+                                 query_parameters,
+                                 dict(header_parameters),
+                                 None,
+                                 [200, 201, 202, 204],
+                                 0,
+                                 0)
+    poller = AsyncOperationPoller(mgmt_client, dict(header_parameters), polling_timeout)
+    return poller.wait(response)
@@ -0,0 +1,84 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import time
+from collections import OrderedDict
+
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+
+
+def reconcile_links(mgmt_client,
+                    url,
+                    members,
+                    query_parameters,
+                    header_parameters,
+                    state='present',
+                    exclusive=False,
+                    max_workers=8,
+                    check_mode=False,
+                    polling_timeout=600):
+    '''
+    Make the collection of links at 'url', e.g. the users of a group, match 'members'.
+
+    Current links are listed once with paging and only the set difference is sent:
+    missing members are added with PUT and, when 'exclusive' is set, links which are
+    not in 'members' are removed with DELETE. With state 'absent' the listed members
+    are removed instead. Members are compared case insensitively, like the service does.
+    Returns the added, removed and failed members, their counts and the elapsed seconds.
+    CloudError raised while listing is propagated to the caller.
+    '''
+    started = time.time()
+
+    current = OrderedDict()
+    for item in iter_pages(mgmt_client, url, query_parameters, dict(header_parameters), [200]):
+        current[item['name'].lower()] = item['name']
+    wanted = OrderedDict((member.lower(), member) for member in members)
+
+    if state == 'absent':
+        to_add = []
+        to_remove = [current[key] for key in wanted if key in current]
+    else:
+        to_add = [wanted[key] for key in wanted if key not in current]
+        to_remove = [current[key] for key in current if key not in wanted] if exclusive else []
+
+    changes = [('PUT', member) for member in to_add] + [('DELETE', member) for member in to_remove]
+
+    def apply_change(change):
+        method, member = change
+        response = mgmt_client.query(url + '/' + member,
+                                     method,
+                                     query_parameters,
+                                     dict(header_parameters),
+                                     None,
+                                     [200, 201, 202] if method == 'PUT' else [200, 202, 204],
+                                     0,
+                                     0)
+        poller = AsyncOperationPoller(mgmt_client, dict(header_parameters), polling_timeout)
+        poller.wait(response)
+        return True
+
+    failed = []
+    if changes and not check_mode:
+        for change, outcome in zip(changes, run_concurrently(apply_change, changes, max_workers)):
+            if outcome[1] is not None:
+                failed.append(dict(name=change[1],
+                                   action='add' if change[0] == 'PUT' else 'remove',
+                                   error=str(outcome[1])))
+
+    failed_names = set((x['action'], x['name']) for x in failed)
+    added = [x for x in to_add if ('add', x) not in failed_names]
+    removed = [x for x in to_remove if ('remove', x) not in failed_names]
+    return dict(added=added,
+                removed=removed,
+                failed=failed,
+                summary=dict(added=len(added),
+                             removed=len(removed),
+                             unchanged=len(current) - len(to_remove),
+                             failed=len(failed)),
+                elapsed=round(time.time() - started, 3))
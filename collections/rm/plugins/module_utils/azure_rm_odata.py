@@ -0,0 +1,62 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import re
+
+
+ODATA_KEYWORDS = ['eq', 'ne', 'gt', 'ge', 'lt', 'le', 'and', 'or', 'not',
+                  'contains', 'startswith', 'endswith', 'substringof',
+                  'true', 'false', 'null', 'asc', 'desc']
+
+STRING_LITERAL = re.compile(r"'(?:[^']|'')*'")
+IDENTIFIER = re.compile(r"(?<![\w.:-])([A-Za-z_][\w/]*)")
+
+
+def get_odata_fields(expression):
+    '''
+    Return the field names referenced by an OData $filter or $orderby expression.
+    '''
+    if not expression:
+        return []
+    expression = STRING_LITERAL.sub("''", expression)
+    fields = []
+    for name in IDENTIFIER.findall(expression):
+        if name.lower() not in ODATA_KEYWORDS and name not in fields:
+            fields.append(name)
+    return fields
+
+
+def odata_query_parameters(filter=None, top=None, skip=None, order_by=None):
+    '''
+    Translate module options into OData query parameters, omitting unset ones.
+    '''
+    query_parameters = {}
+    if filter:
+        query_parameters['$filter'] = filter
+    if top is not None:
+        query_parameters['$top'] = top
+    if skip is not None:
+        query_parameters['$skip'] = skip
+    if order_by:
+        query_parameters['$orderby'] = order_by
+    return query_parameters
+
+
+def validate_odata_options(module, filterable_fields, filter=None, top=None, skip=None, order_by=None):
+    '''
+    Fail the module if an expression references a field the service can't filter or sort on,
+    or if top/skip are negative.
+    '''
+    for option, expression in [('filter', filter), ('order_by', order_by)]:
+        unknown = [x for x in get_odata_fields(expression) if x not in filterable_fields]
+        if unknown:
+            module.fail('Unsupported field(s) in {0}: {1}. Supported fields are: {2}'.format(option,
+                                                                                           ', '.join(unknown),
+                                                                                           ', '.join(filterable_fields)))
+    for option, value in [('top', top), ('skip', skip)]:
+        if value is not None and value < 0:
+            module.fail('{0} must not be negative'.format(option))
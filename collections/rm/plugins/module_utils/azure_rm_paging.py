@@ -0,0 +1,49 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+
+
+def iter_pages(mgmt_client,
+               url,
+               query_parameters,
+               header_parameters,
+               status_code,
+               max_items=None,
+               polling_timeout=600,
+               polling_interval=30):
+    '''
+    Iterate over all items of an ARM list operation.
+
+    Pages are requested one at a time by following 'nextLink', and each item is
+    yielded as soon as its page is parsed, so only one page is held in memory.
+    Iteration stops after 'max_items' items when it is set.
+    CloudError raised by the client is propagated to the caller.
+    '''
+    if max_items is not None and max_items <= 0:
+        return
+    count = 0
+    while url:
+        response = mgmt_client.query(url,
+                                     'GET',
+                                     query_parameters,
+                                     header_parameters,
+                                     None,
+                                     status_code,
+                                     polling_timeout,
+                                     polling_interval)
+        page = json.loads(response.text)
+        response = None
+        for item in page.get('value') or []:
+            yield item
+            count += 1
+            if max_items is not None and count >= max_items:
+                return
+        url = page.get('nextLink')
+        # nextLink already carries the continuation token and OData options,
+        # only api-version has to be passed along
+        query_parameters = dict((k, v) for k, v in query_parameters.items() if k == 'api-version')
@@ -0,0 +1,95 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import base64
+import json
+import os
+import threading
+
+try:
+    from cryptography.fernet import Fernet
+    from cryptography.hazmat.backends import default_backend
+    from cryptography.hazmat.primitives import hashes
+    from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
+    HAS_CRYPTOGRAPHY = True
+except ImportError:
+    HAS_CRYPTOGRAPHY = False
+
+
+SECRET_FILE_FORMAT = 'azure-rm-secrets/1'
+KDF_ITERATIONS = 200000
+
+
+def _fernet(passphrase, salt, iterations):
+    kdf = PBKDF2HMAC(algorithm=hashes.SHA256(),
+                     length=32,
+                     salt=salt,
+                     iterations=iterations,
+                     backend=default_backend())
+    return Fernet(base64.urlsafe_b64encode(kdf.derive(passphrase.encode('utf-8'))))
+
+
+class SecretRecordWriter(object):
+    '''
+    Append-only file of encrypted JSON records, written as they are produced so
+    secrets never have to be collected in memory or returned in module results.
+
+    The first line is a plain JSON header with the key derivation parameters, every
+    following line is one record encrypted with Fernet under a key derived from the
+    passphrase with PBKDF2-HMAC-SHA256. The file is created with mode 0600.
+    Writes are serialized, the writer can be shared by worker threads.
+    '''
+
+    def __init__(self, path, passphrase, iterations=KDF_ITERATIONS):
+        salt = os.urandom(16)
+        self.fernet = _fernet(passphrase, salt, iterations)
+        self.lock = threading.Lock()
+        self.count = 0
+        self.path = os.path.expanduser(path)
+        fd = os.open(self.path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        # the mode only applies to new files, an existing file may be readable by others
+        os.fchmod(fd, 0o600)
+        self.file = os.fdopen(fd, 'w')
+        self.file.write(json.dumps(dict(format=SECRET_FILE_FORMAT,
+                                        kdf='pbkdf2-sha256',
+                                        iterations=iterations,
+                                        salt=base64.b64encode(salt).decode('ascii'))) + '\n')
+        self.file.flush()
+
+    def write(self, record):
+        token = self.fernet.encrypt(json.dumps(record, sort_keys=True).encode('utf-8'))
+        with self.lock:
+            self.file.write(token.decode('ascii') + '\n')
+            self.file.flush()
+            self.count += 1
+
+    def close(self):
+        with self.lock:
+            if self.file is not None:
+                self.file.close()
+                self.file = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+
+def read_secret_records(path, passphrase):
+    '''
+    Yield the records of a file written by SecretRecordWriter.
+    '''
+    with open(os.path.expanduser(path)) as f:
+        header = json.loads(f.readline())
+        if header.get('format') != SECRET_FILE_FORMAT:
+            raise ValueError('{0} is not a secret record file'.format(path))
+        fernet = _fernet(passphrase, base64.b64decode(header['salt']), header['iterations'])
+        for line in f:
+            line = line.strip()
+            if line:
+                yield json.loads(fernet.decrypt(line.encode('ascii')).decode('utf-8'))
@@ -0,0 +1,162 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # This is handled in azure_rm_common
+    pass
+
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import get_header, get_retry_after
+
+
+# Defaults follow the ARM per subscription token buckets, all can be overridden through the environment.
+# Setting a rate to 0 disables the corresponding bucket.
+THROTTLING_DEFAULTS = dict(AZURE_RM_MAX_RETRIES=5,
+                           AZURE_RM_MAX_RETRY_WAIT=300,
+                           AZURE_RM_READS_PER_SECOND=25,
+                           AZURE_RM_READS_BURST=250,
+                           AZURE_RM_WRITES_PER_SECOND=10,
+                           AZURE_RM_WRITES_BURST=200,
+                           AZURE_RM_RATELIMIT_LOW_WATERMARK=50)
+
+READ_METHODS = ['GET', 'HEAD']
+
+
+def get_setting(name):
+    try:
+        return float(os.environ.get(name, THROTTLING_DEFAULTS[name]))
+    except ValueError:
+        return float(THROTTLING_DEFAULTS[name])
+
+
+class FileTokenBucket(object):
+    '''
+    Token bucket whose state lives in a file locked with flock, so all forked workers
+    of the controller drawing from the same bucket share one request budget.
+    '''
+
+    def __init__(self, name, rate, burst, path=None):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.path = path or os.path.join(tempfile.gettempdir(),
+                                         'azure_rm_ratelimit_{0}_{1}.json'.format(os.getuid() if hasattr(os, 'getuid') else 0,
+                                                                                  name))
+        self.lock = threading.Lock()
+
+    def acquire(self):
+        if self.rate <= 0:
+            return
+        while True:
+            wait = self._take()
+            if wait <= 0:
+                return
+            time.sleep(wait)
+
+    def _take(self):
+        with self.lock:
+            fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o600)
+            with os.fdopen(fd, 'r+') as f:
+                if fcntl is not None:
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                try:
+                    state = json.loads(f.read() or '{}')
+                except ValueError:
+                    state = {}
+                now = time.time()
+                tokens = min(self.burst, state.get('tokens', self.burst) + (now - state.get('updated', now)) * self.rate)
+                wait = 0
+                if tokens >= 1:
+                    tokens -= 1
+                else:
+                    wait = (1 - tokens) / self.rate
+                f.seek(0)
+                f.truncate()
+                f.write(json.dumps(dict(tokens=tokens, updated=now)))
+                return wait
+
+
+class ThrottledClient(object):
+    '''
+    Proxy of GenericRestClient which draws every request from per subscription token
+    buckets shared across processes, retries requests rejected with 429 (and 503 for
+    idempotent methods) after Retry-After or an exponential backoff, and pauses when
+    x-ms-ratelimit-remaining-subscription-* headers report an almost exhausted budget.
+    '''
+
+    def __init__(self, client, subscription_id):
+        self.client = client
+        self.max_retries = int(get_setting('AZURE_RM_MAX_RETRIES'))
+        self.max_retry_wait = get_setting('AZURE_RM_MAX_RETRY_WAIT')
+        self.low_watermark = get_setting('AZURE_RM_RATELIMIT_LOW_WATERMARK')
+        key = subscription_id or 'default'
+        self.buckets = dict(reads=FileTokenBucket(key + '_reads',
+                                                  get_setting('AZURE_RM_READS_PER_SECOND'),
+                                                  get_setting('AZURE_RM_READS_BURST')),
+                            writes=FileTokenBucket(key + '_writes',
+                                                   get_setting('AZURE_RM_WRITES_PER_SECOND'),
+                                                   get_setting('AZURE_RM_WRITES_BURST')))
+        self.local = threading.local()
+
+    def __getattr__(self, name):
+        return getattr(self.client, name)
+
+    @property
+    def last_retries(self):
+        '''
+        Number of retries of the last query issued by the current thread.
+        '''
+        return getattr(self.local, 'retries', 0)
+
+    def query(self, url, method, query_parameters, header_parameters, body, expected_status_codes,
+              polling_timeout, polling_interval):
+        kind = 'reads' if method in READ_METHODS else 'writes'
+        retry_statuses = [429] if method == 'POST' else [429, 503]
+        deadline = time.time() + self.max_retry_wait
+        delay = 1
+        self.local.retries = 0
+        while True:
+            self.buckets[kind].acquire()
+            try:
+                response = self.client.query(url, method, query_parameters, header_parameters, body,
+                                             expected_status_codes, polling_timeout, polling_interval)
+            except CloudError as e:
+                if e.status_code not in retry_statuses or self.local.retries >= self.max_retries:
+                    raise
+                wait = get_retry_after(getattr(e, 'response', None))
+                if wait is None:
+                    wait = random.uniform(delay / 2.0, delay)
+                    delay = min(delay * 2, 60)
+                if time.time() + wait > deadline:
+                    raise
+                self.local.retries += 1
+                time.sleep(wait)
+                continue
+            self._pause_if_exhausted(response, kind)
+            return response
+
+    def _pause_if_exhausted(self, response, kind):
+        remaining = get_header(response, 'x-ms-ratelimit-remaining-subscription-' + kind)
+        try:
+            remaining = int(remaining)
+        except (TypeError, ValueError):
+            return
+        if remaining < self.low_watermark:
+            # spread the last requests of the budget, the closer to zero the longer the pause
+            time.sleep((self.low_watermark - remaining) / self.low_watermark)
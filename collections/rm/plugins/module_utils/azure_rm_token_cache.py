@@ -0,0 +1,140 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import hashlib
+import json
+import os
+import time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+try:
+    from msrestazure.azure_active_directory import ServicePrincipalCredentials
+except ImportError:
+    # This is handled in azure_rm_common
+    ServicePrincipalCredentials = None
+
+
+# set to 'false' to always acquire a new token
+TOKEN_CACHE_ENV = 'AZURE_RM_TOKEN_CACHE'
+TOKEN_CACHE_DIR_ENV = 'AZURE_RM_TOKEN_CACHE_DIR'
+DEFAULT_TOKEN_CACHE_DIR = '~/.ansible/azure_rm_token_cache'
+# cached tokens expiring within this many seconds are renewed before use
+REFRESH_AHEAD = 300
+
+
+def token_cache_enabled():
+    return os.environ.get(TOKEN_CACHE_ENV, 'true').lower() not in ['0', 'false', 'no', 'off']
+
+
+class TokenCache(object):
+    '''
+    Per user token cache on disk, one file per tenant, client and resource.
+    The directory is created with mode 0700 and files with mode 0600. Acquisition
+    of a token is serialized through a lock file, so concurrent workers missing
+    the cache wait for the first one instead of all requesting a token.
+    '''
+
+    def __init__(self, path=None, refresh_ahead=REFRESH_AHEAD):
+        self.path = os.path.expanduser(path or os.environ.get(TOKEN_CACHE_DIR_ENV) or DEFAULT_TOKEN_CACHE_DIR)
+        self.refresh_ahead = refresh_ahead
+
+    def get_token(self, token_uri, client_id, resource, acquire):
+        '''
+        Return a cached token which stays valid for more than 'refresh_ahead' seconds,
+        otherwise call acquire() and store the token it returns.
+        '''
+        key = self._key(token_uri, client_id, resource)
+        token = self._load(key)
+        if token is not None:
+            return token
+
+        self._ensure_dir()
+        with open(os.path.join(self.path, key + '.lock'), 'a') as lock:
+            if fcntl is not None:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+            # another worker may have acquired the token meanwhile
+            token = self._load(key)
+            if token is None:
+                acquired_at = time.time()
+                token = acquire()
+                self._store(key, token, acquired_at)
+            return token
+
+    def _key(self, token_uri, client_id, resource):
+        return hashlib.sha256('\n'.join([token_uri or '', client_id or '', resource or '']).lower().encode('utf-8')).hexdigest()
+
+    def _load(self, key):
+        try:
+            with open(os.path.join(self.path, key + '.json')) as f:
+                entry = json.load(f)
+        except (IOError, OSError, ValueError):
+            return None
+        if entry.get('expires_at', 0) - time.time() <= self.refresh_ahead:
+            return None
+        return entry.get('token')
+
+    def _store(self, key, token, acquired_at):
+        try:
+            expires_in = int(token.get('expires_in'))
+        except (TypeError, ValueError):
+            return
+        entry = dict(token=token, expires_at=acquired_at + expires_in)
+        file_name = os.path.join(self.path, key + '.json')
+        temp_name = '{0}.{1}.tmp'.format(file_name, os.getpid())
+        try:
+            fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(entry, f)
+            os.rename(temp_name, file_name)
+        except (IOError, OSError):
+            pass
+
+    def _ensure_dir(self):
+        if not os.path.isdir(self.path):
+            os.makedirs(self.path, 0o700)
+            os.chmod(self.path, 0o700)
+
+
+if ServicePrincipalCredentials is not None:
+    class CachedServicePrincipalCredentials(ServicePrincipalCredentials):
+        '''
+        ServicePrincipalCredentials taking tokens from the on-disk TokenCache.
+        '''
+
+        def set_token(self):
+            # msrestazure calls set_token before every request, keep using a valid token in memory
+            try:
+                if float((self.token or {}).get('expires_on')) - time.time() > REFRESH_AHEAD:
+                    return
+            except (TypeError, ValueError):
+                pass
+
+            def acquire():
+                super(CachedServicePrincipalCredentials, self).set_token()
+                return self.token
+            self.token = TokenCache().get_token(self.token_uri, self.id, self.resource, acquire)
+else:
+    CachedServicePrincipalCredentials = None
+
+
+def install_token_cache():
+    '''
+    Make azure_rm_common authenticate service principals with CachedServicePrincipalCredentials.
+    Has to be called before AzureRMModuleBase.__init__, which acquires the token.
+    '''
+    if CachedServicePrincipalCredentials is None or not token_cache_enabled():
+        return
+    try:
+        from ansible.module_utils import azure_rm_common
+    except ImportError:
+        return
+    if getattr(azure_rm_common, 'ServicePrincipalCredentials', None) is ServicePrincipalCredentials:
+        azure_rm_common.ServicePrincipalCredentials = CachedServicePrincipalCredentials
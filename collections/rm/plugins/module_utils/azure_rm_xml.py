@@ -0,0 +1,73 @@
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+import threading
+from collections import OrderedDict
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape, quoteattr
+
+
+# canonical forms of recently compared documents, policies read from the service
+# repeat a lot within bulk operations
+MEMO_SIZE = 1024
+# larger documents are not memoized, they are rarely compared twice
+MEMO_MAX_LENGTH = 65536
+
+_memo = OrderedDict()
+_memo_lock = threading.Lock()
+
+
+def canonical_xml(value):
+    '''
+    Return a canonical string form of an XML document: attributes sorted, entities
+    and character references resolved and escaped the same way, indentation between
+    elements dropped and text stripped at its ends. Whitespace within text and
+    attribute values is kept, it is significant in policy expressions and templates.
+    Content which isn't well formed XML is returned stripped only.
+    '''
+    if value is None:
+        return None
+    with _memo_lock:
+        if value in _memo:
+            _memo[value] = _memo.pop(value)
+            return _memo[value]
+    try:
+        result = _canonical_element(ElementTree.fromstring(value.strip().encode('utf-8')))
+    except ElementTree.ParseError:
+        result = value.strip()
+    if len(value) <= MEMO_MAX_LENGTH:
+        with _memo_lock:
+            _memo[value] = result
+            while len(_memo) > MEMO_SIZE:
+                _memo.popitem(last=False)
+    return result
+
+
+def xml_equal(a, b):
+    '''
+    Compare two XML documents by their canonical forms.
+    '''
+    if a is None or b is None:
+        return a is b
+    return a == b or canonical_xml(a) == canonical_xml(b)
+
+
+def _canonical_element(element):
+    parts = ['<', element.tag]
+    for name in sorted(element.attrib):
+        parts.append(' {0}={1}'.format(name, quoteattr(element.attrib[name])))
+    parts.append('>')
+    parts.append(_canonical_text(element.text))
+    for child in element:
+        parts.append(_canonical_element(child))
+        parts.append(_canonical_text(child.tail))
+    parts.append('</{0}>'.format(element.tag))
+    return ''.join(parts)
+
+
+def _canonical_text(text):
+    return escape((text or '').strip())
@@ -208,7 +208,32 @@ options:
   value:
     description:
       - Content value when Importing an API.
+      - Mutually exclusive with I(value_path).
     type: str
+  value_path:
+    description:
+      - >-
+        Path of a local file with the content to import, used instead of
+        I(value) for large documents. The file is hashed line by line and only
+        read completely when the import has to be sent.
+      - Requires I(format).
+    type: path
+  content_hash_store:
+    description:
+      - >-
+        Where the hash of the imported content is kept, so the import is only
+        sent again when I(value), I(value_path), I(format) or I(wsdl_selector)
+        change. Line endings and trailing whitespace don't count as changes.
+      - >-
+        C(description) appends an HTML comment with the hash to the description
+        of the API, which works from any controller. C(local) keeps the hash in
+        ~/.ansible/azure_rm_content_hashes on the controller.
+      - For link formats the link itself is hashed, not the linked document.
+    type: str
+    default: description
+    choices:
+      - description
+      - local
   format:
     description:
       - Format of the Content in which the API is getting imported.
@@ -251,6 +276,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -290,6 +331,14 @@ EXAMPLES = '''
     service_name: myService
     api_id: myApi
     state: absent
+- name: ApiManagementImportApiFromFile
+  azure.rm.apimanagementapi:
+    resource_group: myResourceGroup
+    service_name: myService
+    api_id: myApi
+    path: petstore
+    format: openapi+json
+    value_path: /path/to/petstore.json
 '''
 
 RETURN = '''
@@ -299,13 +348,25 @@ id:
   returned: always
   type: str
   sample: null
+content_hash:
+  description:
+    - sha256 of the normalized import content, format and WSDL selector.
+  returned: when I(value) or I(value_path) is set
+  type: str
+  sample: 3a7bd3e2360a3d29eea436fcfb7e44c735d117c42d1c1835420b6b9942dd4f1b
 '''
 
-import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_content import (content_hash, read_content, get_hash_marker,
+                                                                                 add_hash_marker, LocalHashStore)
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -503,6 +564,14 @@ class AzureRMApi(AzureRMModuleBaseExt):
                          'openapi+json',
                          'openapi-link']
             ),
+            value_path=dict(
+                type='path'
+            ),
+            content_hash_store=dict(
+                type='str',
+                default='description',
+                choices=['description', 'local']
+            ),
             wsdl_selector=dict(
                 type='dict',
                 disposition='/properties/wsdlSelector',
@@ -527,16 +596,30 @@ class AzureRMApi(AzureRMModuleBaseExt):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
         self.resource_group = None
         self.service_name = None
         self.api_id = None
+        self.value_path = None
+        self.content_hash_store = None
+        self.import_hash = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -547,9 +630,11 @@ class AzureRMApi(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMApi, self).__init__(derived_arg_spec=self.module_arg_spec,
                                          supports_check_mode=True,
-                                         supports_tags=True)
+                                         supports_tags=True,
+                                         mutually_exclusive=[['value', 'value_path']])
 
     def exec_module(self, **kwargs):
         for key in list(self.module_arg_spec.keys()):
@@ -560,11 +645,29 @@ class AzureRMApi(AzureRMModuleBaseExt):
 
         self.inflate_parameters(self.module_arg_spec, self.body, 0)
 
+        properties = self.body.get('properties', {})
+        if self.value_path is not None and not properties.get('format'):
+            self.fail('format is required when value_path is set')
+        if properties.get('value') is not None or self.value_path is not None:
+            try:
+                self.import_hash = content_hash(properties.get('value'),
+                                                self.value_path,
+                                                dict(format=properties.get('format'),
+                                                     wsdl_selector=properties.get('wsdlSelector')))
+            except (IOError, OSError) as exc:
+                self.fail('Error reading {0}: {1}'.format(self.value_path, str(exc)))
+            self.results['content_hash'] = self.import_hash
+            if self.content_hash_store == 'description' and properties.get('description') is not None:
+                properties['description'] = add_hash_marker(properties['description'], self.import_hash)
+
         old_response = None
         response = None
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -596,6 +699,14 @@ class AzureRMApi(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
+                if self.import_hash is not None:
+                    if self.get_stored_hash(old_response) == self.import_hash:
+                        # imported content didn't change, compare the other properties only
+                        for key in ['value', 'format', 'wsdlSelector']:
+                            self.body['properties'].pop(key, None)
+                        self.import_hash = None
+                    else:
+                        self.to_do = Actions.Update
                 modifiers = {}
                 self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
                 self.results['modifiers'] = modifiers
@@ -610,7 +721,14 @@ class AzureRMApi(AzureRMModuleBaseExt):
                 self.results['changed'] = True
                 return self.results
 
+            if self.import_hash is not None and self.value_path is not None:
+                try:
+                    self.body['properties']['value'] = read_content(self.value_path)
+                except (IOError, OSError) as exc:
+                    self.fail('Error reading {0}: {1}'.format(self.value_path, str(exc)))
             response = self.create_update_resource()
+            if self.import_hash is not None:
+                response = self.store_hash(response)
 
             # if not old_response:
             self.results['changed'] = True
@@ -625,11 +743,6 @@ class AzureRMApi(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('Api instance unchanged')
             self.results['changed'] = False
@@ -647,7 +760,7 @@ class AzureRMApi(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -664,35 +777,71 @@ class AzureRMApi(AzureRMModuleBaseExt):
 
         return response
 
+    def get_stored_hash(self, resource):
+        if self.content_hash_store == 'local':
+            return LocalHashStore().get(self.url)
+        return get_hash_marker(resource.get('properties', {}).get('description'))
+
+    def store_hash(self, response):
+        '''
+        Record the hash of the content just imported, the import may have replaced the description.
+        '''
+        if self.content_hash_store == 'local':
+            LocalHashStore().set(self.url, self.import_hash)
+            return response
+        if 'properties' not in response:
+            response = self.get_resource() or {}
+        description = response.get('properties', {}).get('description')
+        if get_hash_marker(description) == self.import_hash:
+            return response
+        try:
+            response = self.mgmt_client.query(self.url,
+                                              'PATCH',
+                                              self.query_parameters,
+                                              dict(self.header_parameters, **{'If-Match': '*'}),
+                                              dict(properties=dict(description=add_hash_marker(description,
+                                                                                               self.import_hash))),
+                                              [200, 204],
+                                              600,
+                                              30)
+        except CloudError as exc:
+            self.fail('Error storing the content hash of the Api instance: {0}'.format(str(exc)))
+        self.etags.invalidate(self.url)
+        return self.get_resource() or {}
+
     def delete_resource(self):
         # self.log('Deleting the Api instance {0}'.format(self.))
         try:
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the Api instance.')
             self.fail('Error deleting the Api instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the Api instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the Api instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("Api instance : {0} found".format(response.name))
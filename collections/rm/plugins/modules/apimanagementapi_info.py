@@ -214,6 +214,34 @@ options:
             Name of HTTP header parameter that indicates the API Version if
             versioningScheme is set to `header`.
         type: str
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
+  filter:
+    description:
+      - >-
+        OData filter expression evaluated by the service for list operations,
+        for example C(contains(displayName, 'echo')). Supported fields are
+        C(name), C(displayName), C(description), C(serviceUrl), C(path),
+        C(isCurrent).
+    type: str
+  top:
+    description:
+      - Number of records to return.
+    type: int
+  skip:
+    description:
+      - Number of records to skip.
+    type: int
+  order_by:
+    description:
+      - >-
+        OData order by expression for list operations, for example
+        C(name desc). Supports the same fields as I(filter).
+    type: str
 extends_documentation_fragment:
   - azure
 author:
@@ -277,6 +305,11 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_odata import odata_query_parameters, validate_odata_options
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 try:
   from msrestazure.azure_exceptions import CloudError
@@ -284,6 +317,23 @@ except ImportError:
   # This is handled in azure_rm_common
   pass
 
+
+FILTERABLE_FIELDS = ['name',
+                     'displayName',
+                     'description',
+                     'serviceUrl',
+                     'path',
+                     'isCurrent']
+
+TAG_FILTERABLE_FIELDS = ['api/name',
+                         'api/displayName',
+                         'api/description',
+                         'api/serviceUrl',
+                         'api/path',
+                         'tag/name',
+                         'isCurrent']
+
+
 class AzureRMApiInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -303,6 +353,21 @@ class AzureRMApiInfo(AzureRMModuleBase):
             ),
             api_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            top=dict(
+                type='int'
+            ),
+            skip=dict(
+                type='int'
+            ),
+            order_by=dict(
+                type='str'
             )
         )
 
@@ -312,6 +377,11 @@ class AzureRMApiInfo(AzureRMModuleBase):
         self.expand_api_version_set = None
         self.include_not_tagged_apis = None
         self.api_id = None
+        self.max_items = None
+        self.filter = None
+        self.top = None
+        self.skip = None
+        self.order_by = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -325,6 +395,7 @@ class AzureRMApiInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMApiInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -332,15 +403,27 @@ class AzureRMApiInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
+        validate_odata_options(self,
+                               TAG_FILTERABLE_FIELDS if self.include_not_tagged_apis is not None else FILTERABLE_FIELDS,
+                               self.filter,
+                               self.top,
+                               self.skip,
+                               self.order_by)
+        if self.top is not None and (self.max_items is None or self.top < self.max_items):
+            self.max_items = self.top
+
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
             self.api_id is not None):
             self.results['api'] = self.get()
         elif (self.resource_group is not None and
-              self.service_name is not None):
+              self.service_name is not None and
+              self.include_not_tagged_apis is not None):
             self.results['api'] = self.listbytags()
         elif (self.resource_group is not None and
               self.service_name is not None):
@@ -383,8 +466,7 @@ class AzureRMApiInfo(AzureRMModuleBase):
         return self.format_item(results)
 
     def listbytags(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -399,25 +481,23 @@ class AzureRMApiInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
+        self.query_parameters['includeNotTaggedApis'] = str(self.include_not_tagged_apis).lower()
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def listbyservice(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -432,21 +512,19 @@ class AzureRMApiInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def format_item(self, item):
         d = {
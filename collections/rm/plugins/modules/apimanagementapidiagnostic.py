@@ -165,6 +165,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -440,11 +456,15 @@ properties:
 
 '''
 
-import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -592,6 +612,14 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
@@ -603,6 +631,9 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -613,6 +644,7 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMApiDiagnostic, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                    supports_check_mode=True,
                                                    supports_tags=True)
@@ -631,6 +663,9 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
@@ -697,11 +732,6 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ApiDiagnostic instance unchanged')
             self.results['changed'] = False
@@ -722,7 +752,7 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -745,29 +775,33 @@ class AzureRMApiDiagnostic(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ApiDiagnostic instance.')
             self.fail('Error deleting the ApiDiagnostic instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ApiDiagnostic instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ApiDiagnostic instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ApiDiagnostic instance : {0} found".format(response.name))
@@ -166,6 +166,12 @@ options:
         Whether to process Correlation Headers coming to Api Management Service.
         Only applicable to Application Insights diagnostics. Default is true.
     type: boolean
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
 extends_documentation_fragment:
   - azure
 author:
@@ -231,6 +237,10 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 try:
   from msrestazure.azure_exceptions import CloudError
@@ -256,6 +266,9 @@ class AzureRMApiDiagnosticInfo(AzureRMModuleBase):
             ),
             diagnostic_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
             )
         )
 
@@ -263,6 +276,7 @@ class AzureRMApiDiagnosticInfo(AzureRMModuleBase):
         self.service_name = None
         self.api_id = None
         self.diagnostic_id = None
+        self.max_items = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -276,6 +290,7 @@ class AzureRMApiDiagnosticInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMApiDiagnosticInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -285,6 +300,8 @@ class AzureRMApiDiagnosticInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
@@ -336,8 +353,7 @@ class AzureRMApiDiagnosticInfo(AzureRMModuleBase):
         return self.format_item(results)
 
     def listbyservice(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -356,20 +372,17 @@ class AzureRMApiDiagnosticInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ api_name }}', self.api_id)
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def format_item(self, item):
         d = {
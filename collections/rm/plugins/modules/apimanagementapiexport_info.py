@@ -37,8 +37,35 @@ options:
         API revision identifier. Must be unique in the current API Management
         service instance. Non-current revision has ;rev=n as a suffix where n is
         the revision number.
-    required: true
+      - Required unless I(api_ids) is set.
     type: str
+  api_ids:
+    description:
+      - >-
+        Identifiers of APIs exported in parallel into the directory I(dest),
+        one file per API named after the API. Use C(*) to export all APIs of
+        the service.
+      - Mutually exclusive with I(api_id).
+    type: list
+  dest:
+    description:
+      - >-
+        Stream the export to this file instead of returning it, or with
+        I(api_ids) into files in this directory. Exports are downloaded in
+        chunks and a file is only replaced when its sha256 checksum differs
+        from the export.
+      - >-
+        Writing local files is the only side effect of this module, the API
+        Management service is not modified, so the task always reports
+        C(changed=false). Use I(written) of I(exports) to find the files
+        which were replaced.
+      - Required with I(api_ids).
+    type: path
+  max_concurrency:
+    description:
+      - Maximum number of APIs exported in parallel with I(api_ids).
+    type: int
+    default: 8
   format:
     description:
       - >-
@@ -88,6 +115,15 @@ EXAMPLES = '''
     api_id: myApi
     format: openapi-link
     export: 'true'
+- name: Back up all APIs of a service
+  azure.rm.apimanagementapiexport_info:
+    resource_group: myResourceGroup
+    service_name: myService
+    api_ids:
+      - '*'
+    format: openapi+json-link
+    export: 'true'
+    dest: /backup/apis
 
 '''
 
@@ -132,45 +168,125 @@ api_export:
               returned: always
               type: str
               sample: null
+exports:
+  description:
+    - Files written with I(dest), in the order of the exported APIs.
+  returned: when dest is set
+  type: complex
+  contains:
+    api_id:
+      description:
+        - Identifier of the exported API.
+      returned: always
+      type: str
+      sample: myApi
+    dest:
+      description:
+        - Path of the file.
+      returned: always
+      type: str
+      sample: /backup/apis/myApi.json
+    checksum:
+      description:
+        - sha256 checksum of the export.
+      returned: when exported
+      type: str
+      sample: null
+    size:
+      description:
+        - Size of the export in bytes.
+      returned: when exported
+      type: int
+      sample: 48512
+    written:
+      description:
+        - Whether the file was written, C(false) when it already matched.
+      returned: when exported
+      type: bool
+      sample: true
+    error:
+      description:
+        - Error message when the API could not be exported.
+      returned: when failed
+      type: str
+      sample: null
 
 '''
 
-import time
+import io
 import json
+import os
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
-from copy import deepcopy
+from ansible.module_utils.six import string_types
+from ansible.module_utils.urls import open_url
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_content import stream_to_file
 from msrestazure.azure_exceptions import CloudError
 
 
+# export links are valid for 5 minutes
+DOWNLOAD_TIMEOUT = 300
+
+
+def export_extension(export_format):
+    export_format = export_format.lower()
+    if 'json' in export_format or export_format.startswith('swagger'):
+        return '.json'
+    if export_format.startswith('openapi'):
+        return '.yaml'
+    if export_format.startswith('wsdl'):
+        return '.wsdl'
+    if export_format.startswith('wadl'):
+        return '.wadl'
+    return '.txt'
+
+
 class AzureRMApiExportInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             resource_group=dict(
                 type='str',
-                required=true
+                required=True
             ),
             service_name=dict(
                 type='str',
-                required=true
+                required=True
             ),
             api_id=dict(
-                type='str',
-                required=true
+                type='str'
+            ),
+            api_ids=dict(
+                type='list',
+                elements='str'
+            ),
+            dest=dict(
+                type='path'
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
             ),
             format=dict(
                 type='str',
-                required=true
+                required=True
             ),
             export=dict(
                 type='str',
-                required=true
+                required=True
             )
         )
 
         self.resource_group = None
         self.service_name = None
         self.api_id = None
+        self.api_ids = None
+        self.dest = None
+        self.max_concurrency = None
         self.format = None
         self.export = None
         self.id = None
@@ -188,7 +304,11 @@ class AzureRMApiExportInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
-        super(AzureRMApiExportInfo, self).__init__(self.module_arg_spec, supports_tags=True)
+        install_token_cache()
+        super(AzureRMApiExportInfo, self).__init__(self.module_arg_spec,
+                                                   supports_tags=True,
+                                                   mutually_exclusive=[['api_id', 'api_ids']],
+                                                   required_one_of=[['api_id', 'api_ids']])
 
     def exec_module(self, **kwargs):
 
@@ -197,19 +317,9 @@ class AzureRMApiExportInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
-        if (self.resource_group is not None and
-            self.service_name is not None and
-            self.api_id is not None and
-            self.format is not None and
-            self.export is not None):
-            self.results['api_export'] = self.format_item(self.get())
-        return self.results
-
-    def get(self):
-        response = None
-        results = {}
-        # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
                     '/resourceGroups' +
@@ -218,30 +328,84 @@ class AzureRMApiExportInfo(AzureRMModuleBase):
                     '/Microsoft.ApiManagement' +
                     '/service' +
                     '/{{ service_name }}' +
-                    '/apis' +
-                    '/{{ api_name }}')
+                    '/apis')
         self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ api_name }}', self.name)
+        self.query_parameters['format'] = self.format
+        self.query_parameters['export'] = self.export
+
+        if self.dest is None:
+            if self.api_ids is not None:
+                self.fail('dest is required with api_ids')
+            try:
+                self.results['api_export'] = self.format_item(self.get(self.api_id))
+            except CloudError as e:
+                self.fail('Error exporting API {0}: {1}'.format(self.api_id, str(e)))
+            return self.results
+
+        if self.api_ids is None:
+            exports = [(self.api_id, self.dest)]
+        else:
+            if not os.path.isdir(self.dest):
+                self.fail('dest {0} must be an existing directory with api_ids'.format(self.dest))
+            exports = [(x, os.path.join(self.dest, x + export_extension(self.format))) for x in self.get_api_ids()]
+
+        self.results['exports'] = []
+        for export, outcome in zip(exports, run_concurrently(self.export_to_file, exports, self.max_concurrency)):
+            item = dict(api_id=export[0], dest=export[1])
+            if outcome[1] is not None:
+                item['error'] = str(outcome[1])
+            else:
+                item['checksum'], item['size'], item['written'] = outcome[0]
+            self.results['exports'].append(item)
 
+        failed = [x for x in self.results['exports'] if 'error' in x]
+        if failed:
+            self.fail('Failed to export {0} APIs'.format(len(failed)), **self.results)
+        return self.results
+
+    def get_api_ids(self):
+        if '*' not in self.api_ids:
+            return self.api_ids
+        query_parameters = dict(self.query_parameters)
+        del query_parameters['format']
+        del query_parameters['export']
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            return [x['name'] for x in iter_pages(self.mgmt_client,
+                                                  self.url,
+                                                  query_parameters,
+                                                  self.header_parameters,
+                                                  self.status_code)]
         except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
+            self.fail('Error listing APIs: {0}'.format(str(e)))
+
+    def get(self, api_id):
+        response = self.mgmt_client.query(self.url + '/' + api_id,
+                                          'GET',
+                                          self.query_parameters,
+                                          self.header_parameters,
+                                          None,
+                                          self.status_code,
+                                          600,
+                                          30)
+        return json.loads(response.text)
 
-        return results
+    def export_to_file(self, export):
+        api_id, dest = export
+        value = self.get(api_id).get('value')
+        if isinstance(value, dict) and value.get('link'):
+            # the export is only passed through, never held in memory
+            stream = open_url(value['link'], method='GET', timeout=DOWNLOAD_TIMEOUT)
+            try:
+                return stream_to_file(stream, dest)
+            finally:
+                stream.close()
+        if not isinstance(value, string_types):
+            value = json.dumps(value, indent=2, sort_keys=True)
+        return stream_to_file(io.BytesIO(value.encode('utf-8')), dest)
 
-    def format_item(item):
+    def format_item(self, item):
         return item
 
 
@@ -75,6 +75,12 @@ options:
       - A resource identifier for the user who left the comment.
     required: true
     type: str
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
 extends_documentation_fragment:
   - azure
 author:
@@ -142,6 +148,10 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 try:
   from msrestazure.azure_exceptions import CloudError
@@ -171,6 +181,9 @@ class AzureRMApiIssueCommentInfo(AzureRMModuleBase):
             ),
             comment_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
             )
         )
 
@@ -179,6 +192,7 @@ class AzureRMApiIssueCommentInfo(AzureRMModuleBase):
         self.api_id = None
         self.issue_id = None
         self.comment_id = None
+        self.max_items = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -192,6 +206,7 @@ class AzureRMApiIssueCommentInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMApiIssueCommentInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -201,6 +216,8 @@ class AzureRMApiIssueCommentInfo(AzureRMModuleBase):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
@@ -257,8 +274,7 @@ class AzureRMApiIssueCommentInfo(AzureRMModuleBase):
         return self.format_item(results)
 
     def listbyservice(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -280,20 +296,17 @@ class AzureRMApiIssueCommentInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ issue_name }}', self.issue_id)
 
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def format_item(self, item):
         d = {
@@ -44,7 +44,7 @@ options:
       - >-
         Operation identifier within an API. Must be unique in the current API
         Management service instance.
-    required: true
+      - Required unless I(operations) is set.
     type: str
   template_parameters:
     description:
@@ -332,14 +332,14 @@ options:
   display_name:
     description:
       - Operation Name.
-    required: true
+      - Required when creating an operation.
     type: str
   method:
     description:
       - >-
         A Valid HTTP Operation Method. Typical Http Methods like GET, PUT, POST
         but not limited by only them.
-    required: true
+      - Required when creating an operation.
     type: str
   url_template:
     description:
@@ -347,8 +347,32 @@ options:
         Relative URL template identifying the target resource for this
         operation. May include parameters. Example:
         /customers/{cid}/orders/{oid}/?date={date}
-    required: true
+      - Required when creating an operation.
     type: str
+  operations:
+    description:
+      - >-
+        Full list of operations of the API. Existing operations are listed
+        once, compared in memory by operation identifier and only the
+        differences are written.
+      - >-
+        Every item takes I(operation_id), I(state) and the same options as a
+        single operation, I(display_name), I(method), I(url_template),
+        I(description), I(template_parameters), I(request), I(responses) and
+        I(policies).
+      - Mutually exclusive with I(operation_id).
+    type: list
+  exclusive:
+    description:
+      - >-
+        Delete operations of the API which are not in I(operations).
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Maximum number of operations written in parallel with I(operations).
+    type: int
+    default: 8
   state:
     description:
       - Assert the state of the ApiOperation.
@@ -359,6 +383,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -431,9 +471,61 @@ EXAMPLES = '''
     operation_id: myOperation
     state: absent
 
+- name: Set all operations of an API
+  azure.rm.apimanagementapioperation:
+    resource_group: myResourceGroup
+    service_name: myService
+    api_id: myApi
+    exclusive: true
+    operations:
+      - operation_id: listItems
+        display_name: List items
+        method: GET
+        url_template: /items
+      - operation_id: getItem
+        display_name: Get item
+        method: GET
+        url_template: '/items/{id}'
+        template_parameters:
+          - name: id
+            type: string
+            required: true
+
 '''
 
 RETURN = '''
+summary:
+  description:
+    - Number of operations per action, when I(operations) is set.
+  returned: when operations is set
+  type: dict
+  sample: {"create": 1, "update": 2, "delete": 1, "unchanged": 10, "failed": 0}
+operations:
+  description:
+    - >-
+      Outcome for every operation, when I(operations) is set. Operations
+      deleted by I(exclusive) follow the listed ones.
+  returned: when operations is set
+  type: complex
+  contains:
+    operation_id:
+      description:
+        - Operation identifier.
+      returned: always
+      type: str
+      sample: getItem
+    action:
+      description:
+        - One of C(create), C(update), C(delete), C(unchanged) or C(failed).
+      returned: always
+      type: str
+      sample: update
+    error:
+      description:
+        - Error message when the operation failed.
+      returned: when failed
+      type: str
+      sample: null
 id:
   description:
     - Resource ID.
@@ -871,11 +963,17 @@ properties:
 
 '''
 
-import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -888,6 +986,11 @@ class Actions:
     NoAction, Create, Update, Delete = range(4)
 
 
+# options describing a single operation, also accepted by every item of 'operations'
+OPERATION_OPTIONS = ['template_parameters', 'description', 'request', 'responses', 'policies',
+                     'display_name', 'method', 'url_template']
+
+
 class AzureRMApiOperation(AzureRMModuleBaseExt):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -912,8 +1015,7 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             operation_id=dict(
                 type='str',
                 updatable=False,
-                disposition='operationId',
-                required=True
+                disposition='operationId'
             ),
             template_parameters=dict(
                 type='list',
@@ -1150,34 +1252,62 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             ),
             display_name=dict(
                 type='str',
-                disposition='/properties/displayName',
-                required=True
+                disposition='/properties/displayName'
             ),
             method=dict(
                 type='str',
-                disposition='/properties/*',
-                required=True
+                disposition='/properties/*'
             ),
             url_template=dict(
                 type='str',
-                disposition='/properties/urlTemplate',
-                required=True
+                disposition='/properties/urlTemplate'
+            ),
+            operations=dict(
+                type='list'
+            ),
+            exclusive=dict(
+                type='bool',
+                default=False
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
             ),
             state=dict(
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
+        self.operation_spec = dict((key, deepcopy(self.module_arg_spec[key])) for key in OPERATION_OPTIONS)
+        self.operation_spec['operation_id'] = dict(type='str', required=True)
+        self.operation_spec['state'] = dict(type='str', default='present', choices=['present', 'absent'])
+        self.module_arg_spec['operations']['elements'] = 'dict'
+        self.module_arg_spec['operations']['options'] = self.operation_spec
+
         self.resource_group = None
         self.service_name = None
         self.api_id = None
         self.operation_id = None
+        self.operations = None
+        self.exclusive = None
+        self.max_concurrency = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -1188,9 +1318,11 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMApiOperation, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                   supports_check_mode=True,
-                                                  supports_tags=True)
+                                                  supports_tags=True,
+                                                  mutually_exclusive=[['operations', 'operation_id']])
 
     def exec_module(self, **kwargs):
         for key in list(self.module_arg_spec.keys()):
@@ -1206,9 +1338,18 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
+        if self.operations is not None:
+            return self.reconcile_operations()
+
+        if not self.operation_id:
+            self.fail('operation_id is required unless operations is set')
+
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
                     '/resourceGroups' +
@@ -1235,6 +1376,7 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.log("Old instance didn't exist")
             else:
+                self.check_required(self.body.get('properties', {}), self.operation_id)
                 self.to_do = Actions.Create
         else:
             self.log('ApiOperation instance already exists')
@@ -1272,11 +1414,6 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ApiOperation instance unchanged')
             self.results['changed'] = False
@@ -1290,6 +1427,126 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
 
         return self.results
 
+    def check_required(self, properties, operation_id):
+        missing = [key for key in ['displayName', 'method', 'urlTemplate'] if not properties.get(key)]
+        if missing:
+            self.fail('{0} required to create operation {1}'.format(', '.join(missing), operation_id))
+
+    def reconcile_operations(self):
+        '''
+        Bring the operations of the API to the state given by 'operations'. Existing
+        operations are listed once and only the differences are sent, in parallel.
+        '''
+        self.url = ('/subscriptions' +
+                    '/{{ subscription_id }}' +
+                    '/resourceGroups' +
+                    '/{{ resource_group }}' +
+                    '/providers' +
+                    '/Microsoft.ApiManagement' +
+                    '/service' +
+                    '/{{ service_name }}' +
+                    '/apis' +
+                    '/{{ api_name }}' +
+                    '/operations')
+        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
+        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
+        self.url = self.url.replace('{{ service_name }}', self.service_name)
+        self.url = self.url.replace('{{ api_name }}', self.api_id)
+
+        current = {}
+        try:
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   [200]):
+                current[item['name'].lower()] = item
+        except CloudError as e:
+            self.fail('Error listing operations of API {0}: {1}'.format(self.api_id, str(e)))
+
+        modifiers = {}
+        self.create_compare_modifiers(self.operation_spec, '', modifiers)
+
+        entries = []
+        listed = set()
+        for operation in self.operations:
+            key = operation['operation_id'].lower()
+            if key in listed:
+                self.fail('Operation {0} is listed more than once'.format(operation['operation_id']))
+            listed.add(key)
+            old = current.get(key)
+            entry = dict(operation_id=operation['operation_id'],
+                         url=self.url + '/' + operation['operation_id'],
+                         body=None,
+                         action='unchanged')
+            if operation['state'] == 'absent':
+                if old:
+                    entry['action'] = 'delete'
+            else:
+                body = dict((key, operation[key]) for key in OPERATION_OPTIONS if operation.get(key) is not None)
+                self.inflate_parameters(self.operation_spec, body, 0)
+                entry['body'] = body
+                if not old:
+                    self.check_required(body.get('properties', {}), operation['operation_id'])
+                    entry['action'] = 'create'
+                elif not self.default_compare(modifiers, body, old, '', dict(compare=[])):
+                    entry['action'] = 'update'
+            entries.append(entry)
+
+        if self.exclusive:
+            for key in sorted(current):
+                if key not in listed:
+                    entries.append(dict(operation_id=current[key]['name'],
+                                        url=self.url + '/' + current[key]['name'],
+                                        body=None,
+                                        action='delete'))
+
+        pending = [x for x in entries if x['action'] != 'unchanged']
+        self.results['changed'] = len(pending) > 0
+
+        if pending and not self.check_mode:
+            for entry, outcome in zip(pending, run_concurrently(self.apply_operation, pending, self.max_concurrency)):
+                if outcome[1] is not None:
+                    entry['action'] = 'failed'
+                    entry['error'] = str(outcome[1])
+
+        self.results['operations'] = []
+        self.results['summary'] = dict(create=0, update=0, delete=0, unchanged=0, failed=0)
+        for entry in entries:
+            item = dict(operation_id=entry['operation_id'], action=entry['action'])
+            if entry.get('error'):
+                item['error'] = entry['error']
+            self.results['operations'].append(item)
+            self.results['summary'][entry['action']] += 1
+
+        if self.results['summary']['failed'] > 0:
+            self.fail('Failed to update {0} operations of API {1}'.format(self.results['summary']['failed'], self.api_id),
+                      **self.results)
+        return self.results
+
+    def apply_operation(self, entry):
+        if entry['action'] == 'delete':
+            response = self.mgmt_client.query(entry['url'],
+                                              'DELETE',
+                                              self.query_parameters,
+                                              dict(self.header_parameters),
+                                              None,
+                                              [200, 202, 204],
+                                              0,
+                                              0)
+        else:
+            response = self.mgmt_client.query(entry['url'],
+                                              'PUT',
+                                              self.query_parameters,
+                                              dict(self.header_parameters),
+                                              entry['body'],
+                                              self.status_code,
+                                              0,
+                                              0)
+        poller = AsyncOperationPoller(self.mgmt_client, dict(self.header_parameters), self.polling_timeout)
+        poller.wait(response)
+        return True
+
     def create_update_resource(self):
         # self.log('Creating / Updating the ApiOperation instance {0}'.format(self.))
 
@@ -1297,7 +1554,7 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -1320,29 +1577,33 @@ class AzureRMApiOperation(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ApiOperation instance.')
             self.fail('Error deleting the ApiOperation instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ApiOperation instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ApiOperation instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ApiOperation instance : {0} found".format(response.name))
@@ -67,6 +67,16 @@ options:
         description:
           - Json escaped string defining the document representing the Schema.
         type: str
+  document_path:
+    description:
+      - >-
+        Path of a local file with the schema document, used instead of
+        I(document) to keep large schemas out of the module arguments.
+      - >-
+        The document is compared with the existing one by a digest of its
+        canonical form, JSON by its data and XML regardless of formatting and
+        attribute order, and the file is only sent when the digest changes.
+    type: path
   state:
     description:
       - Assert the state of the ApiSchema.
@@ -77,6 +87,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -101,10 +127,24 @@ EXAMPLES = '''
     api_id: myApi
     schema_id: mySchema
     state: absent
+- name: ApiManagementCreateApiSchemaFromFile
+  azure.rm.apimanagementapischema:
+    resource_group: myResourceGroup
+    service_name: myService
+    api_id: myApi
+    schema_id: mySchema
+    content_type: application/vnd.ms-azure-apim.xsd+xml
+    document_path: /path/to/weather.xsd
 
 '''
 
 RETURN = '''
+digest:
+  description:
+    - sha256 of the canonical form of the schema document.
+  returned: when I(document) or I(document_path) is set
+  type: str
+  sample: 9f86d081884c7d659a2feaa0c55ad015a3bf4f1b2b0b822cd15d6c15b0f00a08
 id:
   description:
     - Resource ID.
@@ -153,11 +193,16 @@ properties:
 
 '''
 
-import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_content import document_digest, read_content
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -211,10 +256,21 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
                     )
                 )
             ),
+            document_path=dict(
+                type='path'
+            ),
             state=dict(
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
@@ -222,10 +278,15 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
         self.service_name = None
         self.api_id = None
         self.schema_id = None
+        self.document_path = None
+        self.digest = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -236,9 +297,11 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMApiSchema, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                supports_check_mode=True,
-                                               supports_tags=True)
+                                               supports_tags=True,
+                                               mutually_exclusive=[['document', 'document_path']])
 
     def exec_module(self, **kwargs):
         for key in list(self.module_arg_spec.keys()):
@@ -249,11 +312,23 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
 
         self.inflate_parameters(self.module_arg_spec, self.body, 0)
 
+        properties = self.body.setdefault('properties', {})
+        document_value = properties.get('document', {}).get('value')
+        if document_value is not None or self.document_path is not None:
+            try:
+                self.digest = document_digest(document_value, self.document_path, properties.get('contentType'))
+            except (IOError, OSError) as exc:
+                self.fail('Error reading {0}: {1}'.format(self.document_path, str(exc)))
+            self.results['digest'] = self.digest
+
         old_response = None
         response = None
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
@@ -290,12 +365,23 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
             if self.state == 'absent':
                 self.to_do = Actions.Delete
             else:
+                old_value = old_response.get('properties', {}).get('document', {}).get('value')
+                document_changed = False
+                if self.digest is not None:
+                    if (old_value is not None and
+                            document_digest(old_value, content_type=properties.get('contentType')) == self.digest):
+                        # same document, don't compare nor send its full text
+                        properties['document'] = dict(value=old_value)
+                        self.document_path = None
+                    else:
+                        # a document read from document_path is not in the body, so it is not compared
+                        document_changed = True
                 modifiers = {}
                 self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
                 self.results['modifiers'] = modifiers
                 self.results['compare'] = []
                 self.create_compare_modifiers(self.module_arg_spec, '', modifiers)
-                if not self.default_compare(modifiers, self.body, old_response, '', self.results):
+                if document_changed or not self.default_compare(modifiers, self.body, old_response, '', self.results):
                     self.to_do = Actions.Update
 
         if (self.to_do == Actions.Create) or (self.to_do == Actions.Update):
@@ -305,6 +391,11 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
                 self.results['changed'] = True
                 return self.results
 
+            if self.document_path is not None:
+                try:
+                    properties['document'] = dict(value=read_content(self.document_path))
+                except (IOError, OSError) as exc:
+                    self.fail('Error reading {0}: {1}'.format(self.document_path, str(exc)))
             response = self.create_update_resource()
 
             # if not old_response:
@@ -320,11 +411,6 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ApiSchema instance unchanged')
             self.results['changed'] = False
@@ -345,7 +431,7 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -368,29 +454,33 @@ class AzureRMApiSchema(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ApiSchema instance.')
             self.fail('Error deleting the ApiSchema instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ApiSchema instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ApiSchema instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ApiSchema instance : {0} found".format(response.name))
@@ -0,0 +1,510 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: apimanagementbulk
+version_added: '2.9'
+short_description: Reconcile many API Management entities at once.
+description:
+  - >-
+    Create, update and delete many entities of one API Management service in
+    a single task.
+  - >-
+    Current state is read with paged list calls, each entity is compared with
+    its desired state and only the required PUT and DELETE requests are sent,
+    concurrently within each dependency level. Version sets, named values,
+    backends, groups, users and products are applied first, then APIs and
+    product policies, then operations and API policies, then operation
+    policies. Deletions are applied in the reverse order.
+options:
+  resource_group:
+    description:
+      - The name of the resource group.
+    required: true
+    type: str
+  service_name:
+    description:
+      - The name of the API Management service.
+    required: true
+    type: str
+  entities:
+    description:
+      - List of desired entities.
+    required: true
+    type: list
+    suboptions:
+      type:
+        description:
+          - Type of the entity.
+        required: true
+        type: str
+        choices:
+          - api_version_set
+          - property
+          - backend
+          - group
+          - user
+          - product
+          - policy
+          - api
+          - product_policy
+          - operation
+          - api_policy
+          - operation_policy
+      name:
+        description:
+          - >-
+            Identifier of the entity. Not used for policies, which are always
+            named C(policy).
+        type: str
+      api_id:
+        description:
+          - >-
+            API identifier, required for C(operation), C(api_policy) and
+            C(operation_policy).
+        type: str
+      operation_id:
+        description:
+          - Operation identifier, required for C(operation_policy).
+        type: str
+      product_id:
+        description:
+          - Product identifier, required for C(product_policy).
+        type: str
+      properties:
+        description:
+          - >-
+            Entity contract properties, in the format of the REST API, for
+            example C(displayName) or C(serviceUrl).
+        type: dict
+      state:
+        description:
+          - Assert the state of the entity.
+        type: str
+        default: present
+        choices:
+          - absent
+          - present
+  read_strategy:
+    description:
+      - >-
+        How the current state is read. C(list) lists every collection holding
+        requested entities with paged list calls. C(batch) reads the requested
+        entities only, 20 per request through the ARM batch endpoint, which is
+        cheaper when few entities of large collections are reconciled.
+      - Policies are always read through the batch endpoint.
+    type: str
+    default: list
+    choices:
+      - list
+      - batch
+  max_concurrency:
+    description:
+      - Maximum number of requests sent in parallel.
+    type: int
+    default: 8
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+extends_documentation_fragment:
+  - azure
+author:
+  - Zim Kalinowski (@zikalino)
+
+'''
+
+EXAMPLES = '''
+- name: ApiManagementBulkReconcile
+  azure.rm.apimanagementbulk:
+    resource_group: myResourceGroup
+    service_name: myService
+    entities:
+      - type: api
+        name: myApi
+        properties:
+          displayName: My API
+          path: myapi
+          serviceUrl: 'http://example.com/api'
+          protocols:
+            - https
+      - type: operation
+        api_id: myApi
+        name: getItems
+        properties:
+          displayName: Get items
+          method: GET
+          urlTemplate: /items
+      - type: api_policy
+        api_id: myApi
+        properties:
+          format: xml
+          value: <policies><inbound /><backend><forward-request /></backend><outbound /></policies>
+      - type: group
+        name: oldGroup
+        state: absent
+
+'''
+
+RETURN = '''
+summary:
+  description:
+    - Number of entities per action.
+  returned: always
+  type: dict
+  sample: {"create": 1, "update": 2, "delete": 1, "unchanged": 10, "failed": 0, "skipped": 0}
+entities:
+  description:
+    - Outcome for every entity, in the order of the C(entities) option.
+  returned: always
+  type: complex
+  contains:
+    type:
+      description:
+        - Type of the entity.
+      returned: always
+      type: str
+      sample: api
+    name:
+      description:
+        - Identifier of the entity.
+      returned: always
+      type: str
+      sample: myApi
+    action:
+      description:
+        - >-
+          One of C(create), C(update), C(delete), C(unchanged), C(failed) or
+          C(skipped).
+      returned: always
+      type: str
+      sample: update
+    error:
+      description:
+        - Error message when the entity failed.
+      returned: when failed
+      type: str
+      sample: null
+
+'''
+
+import json
+from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_batch import batch_request, send_batch
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_xml import xml_equal
+try:
+    from msrestazure.azure_exceptions import CloudError
+except ImportError:
+    # this is handled in azure_rm_common
+    pass
+
+
+# level defines the order of creation, entities of the same level are independent
+ENTITY_TYPES = dict(
+    api_version_set=dict(level=0, path='/apiVersionSets/{{ name }}'),
+    property=dict(level=0, path='/properties/{{ name }}'),
+    backend=dict(level=0, path='/backends/{{ name }}'),
+    group=dict(level=0, path='/groups/{{ name }}'),
+    user=dict(level=0, path='/users/{{ name }}'),
+    product=dict(level=0, path='/products/{{ name }}'),
+    policy=dict(level=0, path='/policies/policy'),
+    api=dict(level=1, path='/apis/{{ name }}'),
+    product_policy=dict(level=1, path='/products/{{ product_id }}/policies/policy'),
+    operation=dict(level=2, path='/apis/{{ api_id }}/operations/{{ name }}'),
+    api_policy=dict(level=2, path='/apis/{{ api_id }}/policies/policy'),
+    operation_policy=dict(level=3, path='/apis/{{ api_id }}/operations/{{ operation_id }}/policies/policy')
+)
+
+
+class AzureRMApiManagementBulk(AzureRMModuleBaseExt):
+    def __init__(self):
+        self.module_arg_spec = dict(
+            resource_group=dict(
+                type='str',
+                required=True
+            ),
+            service_name=dict(
+                type='str',
+                required=True
+            ),
+            entities=dict(
+                type='list',
+                required=True,
+                options=dict(
+                    type=dict(
+                        type='str',
+                        required=True,
+                        choices=list(ENTITY_TYPES.keys())
+                    ),
+                    name=dict(
+                        type='str'
+                    ),
+                    api_id=dict(
+                        type='str'
+                    ),
+                    operation_id=dict(
+                        type='str'
+                    ),
+                    product_id=dict(
+                        type='str'
+                    ),
+                    properties=dict(
+                        type='dict'
+                    ),
+                    state=dict(
+                        type='str',
+                        default='present',
+                        choices=['present', 'absent']
+                    )
+                )
+            ),
+            read_strategy=dict(
+                type='str',
+                default='list',
+                choices=['list', 'batch']
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            )
+        )
+
+        self.resource_group = None
+        self.service_name = None
+        self.entities = None
+        self.read_strategy = None
+        self.max_concurrency = None
+        self.polling_timeout = None
+
+        self.results = dict(changed=False)
+        self.mgmt_client = None
+        self.url = None
+        self.status_code = [200, 201, 202]
+
+        self.query_parameters = {}
+        self.query_parameters['api-version'] = '2019-01-01'
+        self.header_parameters = {}
+        self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        install_token_cache()
+        super(AzureRMApiManagementBulk, self).__init__(derived_arg_spec=self.module_arg_spec,
+                                                       supports_check_mode=True,
+                                                       supports_tags=False)
+
+    def exec_module(self, **kwargs):
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+
+        self.url = ('/subscriptions' +
+                    '/{{ subscription_id }}' +
+                    '/resourceGroups' +
+                    '/{{ resource_group }}' +
+                    '/providers' +
+                    '/Microsoft.ApiManagement' +
+                    '/service' +
+                    '/{{ service_name }}')
+        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
+        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
+        self.url = self.url.replace('{{ service_name }}', self.service_name)
+
+        entities = [self.prepare_entity(x) for x in self.entities]
+        current = self.get_current_state(entities)
+
+        for entity in entities:
+            old = current.get(entity['url'].lower())
+            if entity['state'] == 'absent':
+                entity['action'] = 'delete' if old else 'unchanged'
+            elif not old:
+                entity['action'] = 'create'
+            else:
+                properties = entity['body']['properties']
+                old_properties = old.get('properties', {})
+                if not entity['listable'] and xml_equal(properties.get('value'), old_properties.get('value')):
+                    # policies are reformatted by the service, compare their canonical forms
+                    properties['value'] = old_properties.get('value')
+                    if properties.get('format') in ['xml', 'rawxml'] and old_properties.get('format') in ['xml', 'rawxml']:
+                        properties['format'] = old_properties.get('format')
+                compare = dict(compare=[])
+                if self.default_compare({}, entity['body'], old, '', compare):
+                    entity['action'] = 'unchanged'
+                else:
+                    entity['action'] = 'update'
+
+        pending = [x for x in entities if x['action'] != 'unchanged']
+        self.results['changed'] = len(pending) > 0
+
+        if pending and not self.check_mode:
+            self.apply(pending)
+
+        self.results['entities'] = []
+        self.results['summary'] = dict(create=0, update=0, delete=0, unchanged=0, failed=0, skipped=0)
+        for entity in entities:
+            item = dict(type=entity['type'], name=entity['name'], action=entity['action'])
+            if entity.get('error'):
+                item['error'] = entity['error']
+            self.results['entities'].append(item)
+            self.results['summary'][entity['action']] += 1
+
+        if self.results['summary']['failed'] > 0:
+            self.fail('Failed to reconcile {0} API Management entities'.format(self.results['summary']['failed']),
+                      **self.results)
+        return self.results
+
+    def prepare_entity(self, entity):
+        entity_type = ENTITY_TYPES[entity['type']]
+        path = entity_type['path']
+        if path.endswith('/policy'):
+            entity['name'] = 'policy'
+        for key in ['name', 'api_id', 'operation_id', 'product_id']:
+            placeholder = '{{ ' + key + ' }}'
+            if placeholder in path:
+                if not entity.get(key):
+                    self.fail('{0} is required for entities of type {1}'.format(key, entity['type']))
+                path = path.replace(placeholder, entity[key])
+        return dict(type=entity['type'],
+                    name=entity['name'],
+                    level=entity_type['level'],
+                    state=entity['state'],
+                    url=self.url + path,
+                    listable=not path.endswith('/policy'),
+                    body=dict(properties=entity.get('properties') or {}),
+                    action=None)
+
+    def get_current_state(self, entities):
+        '''
+        Read the current state of all entities into a dict keyed by lowercase resource url.
+        Collections are listed once with paging, policies and, with the batch read strategy,
+        all other entities are read through the ARM batch endpoint.
+        '''
+        collections = []
+        singletons = []
+        for entity in entities:
+            if entity['listable'] and self.read_strategy == 'list':
+                collection = entity['url'].rsplit('/', 1)[0]
+                if collection not in collections:
+                    collections.append(collection)
+            elif entity['url'] not in singletons:
+                singletons.append(entity['url'])
+
+        current = {}
+        for response, error in run_concurrently(self.list_collection, collections, self.max_concurrency):
+            if error is not None:
+                self.fail('Error listing API Management entities: {0}'.format(str(error)))
+            current.update(response)
+        try:
+            responses = send_batch(self.mgmt_client,
+                                   [batch_request(x, self.query_parameters) for x in singletons],
+                                   self.header_parameters,
+                                   max_workers=self.max_concurrency,
+                                   timeout=self.polling_timeout)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error reading API Management entities: {0}'.format(str(e)))
+        for url, response in zip(singletons, responses):
+            if response['status_code'] == 200:
+                current[url.lower()] = response['body']
+            elif response['status_code'] != 404:
+                self.fail('Error reading API Management entity {0}: {1}'.format(url, json.dumps(response['body'])))
+        return current
+
+    def list_collection(self, url):
+        items = {}
+        try:
+            for item in iter_pages(self.mgmt_client,
+                                   url,
+                                   self.query_parameters,
+                                   dict(self.header_parameters),
+                                   [200]):
+                items[(url + '/' + item['name']).lower()] = item
+        except CloudError as e:
+            # parent entity doesn't exist yet
+            if e.status_code != 404:
+                raise
+        return items
+
+    def apply(self, entities):
+        '''
+        Create and update entities level by level, then delete them in reverse level order.
+        Once a level has a failure, the remaining entities are skipped.
+        '''
+        writes = [x for x in entities if x['action'] in ['create', 'update']]
+        deletes = [x for x in entities if x['action'] == 'delete']
+        stages = []
+        for level in sorted(set(x['level'] for x in writes)):
+            stages.append([x for x in writes if x['level'] == level])
+        for level in sorted(set(x['level'] for x in deletes), reverse=True):
+            stages.append([x for x in deletes if x['level'] == level])
+
+        failed = False
+        for stage in stages:
+            if failed:
+                for entity in stage:
+                    entity['action'] = 'skipped'
+                continue
+            for entity, outcome in zip(stage, run_concurrently(self.apply_entity, stage, self.max_concurrency)):
+                if outcome[1] is not None:
+                    entity['action'] = 'failed'
+                    entity['error'] = str(outcome[1])
+                    failed = True
+
+    def apply_entity(self, entity):
+        if entity['action'] == 'delete':
+            response = self.mgmt_client.query(entity['url'],
+                                              'DELETE',
+                                              self.query_parameters,
+                                              dict(self.header_parameters),
+                                              None,
+                                              [200, 202, 204],
+                                              0,
+                                              0)
+        else:
+            response = self.mgmt_client.query(entity['url'],
+                                              'PUT',
+                                              self.query_parameters,
+                                              dict(self.header_parameters),
+                                              entity['body'],
+                                              self.status_code,
+                                              0,
+                                              0)
+        poller = AsyncOperationPoller(self.mgmt_client, dict(self.header_parameters), self.polling_timeout)
+        poller.wait(response)
+        return True
+
+
+def main():
+    AzureRMApiManagementBulk()
+
+
+if __name__ == '__main__':
+    main()
@@ -76,6 +76,33 @@ options:
       - A resource identifier for the user created the issue.
     required: true
     type: str
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
+  filter:
+    description:
+      - >-
+        OData filter expression evaluated by the service for list operations,
+        for example C(state eq 'open'). Supported fields are C(name), C(apiId),
+        C(title), C(description), C(authorName), C(state).
+    type: str
+  top:
+    description:
+      - Number of records to return.
+    type: int
+  skip:
+    description:
+      - Number of records to skip.
+    type: int
+  order_by:
+    description:
+      - >-
+        OData order by expression for list operations, for example
+        C(name desc). Supports the same fields as I(filter).
+    type: str
 extends_documentation_fragment:
   - azure
 author:
@@ -139,23 +166,51 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_odata import odata_query_parameters, validate_odata_options
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
 
+FILTERABLE_FIELDS = ['name',
+                     'apiId',
+                     'title',
+                     'description',
+                     'authorName',
+                     'state']
+
+
 class AzureRMIssueInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             resource_group=dict(
                 type='str',
-                required=true
+                required=True
             ),
             service_name=dict(
                 type='str',
-                required=true
+                required=True
             ),
             issue_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            top=dict(
+                type='int'
+            ),
+            skip=dict(
+                type='int'
+            ),
+            order_by=dict(
+                type='str'
             )
         )
 
@@ -166,6 +221,11 @@ class AzureRMIssueInfo(AzureRMModuleBase):
         self.name = None
         self.type = None
         self.properties = None
+        self.max_items = None
+        self.filter = None
+        self.top = None
+        self.skip = None
+        self.order_by = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -179,6 +239,7 @@ class AzureRMIssueInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMIssueInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -186,16 +247,22 @@ class AzureRMIssueInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
+        validate_odata_options(self, FILTERABLE_FIELDS, self.filter, self.top, self.skip, self.order_by)
+        if self.top is not None and (self.max_items is None or self.top < self.max_items):
+            self.max_items = self.top
+
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
             self.issue_id is not None):
-            self.results['issue'] = self.format_item(self.get())
+            self.results['issue'] = self.get()
         elif (self.resource_group is not None and
               self.service_name is not None):
-            self.results['issue'] = self.format_item(self.listbyservice())
+            self.results['issue'] = self.listbyservice()
         return self.results
 
     def get(self):
@@ -215,7 +282,7 @@ class AzureRMIssueInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ issue_name }}', self.name)
+        self.url = self.url.replace('{{ issue_name }}', self.issue_id)
 
         try:
             response = self.mgmt_client.query(self.url,
@@ -226,7 +293,7 @@ class AzureRMIssueInfo(AzureRMModuleBase):
                                               self.status_code,
                                               600,
                                               30)
-            results['temp_item'] = json.loads(response.text)
+            results = self.format_item(json.loads(response.text))
             # self.log('Response : {0}'.format(response))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
@@ -234,8 +301,7 @@ class AzureRMIssueInfo(AzureRMModuleBase):
         return results
 
     def listbyservice(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -249,26 +315,29 @@ class AzureRMIssueInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ issue_name }}', self.name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
         return results
 
-    def format_item(item):
-        return item
+    def format_item(self, item):
+        d = {
+            'id': item['id'],
+            'name': item['name'],
+            'type': item['type'],
+            'properties': item['properties']
+        }
+        return d
 
 
 def main():
@@ -112,6 +112,33 @@ options:
       - Product name.
     required: true
     type: str
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
+  filter:
+    description:
+      - >-
+        OData filter expression evaluated by the service for list operations,
+        for example C(state eq 'published'). Supported fields are C(name),
+        C(displayName), C(description), C(terms), C(state).
+    type: str
+  top:
+    description:
+      - Number of records to return.
+    type: int
+  skip:
+    description:
+      - Number of records to skip.
+    type: int
+  order_by:
+    description:
+      - >-
+        OData order by expression for list operations, for example
+        C(name desc). Supports the same fields as I(filter).
+    type: str
 extends_documentation_fragment:
   - azure
 author:
@@ -179,10 +206,29 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_odata import odata_query_parameters, validate_odata_options
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
 
+FILTERABLE_FIELDS = ['name',
+                     'displayName',
+                     'description',
+                     'terms',
+                     'state']
+
+TAG_FILTERABLE_FIELDS = ['product/name',
+                         'product/displayName',
+                         'product/description',
+                         'product/terms',
+                         'product/state',
+                         'tag/name']
+
+
 class AzureRMProductInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -202,6 +248,21 @@ class AzureRMProductInfo(AzureRMModuleBase):
             ),
             product_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            top=dict(
+                type='int'
+            ),
+            skip=dict(
+                type='int'
+            ),
+            order_by=dict(
+                type='str'
             )
         )
 
@@ -211,6 +272,11 @@ class AzureRMProductInfo(AzureRMModuleBase):
         self.tags = None
         self.include_not_tagged_products = None
         self.product_id = None
+        self.max_items = None
+        self.filter = None
+        self.top = None
+        self.skip = None
+        self.order_by = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -224,6 +290,7 @@ class AzureRMProductInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMProductInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -231,19 +298,31 @@ class AzureRMProductInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
+        validate_odata_options(self,
+                               TAG_FILTERABLE_FIELDS if self.include_not_tagged_products is not None else FILTERABLE_FIELDS,
+                               self.filter,
+                               self.top,
+                               self.skip,
+                               self.order_by)
+        if self.top is not None and (self.max_items is None or self.top < self.max_items):
+            self.max_items = self.top
+
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
             self.product_id is not None):
             self.results['product'] = self.format_item(self.get())
         elif (self.resource_group is not None and
-              self.service_name is not None):
-            self.results['product'] = self.format_item(self.listbytags())
+              self.service_name is not None and
+              self.include_not_tagged_products is not None):
+            self.results['product'] = self.listbytags()
         elif (self.resource_group is not None and
               self.service_name is not None):
-            self.results['product'] = self.format_item(self.listbyservice())
+            self.results['product'] = self.listbyservice()
         return self.results
 
     def get(self):
@@ -282,8 +361,7 @@ class AzureRMProductInfo(AzureRMModuleBase):
         return self.format_item(results)
 
     def listbytags(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -298,25 +376,23 @@ class AzureRMProductInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
+        self.query_parameters['includeNotTaggedProducts'] = str(self.include_not_tagged_products).lower()
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def listbyservice(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -331,21 +407,19 @@ class AzureRMProductInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def format_item(self, item):
         d = {
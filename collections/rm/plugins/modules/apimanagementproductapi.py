@@ -44,7 +44,7 @@ options:
         API revision identifier. Must be unique in the current API Management
         service instance. Non-current revision has ;rev=n as a suffix where n is
         the revision number.
-    required: true
+      - Required unless I(members) is set.
     type: str
   description:
     description:
@@ -201,6 +201,25 @@ options:
             Name of HTTP header parameter that indicates the API Version if
             versioningScheme is set to `header`.
         type: str
+  members:
+    description:
+      - >-
+        Identifiers of all APIs of the product. Current APIs are listed
+        once and only the missing ones are added, in parallel. With
+        I(state=absent) the listed APIs are removed instead.
+      - Mutually exclusive with I(api_id).
+    type: list
+  exclusive:
+    description:
+      - >-
+        Remove APIs of the product which are not in I(members).
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Maximum number of APIs added or removed in parallel with I(members).
+    type: int
+    default: 8
   state:
     description:
       - Assert the state of the ProductApi.
@@ -211,6 +230,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -234,9 +269,55 @@ EXAMPLES = '''
     api_id: myApi
     state: absent
 
+- name: Set all APIs of a product
+  azure.rm.apimanagementproductapi:
+    resource_group: myResourceGroup
+    service_name: myService
+    product_id: myProduct
+    exclusive: true
+    members:
+      - echo-api
+      - orders-api
+
 '''
 
 RETURN = '''
+members:
+  description:
+    - Outcome of I(members), APIs which were or, in check mode, would be changed.
+  returned: when members is set
+  type: complex
+  contains:
+    added:
+      description:
+        - Identifiers of the added APIs.
+      returned: always
+      type: list
+      sample: ["echo-api"]
+    removed:
+      description:
+        - Identifiers of the removed APIs.
+      returned: always
+      type: list
+      sample: []
+    failed:
+      description:
+        - APIs which could not be added or removed, with the error.
+      returned: always
+      type: list
+      sample: []
+    summary:
+      description:
+        - Number of added, removed, unchanged and failed APIs.
+      returned: always
+      type: dict
+      sample: {"added": 1, "removed": 0, "unchanged": 4999, "failed": 0}
+    elapsed:
+      description:
+        - Time in seconds spent listing and updating the APIs.
+      returned: always
+      type: float
+      sample: 3.2
 id:
   description:
     - Resource ID.
@@ -264,11 +345,16 @@ properties:
 
 '''
 
-import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_members import reconcile_links
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -305,8 +391,7 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
             api_id=dict(
                 type='str',
                 updatable=False,
-                disposition='apiId',
-                required=True
+                disposition='apiId'
             ),
             description=dict(
                 type='str',
@@ -452,10 +537,30 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
                     )
                 )
             ),
+            members=dict(
+                type='list',
+                elements='str'
+            ),
+            exclusive=dict(
+                type='bool',
+                default=False
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
+            ),
             state=dict(
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
@@ -463,11 +568,17 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
         self.service_name = None
         self.product_id = None
         self.api_id = None
+        self.members = None
+        self.exclusive = None
+        self.max_concurrency = None
         self.properties = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -478,9 +589,11 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMProductApi, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                 supports_check_mode=True,
-                                                supports_tags=True)
+                                                supports_tags=True,
+                                                mutually_exclusive=[['members', 'api_id']])
 
     def exec_module(self, **kwargs):
         for key in list(self.module_arg_spec.keys()):
@@ -496,6 +609,9 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
@@ -515,6 +631,13 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
         self.url = self.url.replace('{{ product_name }}', self.product_id)
+
+        if self.members is not None:
+            return self.reconcile_members(self.url.rsplit('/', 1)[0])
+
+        if not self.api_id:
+            self.fail('api_id is required unless members is set')
+
         self.url = self.url.replace('{{ api_name }}', self.api_id)
 
         old_response = self.get_resource()
@@ -562,11 +685,6 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ProductApi instance unchanged')
             self.results['changed'] = False
@@ -580,6 +698,28 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
 
         return self.results
 
+    def reconcile_members(self, url):
+        try:
+            members = reconcile_links(self.mgmt_client,
+                                      url,
+                                      self.members,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.state,
+                                      self.exclusive,
+                                      self.max_concurrency,
+                                      self.check_mode,
+                                      self.polling_timeout)
+        except CloudError as e:
+            self.fail('Error listing the APIs of product {0}: {1}'.format(self.product_id, str(e)))
+
+        self.results['members'] = members
+        self.results['changed'] = len(members['added']) + len(members['removed']) > 0
+        if members['failed']:
+            self.fail('Failed to update {0} APIs of product {1}'.format(len(members['failed']), self.product_id),
+                      **self.results)
+        return self.results
+
     def create_update_resource(self):
         # self.log('Creating / Updating the ProductApi instance {0}'.format(self.))
 
@@ -587,7 +727,7 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -610,29 +750,33 @@ class AzureRMProductApi(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ProductApi instance.')
             self.fail('Error deleting the ProductApi instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ProductApi instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ProductApi instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ProductApi instance : {0} found".format(response.name))
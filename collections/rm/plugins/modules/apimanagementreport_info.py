@@ -20,6 +20,10 @@ version_added: '2.9'
 short_description: Get Report info.
 description:
   - Get info of Report.
+  - >-
+    The time range is split into shards of I(shard_interval) which are fetched
+    concurrently with paging. Records of all shards are merged while they are
+    received, so only the aggregates are kept in memory.
 options:
   resource_group:
     description:
@@ -31,6 +35,36 @@ options:
       - The name of the API Management service.
     required: true
     type: str
+    aliases:
+      - service_name
+  report_by:
+    description:
+      - >-
+        Dimension of the report. C(request) returns individual requests, or
+        with I(aggregate) their count, bandwidth and latency percentiles per
+        API operation.
+    type: str
+    default: api
+    choices:
+      - api
+      - user
+      - operation
+      - product
+      - geo
+      - subscription
+      - time
+      - request
+  start_time:
+    description:
+      - >-
+        Start of the time range, in ISO 8601 format, for example
+        C(2019-09-01T00:00:00Z).
+    required: true
+    type: str
+  end_time:
+    description:
+      - End of the time range, in ISO 8601 format. Defaults to now.
+    type: str
   interval:
     description:
       - >-
@@ -39,141 +73,38 @@ options:
         (http://en.wikipedia.org/wiki/ISO_8601#Durations).This code can be used
         to convert TimeSpan to a valid interval string: XmlConvert.ToString(new
         TimeSpan(hours, minutes, seconds)).
-    type: 'unknown-primary[timeSpan]'
-  value:
-    description:
-      - Page values.
-    type: list
-    suboptions:
-      name:
-        description:
-          - >-
-            Name depending on report endpoint specifies product, API, operation
-            or developer name.
-        type: str
-      timestamp:
-        description:
-          - >-
-            Start of aggregation period. The date conforms to the following
-            format: `yyyy-MM-ddTHH:mm:ssZ` as specified by the ISO 8601
-            standard.<br>
-        type: datetime
-      interval:
-        description:
-          - >-
-            Length of aggregation period.  Interval must be multiple of 15
-            minutes and may not be zero. The value should be in ISO 8601 format
-            (http://en.wikipedia.org/wiki/ISO_8601#Durations).
-        type: str
-      country:
-        description:
-          - Country to which this record data is related.
-        type: str
-      region:
-        description:
-          - Country region to which this record data is related.
-        type: str
-      zip:
-        description:
-          - Zip code to which this record data is related.
-        type: str
-      user_id:
-        description:
-          - 'User identifier path. /users/{userId}'
-        type: str
-      product_id:
-        description:
-          - 'Product identifier path. /products/{productId}'
-        type: str
-      api_id:
-        description:
-          - 'API identifier path. /apis/{apiId}'
-        type: str
-      operation_id:
-        description:
-          - 'Operation identifier path. /apis/{apiId}/operations/{operationId}'
-        type: str
-      api_region:
-        description:
-          - API region identifier.
-        type: str
-      subscription_id:
-        description:
-          - 'Subscription identifier path. /subscriptions/{subscriptionId}'
-        type: str
-      call_count_success:
-        description:
-          - >-
-            Number of successful calls. This includes calls returning
-            HttpStatusCode <= 301 and HttpStatusCode.NotModified and
-            HttpStatusCode.TemporaryRedirect
-        type: number
-      call_count_blocked:
-        description:
-          - >-
-            Number of calls blocked due to invalid credentials. This includes
-            calls returning HttpStatusCode.Unauthorized and
-            HttpStatusCode.Forbidden and HttpStatusCode.TooManyRequests
-        type: number
-      call_count_failed:
-        description:
-          - >-
-            Number of calls failed due to proxy or backend errors. This includes
-            calls returning HttpStatusCode.BadRequest(400) and any Code between
-            HttpStatusCode.InternalServerError (500) and 600
-        type: number
-      call_count_other:
-        description:
-          - Number of other calls.
-        type: number
-      call_count_total:
-        description:
-          - Total number of calls.
-        type: number
-      bandwidth:
-        description:
-          - Bandwidth consumed.
-        type: number
-      cache_hit_count:
-        description:
-          - Number of times when content was served from cache policy.
-        type: number
-      cache_miss_count:
-        description:
-          - Number of times content was fetched from backend.
-        type: number
-      api_time_avg:
-        description:
-          - Average time it took to process request.
-        type: number
-      api_time_min:
-        description:
-          - Minimum time it took to process request.
-        type: number
-      api_time_max:
-        description:
-          - Maximum time it took to process request.
-        type: number
-      service_time_avg:
-        description:
-          - Average time it took to process request on backend.
-        type: number
-      service_time_min:
-        description:
-          - Minimum time it took to process request on backend.
-        type: number
-      service_time_max:
-        description:
-          - Maximum time it took to process request on backend.
-        type: number
-  count:
+      - Required when I(report_by=time).
+    type: str
+  shard_interval:
     description:
-      - Total record count number across all pages.
-    type: number
-  next_link:
+      - >-
+        Length of the shards the time range is split into, as an ISO 8601
+        duration in days, hours, minutes and seconds. With I(report_by=time) it
+        is rounded up to a multiple of I(interval).
+    type: str
+    default: P1D
+  filter:
     description:
-      - Next page link if any.
+      - >-
+        Additional OData filter, combined with the time range, for example
+        C(apiId eq 'echo-api').
     type: str
+  aggregate:
+    description:
+      - >-
+        Merge the records of all shards per report dimension. When disabled
+        the records are returned as received, up to I(max_items).
+    type: bool
+    default: true
+  max_items:
+    description:
+      - Maximum number of records returned when I(aggregate) is disabled.
+    type: int
+  max_concurrency:
+    description:
+      - Maximum number of shards fetched in parallel.
+    type: int
+    default: 8
 extends_documentation_fragment:
   - azure
 author:
@@ -183,281 +114,551 @@ author:
 
 EXAMPLES = '''
 - name: ApiManagementGetReportsByApi
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    start_time: '2019-09-01T00:00:00Z'
+    end_time: '2019-10-01T00:00:00Z'
 - name: ApiManagementGetReportsByGeo
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    report_by: geo
+    start_time: '2019-09-01T00:00:00Z'
 - name: ApiManagementGetReportsByUser
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    report_by: user
+    start_time: '2019-09-01T00:00:00Z'
 - name: ApiManagementGetReportsByTime
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    report_by: time
     interval: PT15M
+    start_time: '2019-09-01T00:00:00Z'
+    end_time: '2019-09-02T00:00:00Z'
+    shard_interval: PT6H
 - name: ApiManagementGetReportsByProduct
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    report_by: product
+    start_time: '2019-09-01T00:00:00Z'
 - name: ApiManagementGetReportsByRequest
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    report_by: request
+    start_time: '2019-09-01T00:00:00Z'
+    end_time: '2019-09-01T12:00:00Z'
+    shard_interval: PT1H
+    filter: "apiId eq 'echo-api'"
 - name: ApiManagementGetReportsByOperation
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
+    report_by: operation
+    start_time: '2019-09-01T00:00:00Z'
 - name: ApiManagementGetReportsBySubscription
-  azure.rm.apimanagementreport.info:
+  azure.rm.apimanagementreport_info:
     resource_group: myResourceGroup
     name: myService
-
+    report_by: subscription
+    start_time: '2019-09-01T00:00:00Z'
 '''
 
 RETURN = '''
 reports:
-  description: >-
-    A list of dict results where the key is the name of the Report and the
-    values are the facts for that Report.
+  description:
+    - >-
+      Report records. With I(aggregate) there is one record per report
+      dimension, e.g. per API, covering the whole time range.
   returned: always
   type: complex
   contains:
-    report_name:
-      description: The key is the name of the server that the values relate to.
-      type: complex
-      contains:
-        value:
-          description:
-            - Page values.
-          returned: always
-          type: dict
-          sample: null
-          contains:
-            name:
-              description:
-                - >-
-                  Name depending on report endpoint specifies product, API,
-                  operation or developer name.
-              returned: always
-              type: str
-              sample: null
-            timestamp:
-              description:
-                - >-
-                  Start of aggregation period. The date conforms to the
-                  following format: `yyyy-MM-ddTHH:mm:ssZ` as specified by the
-                  ISO 8601 standard.<br>
-              returned: always
-              type: datetime
-              sample: null
-            interval:
-              description:
-                - >-
-                  Length of aggregation period.  Interval must be multiple of 15
-                  minutes and may not be zero. The value should be in ISO 8601
-                  format (http://en.wikipedia.org/wiki/ISO_8601#Durations).
-              returned: always
-              type: str
-              sample: null
-            country:
-              description:
-                - Country to which this record data is related.
-              returned: always
-              type: str
-              sample: null
-            region:
-              description:
-                - Country region to which this record data is related.
-              returned: always
-              type: str
-              sample: null
-            zip:
-              description:
-                - Zip code to which this record data is related.
-              returned: always
-              type: str
-              sample: null
-            user_id:
-              description:
-                - 'User identifier path. /users/{userId}'
-              returned: always
-              type: str
-              sample: null
-            product_id:
-              description:
-                - 'Product identifier path. /products/{productId}'
-              returned: always
-              type: str
-              sample: null
-            api_id:
-              description:
-                - 'API identifier path. /apis/{apiId}'
-              returned: always
-              type: str
-              sample: null
-            operation_id:
-              description:
-                - >-
-                  Operation identifier path.
-                  /apis/{apiId}/operations/{operationId}
-              returned: always
-              type: str
-              sample: null
-            api_region:
-              description:
-                - API region identifier.
-              returned: always
-              type: str
-              sample: null
-            subscription_id:
-              description:
-                - 'Subscription identifier path. /subscriptions/{subscriptionId}'
-              returned: always
-              type: str
-              sample: null
-            call_count_success:
-              description:
-                - >-
-                  Number of successful calls. This includes calls returning
-                  HttpStatusCode <= 301 and HttpStatusCode.NotModified and
-                  HttpStatusCode.TemporaryRedirect
-              returned: always
-              type: number
-              sample: null
-            call_count_blocked:
-              description:
-                - >-
-                  Number of calls blocked due to invalid credentials. This
-                  includes calls returning HttpStatusCode.Unauthorized and
-                  HttpStatusCode.Forbidden and HttpStatusCode.TooManyRequests
-              returned: always
-              type: number
-              sample: null
-            call_count_failed:
-              description:
-                - >-
-                  Number of calls failed due to proxy or backend errors. This
-                  includes calls returning HttpStatusCode.BadRequest(400) and
-                  any Code between HttpStatusCode.InternalServerError (500) and
-                  600
-              returned: always
-              type: number
-              sample: null
-            call_count_other:
-              description:
-                - Number of other calls.
-              returned: always
-              type: number
-              sample: null
-            call_count_total:
-              description:
-                - Total number of calls.
-              returned: always
-              type: number
-              sample: null
-            bandwidth:
-              description:
-                - Bandwidth consumed.
-              returned: always
-              type: number
-              sample: null
-            cache_hit_count:
-              description:
-                - Number of times when content was served from cache policy.
-              returned: always
-              type: number
-              sample: null
-            cache_miss_count:
-              description:
-                - Number of times content was fetched from backend.
-              returned: always
-              type: number
-              sample: null
-            api_time_avg:
-              description:
-                - Average time it took to process request.
-              returned: always
-              type: number
-              sample: null
-            api_time_min:
-              description:
-                - Minimum time it took to process request.
-              returned: always
-              type: number
-              sample: null
-            api_time_max:
-              description:
-                - Maximum time it took to process request.
-              returned: always
-              type: number
-              sample: null
-            service_time_avg:
-              description:
-                - Average time it took to process request on backend.
-              returned: always
-              type: number
-              sample: null
-            service_time_min:
-              description:
-                - Minimum time it took to process request on backend.
-              returned: always
-              type: number
-              sample: null
-            service_time_max:
-              description:
-                - Maximum time it took to process request on backend.
-              returned: always
-              type: number
-              sample: null
-        count:
-          description:
-            - Total record count number across all pages.
-          returned: always
-          type: number
-          sample: null
-        next_link:
-          description:
-            - Next page link if any.
-          returned: always
-          type: str
-          sample: null
+    name:
+      description:
+        - >-
+          Name depending on report endpoint specifies product, API, operation
+          or developer name.
+      returned: always
+      type: str
+      sample: null
+    timestamp:
+      description:
+        - >-
+          Start of aggregation period. The date conforms to the following
+          format: `yyyy-MM-ddTHH:mm:ssZ` as specified by the ISO 8601
+          standard.<br>
+      returned: when I(report_by=time) or I(aggregate) is disabled
+      type: str
+      sample: null
+    interval:
+      description:
+        - Length of aggregation period.
+      returned: when I(report_by=time) or I(aggregate) is disabled
+      type: str
+      sample: null
+    country:
+      description:
+        - Country to which this record data is related.
+      returned: always
+      type: str
+      sample: null
+    region:
+      description:
+        - Country region to which this record data is related.
+      returned: always
+      type: str
+      sample: null
+    zip:
+      description:
+        - Zip code to which this record data is related.
+      returned: always
+      type: str
+      sample: null
+    user_id:
+      description:
+        - 'User identifier path. /users/{userId}'
+      returned: always
+      type: str
+      sample: null
+    product_id:
+      description:
+        - 'Product identifier path. /products/{productId}'
+      returned: always
+      type: str
+      sample: null
+    api_id:
+      description:
+        - 'API identifier path. /apis/{apiId}'
+      returned: always
+      type: str
+      sample: null
+    operation_id:
+      description:
+        - 'Operation identifier path. /apis/{apiId}/operations/{operationId}'
+      returned: always
+      type: str
+      sample: null
+    api_region:
+      description:
+        - API region identifier.
+      returned: always
+      type: str
+      sample: null
+    subscription_id:
+      description:
+        - 'Subscription identifier path. /subscriptions/{subscriptionId}'
+      returned: always
+      type: str
+      sample: null
+    call_count_success:
+      description:
+        - >-
+          Number of successful calls. This includes calls returning
+          HttpStatusCode <= 301 and HttpStatusCode.NotModified and
+          HttpStatusCode.TemporaryRedirect
+      returned: always
+      type: int
+      sample: null
+    call_count_blocked:
+      description:
+        - >-
+          Number of calls blocked due to invalid credentials. This includes
+          calls returning HttpStatusCode.Unauthorized and
+          HttpStatusCode.Forbidden and HttpStatusCode.TooManyRequests
+      returned: always
+      type: int
+      sample: null
+    call_count_failed:
+      description:
+        - >-
+          Number of calls failed due to proxy or backend errors. This includes
+          calls returning HttpStatusCode.BadRequest(400) and any Code between
+          HttpStatusCode.InternalServerError (500) and 600
+      returned: always
+      type: int
+      sample: null
+    call_count_other:
+      description:
+        - Number of other calls.
+      returned: always
+      type: int
+      sample: null
+    call_count_total:
+      description:
+        - Total number of calls.
+      returned: always
+      type: int
+      sample: null
+    bandwidth:
+      description:
+        - Bandwidth consumed.
+      returned: always
+      type: int
+      sample: null
+    cache_hit_count:
+      description:
+        - Number of times when content was served from cache policy.
+      returned: always
+      type: int
+      sample: null
+    cache_miss_count:
+      description:
+        - Number of times content was fetched from backend.
+      returned: always
+      type: int
+      sample: null
+    api_time_avg:
+      description:
+        - >-
+          Average time it took to process request. Averages of merged records
+          are weighted by their call count.
+      returned: always
+      type: float
+      sample: null
+    api_time_min:
+      description:
+        - Minimum time it took to process request.
+      returned: always
+      type: float
+      sample: null
+    api_time_max:
+      description:
+        - Maximum time it took to process request.
+      returned: always
+      type: float
+      sample: null
+    api_time_p50:
+      description:
+        - >-
+          Median time it took to process request, within 5%. Only for
+          aggregated request reports.
+      returned: when I(report_by=request) and I(aggregate)
+      type: float
+      sample: null
+    api_time_p90:
+      description:
+        - 90th percentile of the time it took to process request, within 5%.
+      returned: when I(report_by=request) and I(aggregate)
+      type: float
+      sample: null
+    api_time_p99:
+      description:
+        - 99th percentile of the time it took to process request, within 5%.
+      returned: when I(report_by=request) and I(aggregate)
+      type: float
+      sample: null
+    service_time_avg:
+      description:
+        - Average time it took to process request on backend.
+      returned: always
+      type: float
+      sample: null
+    service_time_min:
+      description:
+        - Minimum time it took to process request on backend.
+      returned: always
+      type: float
+      sample: null
+    service_time_max:
+      description:
+        - Maximum time it took to process request on backend.
+      returned: always
+      type: float
+      sample: null
+    service_time_p50:
+      description:
+        - Median time it took to process request on backend, within 5%.
+      returned: when I(report_by=request) and I(aggregate)
+      type: float
+      sample: null
+    service_time_p90:
+      description:
+        - 90th percentile of the backend time, within 5%.
+      returned: when I(report_by=request) and I(aggregate)
+      type: float
+      sample: null
+    service_time_p99:
+      description:
+        - 99th percentile of the backend time, within 5%.
+      returned: when I(report_by=request) and I(aggregate)
+      type: float
+      sample: null
+shards:
+  description:
+    - Number of time range shards fetched.
+  returned: always
+  type: int
+  sample: 30
 
 '''
 
-import time
-import json
+import math
+import re
+from datetime import datetime, timedelta
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
-from copy import deepcopy
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
 from msrestazure.azure_exceptions import CloudError
 
 
+REPORT_NAMES = dict(api='byApi',
+                    user='byUser',
+                    operation='byOperation',
+                    product='byProduct',
+                    geo='byGeo',
+                    subscription='bySubscription',
+                    time='byTime',
+                    request='byRequest')
+
+# fields identifying the records merged together
+REPORT_KEYS = dict(api=['apiId'],
+                   user=['userId'],
+                   operation=['apiId', 'operationId'],
+                   product=['productId'],
+                   geo=['country', 'region', 'zip'],
+                   subscription=['subscriptionId'],
+                   time=['timestamp'],
+                   request=['apiId', 'operationId'])
+
+SUM_FIELDS = ['callCountSuccess', 'callCountBlocked', 'callCountFailed', 'callCountOther', 'callCountTotal',
+              'bandwidth', 'cacheHitCount', 'cacheMissCount']
+
+TIME_FIELDS = ['apiTime', 'serviceTime']
+
+DURATION_RE = re.compile(r'^P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+(?:\.\d+)?)S)?)?$')
+
+# latency histogram buckets grow by 10%, percentiles are accurate within 5%
+HISTOGRAM_BASE = 1.1
+
+
+def parse_duration(value):
+    match = DURATION_RE.match(value or '')
+    if not match or not any(match.groups()):
+        raise ValueError('{0} is not an ISO 8601 duration in days, hours, minutes and seconds'.format(value))
+    days, hours, minutes, seconds = match.groups()
+    return timedelta(days=int(days or 0), hours=int(hours or 0), minutes=int(minutes or 0), seconds=float(seconds or 0))
+
+
+def parse_time(value):
+    value = value.strip().rstrip('Z')
+    for pattern in ['%Y-%m-%dT%H:%M:%S.%f', '%Y-%m-%dT%H:%M:%S', '%Y-%m-%dT%H:%M', '%Y-%m-%d']:
+        try:
+            return datetime.strptime(value, pattern)
+        except ValueError:
+            pass
+    raise ValueError('{0} is not an ISO 8601 date and time'.format(value))
+
+
+def to_snake(name):
+    return re.sub(r'([a-z0-9])([A-Z])', r'\1_\2', name).lower()
+
+
+class LatencyHistogram(object):
+    '''
+    Mergeable log scale histogram of latencies in milliseconds.
+    '''
+
+    def __init__(self):
+        self.buckets = {}
+        self.count = 0
+
+    def add(self, value):
+        bucket = int(math.floor(math.log(max(value, 1.0), HISTOGRAM_BASE)))
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+        self.count += 1
+
+    def merge(self, other):
+        for bucket, count in other.buckets.items():
+            self.buckets[bucket] = self.buckets.get(bucket, 0) + count
+        self.count += other.count
+
+    def percentile(self, p):
+        if not self.count:
+            return None
+        rank = p / 100.0 * self.count
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                # middle of the bucket
+                return round(HISTOGRAM_BASE ** (bucket + 0.5), 3)
+        return None
+
+
+class ReportAggregate(object):
+    '''
+    Streaming merge of report records by their report dimension. Sums counters,
+    weights averages by call count and keeps minimum and maximum times. Request
+    records are reduced to counters and latency histograms.
+    '''
+
+    def __init__(self, report_by):
+        self.report_by = report_by
+        self.keys = REPORT_KEYS[report_by]
+        self.records = {}
+
+    def add(self, item):
+        key = tuple(item.get(x) for x in self.keys)
+        record = self.records.get(key)
+        if record is None:
+            record = self.records[key] = self.new_record(item)
+        if self.report_by == 'request':
+            self.add_request(record, item)
+        else:
+            self.add_record(record, item)
+
+    def new_record(self, item):
+        record = dict((k, item.get(k)) for k in ['name', 'country', 'region', 'zip', 'userId', 'productId', 'apiId',
+                                                 'operationId', 'apiRegion', 'subscriptionId'] if k in item)
+        if self.report_by == 'time':
+            record['timestamp'] = item.get('timestamp')
+            record['interval'] = item.get('interval')
+        for field in SUM_FIELDS:
+            record[field] = 0
+        for field in TIME_FIELDS:
+            record[field + 'Sum'] = 0.0
+            record[field + 'Min'] = None
+            record[field + 'Max'] = None
+            if self.report_by == 'request':
+                record[field + 'Histogram'] = LatencyHistogram()
+        return record
+
+    def add_record(self, record, item):
+        count = item.get('callCountTotal') or 0
+        for field in SUM_FIELDS:
+            record[field] += item.get(field) or 0
+        for field in TIME_FIELDS:
+            record[field + 'Sum'] += (item.get(field + 'Avg') or 0) * count
+            self.update_range(record, field, item.get(field + 'Min'), item.get(field + 'Max'))
+
+    def add_request(self, record, item):
+        status = item.get('responseCode') or 0
+        record['callCountTotal'] += 1
+        if status <= 301 or status in [304, 307]:
+            record['callCountSuccess'] += 1
+        elif status in [401, 403, 429]:
+            record['callCountBlocked'] += 1
+        elif status == 400 or 500 <= status < 600:
+            record['callCountFailed'] += 1
+        else:
+            record['callCountOther'] += 1
+        record['bandwidth'] += (item.get('requestSize') or 0) + (item.get('responseSize') or 0)
+        if item.get('cache') == 'hit':
+            record['cacheHitCount'] += 1
+        elif item.get('cache') == 'miss':
+            record['cacheMissCount'] += 1
+        for field in TIME_FIELDS:
+            value = item.get(field)
+            if value is None:
+                continue
+            record[field + 'Sum'] += value
+            record[field + 'Histogram'].add(value)
+            self.update_range(record, field, value, value)
+
+    def update_range(self, record, field, low, high):
+        if low is not None and (record[field + 'Min'] is None or low < record[field + 'Min']):
+            record[field + 'Min'] = low
+        if high is not None and (record[field + 'Max'] is None or high > record[field + 'Max']):
+            record[field + 'Max'] = high
+
+    def merge(self, other):
+        for key, source in other.records.items():
+            record = self.records.get(key)
+            if record is None:
+                self.records[key] = source
+                continue
+            for field in SUM_FIELDS:
+                record[field] += source[field]
+            for field in TIME_FIELDS:
+                record[field + 'Sum'] += source[field + 'Sum']
+                self.update_range(record, field, source[field + 'Min'], source[field + 'Max'])
+                if self.report_by == 'request':
+                    record[field + 'Histogram'].merge(source[field + 'Histogram'])
+
+    def results(self):
+        results = []
+        for key in sorted(self.records, key=lambda x: [str(v) for v in x]):
+            record = self.records[key]
+            item = dict((k, v) for k, v in record.items() if not k.startswith(tuple(TIME_FIELDS)))
+            for field in TIME_FIELDS:
+                total = record['callCountTotal']
+                item[field + 'Avg'] = round(record[field + 'Sum'] / total, 3) if total else None
+                item[field + 'Min'] = record[field + 'Min']
+                item[field + 'Max'] = record[field + 'Max']
+                if self.report_by == 'request':
+                    for p in [50, 90, 99]:
+                        item[field + 'P' + str(p)] = record[field + 'Histogram'].percentile(p)
+            results.append(item)
+        return results
+
+
 class AzureRMReportsInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
             resource_group=dict(
                 type='str',
-                required=true
+                required=True
             ),
             name=dict(
                 type='str',
-                required=true
+                required=True,
+                aliases=['service_name']
+            ),
+            report_by=dict(
+                type='str',
+                default='api',
+                choices=list(REPORT_NAMES.keys())
+            ),
+            start_time=dict(
+                type='str',
+                required=True
+            ),
+            end_time=dict(
+                type='str'
             ),
             interval=dict(
-                type='unknown-primary[timeSpan]'
+                type='str'
+            ),
+            shard_interval=dict(
+                type='str',
+                default='P1D'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            aggregate=dict(
+                type='bool',
+                default=True
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
             )
         )
 
         self.resource_group = None
         self.name = None
+        self.report_by = None
+        self.start_time = None
+        self.end_time = None
         self.interval = None
-        self.value = None
-        self.count = None
-        self.next_link = None
+        self.shard_interval = None
+        self.filter = None
+        self.aggregate = None
+        self.max_items = None
+        self.max_concurrency = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -471,6 +672,7 @@ class AzureRMReportsInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMReportsInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -478,250 +680,18 @@ class AzureRMReportsInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
-        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
-                                                    base_url=self._cloud_environment.endpoints.resource_manager)
-
-        if (self.resource_group is not None and
-            self.name is not None):
-            self.results['reports'] = self.format_item(self.listbysubscription())
-        elif (self.resource_group is not None and
-              self.name is not None):
-            self.results['reports'] = self.format_item(self.listbyoperation())
-        elif (self.resource_group is not None and
-              self.name is not None):
-            self.results['reports'] = self.format_item(self.listbyrequest())
-        elif (self.resource_group is not None and
-              self.name is not None):
-            self.results['reports'] = self.format_item(self.listbyproduct())
-        elif (self.resource_group is not None and
-              self.name is not None and
-              self.interval is not None):
-            self.results['reports'] = self.format_item(self.listbytime())
-        elif (self.resource_group is not None and
-              self.name is not None):
-            self.results['reports'] = self.format_item(self.listbyuser())
-        elif (self.resource_group is not None and
-              self.name is not None):
-            self.results['reports'] = self.format_item(self.listbygeo())
-        elif (self.resource_group is not None and
-              self.name is not None):
-            self.results['reports'] = self.format_item(self.listbyapi())
-        return self.results
-
-    def listbysubscription(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
-
-        return results
-
-    def listbyoperation(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
-
-        return results
-
-    def listbyrequest(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
-
-        return results
-
-    def listbyproduct(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
-
-        return results
-
-    def listbytime(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
+        if self.report_by == 'time' and not self.interval:
+            self.fail('interval is required when report_by is time')
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
+            shards = self.get_shards()
+        except ValueError as e:
+            self.fail(str(e))
 
-        return results
-
-    def listbyuser(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
-
-        return results
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
-    def listbygeo(self):
-        response = None
-        results = {}
-        # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
                     '/resourceGroups' +
@@ -734,62 +704,80 @@ class AzureRMReportsInfo(AzureRMModuleBase):
                     '/{{ report_name }}')
         self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
+        self.url = self.url.replace('{{ service_name }}', self.name)
+        self.url = self.url.replace('{{ report_name }}', REPORT_NAMES[self.report_by])
+        if self.interval:
+            self.query_parameters['interval'] = self.interval
 
-        try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
-        except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
+        self.results['shards'] = len(shards)
+        self.results['reports'] = [self.format_item(x) for x in self.list_report(shards)]
+        return self.results
 
+    def get_shards(self):
+        '''
+        Split the time range into (start, end) shards, aligned with the report interval for time reports.
+        '''
+        start = parse_time(self.start_time)
+        end = parse_time(self.end_time) if self.end_time else datetime.utcnow()
+        if end <= start:
+            raise ValueError('end_time must be later than start_time')
+        length = parse_duration(self.shard_interval)
+        if self.interval:
+            interval = parse_duration(self.interval)
+            length = interval * max(1, int(math.ceil(length.total_seconds() / interval.total_seconds())))
+        shards = []
+        while start < end:
+            shards.append((start, min(start + length, end)))
+            start += length
+        return shards
+
+    def list_report(self, shards):
+        if self.aggregate:
+            merged = ReportAggregate(self.report_by)
+            for aggregate, error in run_concurrently(self.aggregate_shard, shards, self.max_concurrency):
+                if error is not None:
+                    self.fail('Error getting the {0} report: {1}'.format(REPORT_NAMES[self.report_by], str(error)))
+                merged.merge(aggregate)
+            return merged.results()
+
+        results = []
+        for records, error in run_concurrently(self.list_shard, shards, self.max_concurrency):
+            if error is not None:
+                self.fail('Error getting the {0} report: {1}'.format(REPORT_NAMES[self.report_by], str(error)))
+            results.extend(records[:None if self.max_items is None else self.max_items - len(results)])
         return results
 
-    def listbyapi(self):
-        response = None
-        results = {}
-        # prepare url
-        self.url = ('/subscriptions' +
-                    '/{{ subscription_id }}' +
-                    '/resourceGroups' +
-                    '/{{ resource_group }}' +
-                    '/providers' +
-                    '/Microsoft.ApiManagement' +
-                    '/service' +
-                    '/{{ service_name }}' +
-                    '/reports' +
-                    '/{{ report_name }}')
-        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
-        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
-        self.url = self.url.replace('{{ service_name }}', self.service_name)
-        self.url = self.url.replace('{{ report_name }}', self.name)
-
+    def aggregate_shard(self, shard):
+        aggregate = ReportAggregate(self.report_by)
+        for item in self.iter_shard(shard):
+            aggregate.add(item)
+        return aggregate
+
+    def list_shard(self, shard):
+        return list(self.iter_shard(shard, self.max_items))
+
+    def iter_shard(self, shard, max_items=None):
+        # timestamp bounds are inclusive, end the shard just before the next one starts
+        time_filter = "timestamp ge datetime'{0}' and timestamp le datetime'{1}'".format(
+            shard[0].strftime('%Y-%m-%dT%H:%M:%S'),
+            (shard[1] - timedelta(milliseconds=1)).strftime('%Y-%m-%dT%H:%M:%S.%f')[:-3])
+        query_parameters = dict(self.query_parameters)
+        query_parameters['$filter'] = time_filter + (' and ' + self.filter if self.filter else '')
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results['temp_item'] = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   query_parameters,
+                                   dict(self.header_parameters),
+                                   self.status_code,
+                                   max_items):
+                yield item
         except CloudError as e:
-            self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
-
-        return results
+            # no data for the range
+            if e.status_code != 404:
+                raise
 
-    def format_item(item):
-        return item
+    def format_item(self, item):
+        return dict((to_snake(k), v) for k, v in item.items())
 
 
 def main():
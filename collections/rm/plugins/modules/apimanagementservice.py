@@ -353,6 +353,33 @@ options:
     choices:
       - absent
       - present
+  wait:
+    description:
+      - >-
+        Wait for creation, update or deletion of the service to complete,
+        which may take 30 to 60 minutes.
+      - >-
+        With C(false) the module returns as soon as the operation is accepted,
+        with a handle in I(operation) which can be polled with
+        M(apimanagementservice_operation_info).
+    type: bool
+    default: true
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for creation, update or deletion of
+        the service to complete with I(wait).
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
   - azure_tags
@@ -385,6 +412,24 @@ EXAMPLES = '''
     resource_group: myResourceGroup
     name: myService
     state: absent
+- name: Start creating gateways in several regions
+  azure.rm.apimanagementservice:
+    resource_group: myResourceGroup
+    name: "myService-{{ item }}"
+    location: "{{ item }}"
+    publisher_email: apim@autorestsdk.com
+    publisher_name: autorestsdk
+    sku_name: Premium
+    wait: false
+  loop:
+    - westeurope
+    - eastus
+  register: gateways
+- name: Wait for all gateways
+  azure.rm.apimanagementservice_operation_info:
+    operations: "{{ gateways.results | map(attribute='operation') | select | list }}"
+    wait: true
+    polling_timeout: 3600
 '''
 
 RETURN = '''
@@ -394,13 +439,28 @@ id:
   returned: always
   type: str
   sample: null
+operation:
+  description:
+    - >-
+      Handle of the operation started on the service, to be polled with
+      M(apimanagementservice_operation_info).
+      Null when I(wait) is true or no operation was started because the
+      service is unchanged.
+  returned: always
+  type: str
+  sample: eyJhcGlfdmVyc2lvbiI6ICIyMDE5LTAxLTAxIiwgImtpbmQiOiAiYXN5bmMiLCAuLi59
 '''
 
-import time
 import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import (AsyncOperationPoller, AsyncOperationError, TERMINAL_STATES,
+                                                                            operation_handle)
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -670,15 +730,31 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            wait=dict(
+                type='bool',
+                default=True
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
         self.resource_group = None
         self.name = None
 
-        self.results = dict(changed=False)
+        self.results = dict(changed=False, operation=None)
         self.mgmt_client = None
         self.state = None
+        self.wait = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -689,6 +765,7 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMApiManagementService, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                           supports_check_mode=True,
                                                           supports_tags=True)
@@ -707,6 +784,9 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
@@ -769,11 +849,6 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ApiManagementService instance unchanged')
             self.results['changed'] = False
@@ -790,15 +865,29 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
-                                              600,
-                                              30)
+                                              0,
+                                              0)
         except CloudError as exc:
             self.log('Error attempting to create the ApiManagementService instance.')
             self.fail('Error creating the ApiManagementService instance: {0}'.format(str(exc)))
 
+        if not self.wait:
+            self.results['operation'] = operation_handle(response, self.url, 'PUT', self.query_parameters['api-version'])
+        else:
+            poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+            try:
+                poller.wait(response)
+                # the operation status doesn't carry the service, read it back once it settled
+                return poller.wait_for(self.url,
+                                       self.query_parameters,
+                                       lambda x: ((x.get('properties') or {}).get('provisioningState') or
+                                                  'Succeeded').lower() in TERMINAL_STATES)
+            except (CloudError, AsyncOperationError) as e:
+                self.fail('Error waiting for creation or update of the ApiManagementService instance: {0}'.format(str(e)))
+
         try:
             response = json.loads(response.text)
         except Exception:
@@ -813,29 +902,37 @@ class AzureRMApiManagementService(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ApiManagementService instance.')
             self.fail('Error deleting the ApiManagementService instance: {0}'.format(str(e)))
 
+        if not self.wait:
+            self.results['operation'] = operation_handle(response, self.url, 'DELETE', self.query_parameters['api-version'])
+            return True
+
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ApiManagementService instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ApiManagementService instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ApiManagementService instance : {0} found".format(response.name))
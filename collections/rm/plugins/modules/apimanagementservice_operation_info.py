@@ -0,0 +1,256 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: apimanagementservice_operation_info
+version_added: '2.9'
+short_description: Get state of ApiManagementService operations.
+description:
+  - >-
+    Get the state of long running operations started by
+    M(apimanagementservice) with I(wait=false).
+options:
+  operations:
+    description:
+      - Operation handles returned by M(apimanagementservice) in I(operation).
+      - >-
+        Empty handles, returned for services which were not changed, are
+        ignored.
+    required: true
+    type: list
+  wait:
+    description:
+      - >-
+        Wait until all operations completed or I(polling_timeout) expired,
+        instead of querying their state once.
+    type: bool
+    default: false
+  polling_timeout:
+    description:
+      - Maximum time in seconds to wait for the operations with I(wait).
+    type: int
+    default: 600
+  max_concurrency:
+    description:
+      - Maximum number of operations polled in parallel.
+    type: int
+    default: 8
+extends_documentation_fragment:
+  - azure
+author:
+  - Zim Kalinowski (@zikalino)
+
+'''
+
+EXAMPLES = '''
+- name: Check a service operation once
+  azure.rm.apimanagementservice_operation_info:
+    operations:
+      - "{{ service.operation }}"
+  register: result
+  until: result.done
+  retries: 60
+  delay: 60
+- name: Wait for many service operations
+  azure.rm.apimanagementservice_operation_info:
+    operations: "{{ gateways.results | map(attribute='operation') | select | list }}"
+    wait: true
+    polling_timeout: 3600
+
+'''
+
+RETURN = '''
+done:
+  description:
+    - Whether all operations reached a terminal state.
+  returned: always
+  type: bool
+  sample: false
+summary:
+  description:
+    - Number of operations per status.
+  returned: always
+  type: dict
+  sample: {"Succeeded": 10, "InProgress": 2}
+operations:
+  description:
+    - >-
+      State of every operation, in the order of the C(operations) option,
+      without the empty handles.
+  returned: always
+  type: complex
+  contains:
+    operation:
+      description:
+        - The operation handle.
+      returned: always
+      type: str
+      sample: null
+    id:
+      description:
+        - Resource ID of the service.
+      returned: always
+      type: str
+      sample: null
+    method:
+      description:
+        - C(PUT) for creation and update, C(DELETE) for deletion.
+      returned: always
+      type: str
+      sample: PUT
+    status:
+      description:
+        - C(Succeeded), C(Failed), C(Canceled) or C(InProgress).
+      returned: always
+      type: str
+      sample: InProgress
+    done:
+      description:
+        - Whether the operation reached a terminal state.
+      returned: always
+      type: bool
+      sample: false
+    elapsed:
+      description:
+        - Seconds since the operation was started.
+      returned: always
+      type: int
+      sample: 1260
+    error:
+      description:
+        - >-
+          Error reported for a failed operation, or raised while polling it.
+          Operations which can't be polled, for example because their url
+          returns 403 or 404, are reported as C(Failed).
+      returned: when available
+      type: str
+      sample: null
+
+'''
+
+import time
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import (AsyncOperationPoller, AsyncOperationTimeout,
+                                                                            TERMINAL_STATES, parse_operation_handle)
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+from msrestazure.azure_exceptions import CloudError
+
+
+# errors after which polling an operation again may succeed
+TRANSIENT_STATUS_CODES = [None, 408, 429, 500, 502, 503, 504]
+
+
+class AzureRMApiManagementServiceOperationInfo(AzureRMModuleBase):
+    def __init__(self):
+        self.module_arg_spec = dict(
+            operations=dict(
+                type='list',
+                required=True
+            ),
+            wait=dict(
+                type='bool',
+                default=False
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
+            )
+        )
+
+        self.operations = None
+        self.wait = None
+        self.polling_timeout = None
+        self.max_concurrency = None
+
+        self.results = dict(changed=False)
+        self.mgmt_client = None
+
+        self.header_parameters = {}
+        self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        install_token_cache()
+        super(AzureRMApiManagementServiceOperationInfo, self).__init__(self.module_arg_spec, supports_tags=True)
+
+    def exec_module(self, **kwargs):
+
+        for key in self.module_arg_spec:
+            setattr(self, key, kwargs[key])
+
+        self.operations = [x for x in self.operations if x]
+        operations = []
+        for handle in self.operations:
+            try:
+                operations.append(parse_operation_handle(handle))
+            except ValueError as e:
+                self.fail('{0}: {1}'.format(str(e), handle))
+
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+
+        self.results['operations'] = []
+        self.results['summary'] = {}
+        for handle, operation, outcome in zip(self.operations,
+                                              operations,
+                                              run_concurrently(self.get_status, operations, self.max_concurrency)):
+            status, error = outcome[0] if outcome[1] is None else self.error_status(outcome[1])
+            item = dict(operation=handle,
+                        id=operation['resource'],
+                        method=operation['method'],
+                        status=status,
+                        done=status.lower() in TERMINAL_STATES,
+                        elapsed=int(time.time()) - operation.get('started', int(time.time())))
+            if error:
+                item['error'] = error
+            self.results['operations'].append(item)
+            self.results['summary'][status] = self.results['summary'].get(status, 0) + 1
+        self.results['done'] = all(x['done'] for x in self.results['operations'])
+        return self.results
+
+    def error_status(self, error):
+        '''
+        Status of an operation which could not be polled. Transient errors leave it
+        InProgress, so it is polled again, anything else is permanent and Failed.
+        '''
+        if isinstance(error, CloudError) and error.status_code in TRANSIENT_STATUS_CODES:
+            return 'InProgress', str(error)
+        return 'Failed', str(error)
+
+    def get_status(self, operation):
+        poller = AsyncOperationPoller(self.mgmt_client, dict(self.header_parameters), self.polling_timeout)
+        if not self.wait:
+            return poller.check(operation)
+        try:
+            return poller.wait_operation(operation)
+        except AsyncOperationTimeout:
+            return 'InProgress', None
+
+
+def main():
+    AzureRMApiManagementServiceOperationInfo()
+
+
+if __name__ == '__main__':
+    main()
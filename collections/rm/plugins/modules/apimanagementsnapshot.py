@@ -0,0 +1,489 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: apimanagementsnapshot
+version_added: '2.9'
+short_description: Snapshot the configuration of an API Management service.
+description:
+  - >-
+    Read all entities of an API Management service and write them to a
+    content addressed snapshot on the controller, for drift detection and
+    disaster recovery.
+  - >-
+    Collections are listed with paging, independent requests are sent in
+    parallel. Every entity body is stored once under its sha256 in
+    C(objects), and every snapshot is a manifest in C(snapshots) mapping
+    entity paths to hashes. C(LATEST) names the newest manifest.
+  - >-
+    Following runs compare against the latest snapshot. Policies are read with
+    If-None-Match and the ETag recorded in it, so unchanged policies are not
+    downloaded again. Only new bodies are written, and a new manifest is only
+    written when something changed.
+  - >-
+    The list operations of API Management support neither ETags nor a
+    filter on modification time, so every collection of the selected
+    I(families) is listed in full on every run, only policy downloads are
+    skipped. Use I(families) to limit what is read again.
+options:
+  resource_group:
+    description:
+      - The name of the resource group.
+    required: true
+    type: str
+  service_name:
+    description:
+      - The name of the API Management service.
+    required: true
+    type: str
+  dest:
+    description:
+      - >-
+        Directory of the snapshot store, created with mode 0700 when missing.
+        Entity bodies may contain secrets, all files are created with mode
+        0600.
+    required: true
+    type: path
+  families:
+    description:
+      - >-
+        Entity families to snapshot. Entries of other families are carried
+        over from the latest snapshot unchanged.
+    type: list
+    default:
+      - apis
+      - operations
+      - policies
+      - products
+      - groups
+      - users
+      - named_values
+      - backends
+      - loggers
+      - diagnostics
+      - templates
+      - tags
+  max_concurrency:
+    description:
+      - Maximum number of requests sent in parallel.
+    type: int
+    default: 8
+extends_documentation_fragment:
+  - azure
+author:
+  - Zim Kalinowski (@zikalino)
+
+'''
+
+EXAMPLES = '''
+- name: Snapshot an API Management service
+  azure.rm.apimanagementsnapshot:
+    resource_group: myResourceGroup
+    service_name: myService
+    dest: /backup/myService
+  register: snapshot
+- name: Report drift
+  debug:
+    var: snapshot.summary
+  when: snapshot.changed
+
+'''
+
+RETURN = '''
+snapshot:
+  description:
+    - Path of the manifest describing the current state.
+  returned: always
+  type: str
+  sample: /backup/myService/snapshots/20191018T020000Z-3f2a9c1be0d4.json
+previous:
+  description:
+    - Path of the manifest the state was compared with.
+  returned: when a previous snapshot exists
+  type: str
+  sample: /backup/myService/snapshots/20191017T020000Z-91c0e7a25b6f.json
+summary:
+  description:
+    - >-
+      Number of added, modified, removed and unchanged entities compared with
+      the previous snapshot, number of policies not downloaded as they were
+      not modified, and number of new objects written.
+  returned: always
+  type: dict
+  sample: {"added": 1, "modified": 2, "removed": 0, "unchanged": 5210, "not_modified": 1803, "objects_written": 3}
+added:
+  description:
+    - Paths of entities which are not in the previous snapshot.
+  returned: always
+  type: list
+  sample: ["/apis/echo-api/operations/get-item"]
+modified:
+  description:
+    - Paths of entities which differ from the previous snapshot.
+  returned: always
+  type: list
+  sample: ["/apis/echo-api/policies/policy"]
+removed:
+  description:
+    - Paths of entities of the snapshotted families which no longer exist.
+  returned: always
+  type: list
+  sample: []
+elapsed:
+  description:
+    - Time in seconds spent reading the service and writing the snapshot.
+  returned: always
+  type: float
+  sample: 412.7
+
+'''
+
+import hashlib
+import json
+import os
+import time
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import get_header
+from msrestazure.azure_exceptions import CloudError
+
+
+# service level collections and the family of their entities
+COLLECTIONS = dict(
+    apis='/apis',
+    products='/products',
+    groups='/groups',
+    users='/users',
+    named_values='/properties',
+    backends='/backends',
+    loggers='/loggers',
+    diagnostics='/diagnostics',
+    templates='/templates',
+    tags='/tags'
+)
+FAMILIES = ['apis', 'operations', 'policies', 'products', 'groups', 'users', 'named_values',
+            'backends', 'loggers', 'diagnostics', 'templates', 'tags']
+
+
+def entity_family(path):
+    '''
+    Family of an entity from its path relative to the service, e.g. /apis/a/operations/o.
+    '''
+    if path.endswith('/policies/policy'):
+        return 'policies'
+    if path.startswith('/apis/') and '/operations/' in path:
+        return 'operations'
+    collection = '/' + path.split('/')[1]
+    for family, family_collection in COLLECTIONS.items():
+        if family_collection == collection:
+            return family
+    return None
+
+
+def body_hash(body):
+    return hashlib.sha256(json.dumps(body, sort_keys=True, separators=(',', ':')).encode('utf-8')).hexdigest()
+
+
+class SnapshotStore(object):
+    '''
+    Content addressed store of entity bodies, plus one manifest per snapshot.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self.objects_written = 0
+
+    def ensure_dirs(self):
+        for directory in [self.path, os.path.join(self.path, 'objects'), os.path.join(self.path, 'snapshots')]:
+            if not os.path.isdir(directory):
+                os.makedirs(directory, 0o700)
+
+    def latest(self):
+        '''
+        Return (path, manifest) of the latest snapshot, or (None, None).
+        '''
+        try:
+            with open(os.path.join(self.path, 'LATEST')) as f:
+                path = os.path.join(self.path, 'snapshots', f.read().strip())
+            with open(path) as f:
+                return path, json.load(f)
+        except (IOError, OSError, ValueError):
+            return None, None
+
+    def put_object(self, digest, body):
+        directory = os.path.join(self.path, 'objects', digest[:2])
+        file_name = os.path.join(directory, digest + '.json')
+        if os.path.exists(file_name):
+            return
+        if not os.path.isdir(directory):
+            try:
+                os.makedirs(directory, 0o700)
+            except OSError:
+                # created by another worker meanwhile
+                if not os.path.isdir(directory):
+                    raise
+        self._write(file_name, body)
+        self.objects_written += 1
+
+    def put_manifest(self, manifest):
+        name = '{0}-{1}.json'.format(time.strftime('%Y%m%dT%H%M%SZ', time.gmtime(manifest['created'])),
+                                     body_hash(manifest['entities'])[:12])
+        path = os.path.join(self.path, 'snapshots', name)
+        self._write(path, manifest)
+        self._write(os.path.join(self.path, 'LATEST'), name, raw=True)
+        return path
+
+    def _write(self, file_name, data, raw=False):
+        temp_name = '{0}.{1}.tmp'.format(file_name, os.getpid())
+        fd = os.open(temp_name, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+        with os.fdopen(fd, 'w') as f:
+            if raw:
+                f.write(data)
+            else:
+                json.dump(data, f, sort_keys=True)
+        os.rename(temp_name, file_name)
+
+
+class AzureRMApiManagementSnapshot(AzureRMModuleBase):
+    def __init__(self):
+        self.module_arg_spec = dict(
+            resource_group=dict(
+                type='str',
+                required=True
+            ),
+            service_name=dict(
+                type='str',
+                required=True
+            ),
+            dest=dict(
+                type='path',
+                required=True
+            ),
+            families=dict(
+                type='list',
+                elements='str',
+                choices=FAMILIES,
+                default=FAMILIES
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
+            )
+        )
+
+        self.resource_group = None
+        self.service_name = None
+        self.dest = None
+        self.families = None
+        self.max_concurrency = None
+
+        self.results = dict(changed=False)
+        self.mgmt_client = None
+        self.url = None
+        self.previous_entities = {}
+        self.entities = {}
+        self.bodies = {}
+        self.not_modified = 0
+
+        self.query_parameters = {}
+        self.query_parameters['api-version'] = '2019-01-01'
+        self.header_parameters = {}
+        self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        install_token_cache()
+        super(AzureRMApiManagementSnapshot, self).__init__(derived_arg_spec=self.module_arg_spec,
+                                                           supports_check_mode=True,
+                                                           supports_tags=False)
+
+    def exec_module(self, **kwargs):
+        for key in list(self.module_arg_spec.keys()):
+            setattr(self, key, kwargs[key])
+
+        started = time.time()
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+
+        self.url = ('/subscriptions' +
+                    '/{{ subscription_id }}' +
+                    '/resourceGroups' +
+                    '/{{ resource_group }}' +
+                    '/providers' +
+                    '/Microsoft.ApiManagement' +
+                    '/service' +
+                    '/{{ service_name }}')
+        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
+        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
+        self.url = self.url.replace('{{ service_name }}', self.service_name)
+
+        store = SnapshotStore(self.dest)
+        previous_path, previous = store.latest()
+        self.previous_entities = (previous or {}).get('entities', {})
+
+        self.read_entities()
+
+        # entries of families which weren't read are carried over
+        for path, entry in self.previous_entities.items():
+            if entity_family(path) not in self.families:
+                self.entities[path] = entry
+
+        added = sorted(x for x in self.entities if x not in self.previous_entities)
+        modified = sorted(x for x in self.entities
+                          if x in self.previous_entities and self.entities[x]['hash'] != self.previous_entities[x]['hash'])
+        removed = sorted(x for x in self.previous_entities if x not in self.entities)
+
+        self.results['changed'] = previous is None or len(added) + len(modified) + len(removed) > 0
+        self.results['snapshot'] = previous_path
+        if previous_path is not None:
+            self.results['previous'] = previous_path
+        if self.results['changed'] and not self.check_mode:
+            try:
+                store.ensure_dirs()
+                for path in self.bodies:
+                    store.put_object(self.entities[path]['hash'], self.bodies[path])
+                self.results['snapshot'] = store.put_manifest(dict(service=self.url,
+                                                                   created=int(time.time()),
+                                                                   entities=self.entities))
+            except (IOError, OSError) as e:
+                self.fail('Error writing snapshot to {0}: {1}'.format(self.dest, str(e)))
+
+        self.results['added'] = added
+        self.results['modified'] = modified
+        self.results['removed'] = removed
+        self.results['summary'] = dict(added=len(added),
+                                       modified=len(modified),
+                                       removed=len(removed),
+                                       unchanged=len(self.entities) - len(added) - len(modified),
+                                       not_modified=self.not_modified,
+                                       objects_written=store.objects_written)
+        self.results['elapsed'] = round(time.time() - started, 3)
+        return self.results
+
+    def read_entities(self):
+        '''
+        Read the selected families level by level: service collections and the
+        service policy first, then operations and policies of APIs and products,
+        then operation policies.
+        '''
+        families = set(self.families)
+        collections = [x for family, x in COLLECTIONS.items() if family in families]
+        if families & set(['operations', 'policies']) and '/apis' not in collections:
+            collections.append('/apis')
+        if 'policies' in families and '/products' not in collections:
+            collections.append('/products')
+        tasks = [('list', x) for x in collections]
+        if 'policies' in families:
+            tasks.append(('policy', '/policies/policy'))
+        listed = self.run_tasks(tasks)
+
+        api_ids = [x['name'] for x in listed.get('/apis', [])]
+        product_ids = [x['name'] for x in listed.get('/products', [])]
+        tasks = []
+        if families & set(['operations', 'policies']):
+            tasks.extend(('list', '/apis/{0}/operations'.format(x)) for x in api_ids)
+        if 'policies' in families:
+            tasks.extend(('policy', '/apis/{0}/policies/policy'.format(x)) for x in api_ids)
+            tasks.extend(('policy', '/products/{0}/policies/policy'.format(x)) for x in product_ids)
+        listed = self.run_tasks(tasks)
+
+        if 'policies' in families:
+            tasks = []
+            for api_id in api_ids:
+                for operation in listed.get('/apis/{0}/operations'.format(api_id), []):
+                    tasks.append(('policy', '/apis/{0}/operations/{1}/policies/policy'.format(api_id, operation['name'])))
+            self.run_tasks(tasks)
+
+    def run_tasks(self, tasks):
+        '''
+        Run list and policy reads in parallel and record the entities they return.
+        Returns the items of every listed collection keyed by collection path.
+        '''
+        listed = {}
+        for task, outcome in zip(tasks, run_concurrently(self.run_task, tasks, self.max_concurrency)):
+            kind, path = task
+            if outcome[1] is not None:
+                self.fail('Error reading {0}: {1}'.format(path, str(outcome[1])))
+            if kind == 'list':
+                listed[path] = outcome[0]
+                for item in outcome[0]:
+                    self.add_entity(path + '/' + item['name'], item)
+            elif outcome[0] is not None:
+                body, etag = outcome[0]
+                if body is None:
+                    self.not_modified += 1
+                    self.entities[path] = self.previous_entities[path]
+                else:
+                    self.add_entity(path, body, etag)
+        return listed
+
+    def run_task(self, task):
+        kind, path = task
+        if kind == 'list':
+            return list(iter_pages(self.mgmt_client,
+                                   self.url + path,
+                                   self.query_parameters,
+                                   dict(self.header_parameters),
+                                   [200]))
+        return self.get_policy(path)
+
+    def get_policy(self, path):
+        '''
+        GET a policy, conditionally on the ETag of the previous snapshot.
+        Returns (body, etag), (None, None) when not modified, or None when there is no policy.
+        '''
+        headers = dict(self.header_parameters)
+        previous = self.previous_entities.get(path) or {}
+        if previous.get('etag'):
+            headers['If-None-Match'] = previous['etag']
+        try:
+            response = self.mgmt_client.query(self.url + path,
+                                              'GET',
+                                              self.query_parameters,
+                                              headers,
+                                              None,
+                                              [200, 304],
+                                              0,
+                                              0)
+        except CloudError as e:
+            if e.status_code == 404:
+                return None
+            raise
+        if response.status_code == 304:
+            return None, None
+        return json.loads(response.text), get_header(response, 'ETag')
+
+    def add_entity(self, path, body, etag=None):
+        if entity_family(path) not in self.families:
+            return
+        entry = dict(hash=body_hash(body))
+        if etag:
+            entry['etag'] = etag
+        self.entities[path] = entry
+        self.bodies[path] = body
+
+
+def main():
+    AzureRMApiManagementSnapshot()
+
+
+if __name__ == '__main__':
+    main()
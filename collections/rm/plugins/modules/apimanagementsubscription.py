@@ -37,7 +37,7 @@ options:
       - >-
         Subscription entity Identifier. The entity represents the association
         between a user and a product in API Management.
-    required: true
+      - Required unless I(rotate_keys) is set.
     type: str
   owner_id:
     description:
@@ -53,7 +53,7 @@ options:
   display_name:
     description:
       - Subscription name.
-    required: true
+      - Required unless I(rotate_keys) is set.
     type: str
   primary_key:
     description:
@@ -132,6 +132,80 @@ options:
         email notification for change of state of subscription <br> - If true,
         send email notification of change of state of subscription 
     type: boolean
+  rotate_keys:
+    description:
+      - >-
+        Regenerate the given keys of all subscriptions selected by
+        I(product_id), I(user_id) and I(filter) instead of managing a single
+        subscription.
+      - >-
+        The new keys are not returned, they are written as they are read to
+        the encrypted I(keys_file).
+    choices:
+      - primary
+      - secondary
+      - both
+    type: str
+  product_id:
+    description:
+      - With I(rotate_keys), only rotate subscriptions of this product.
+      - Mutually exclusive with I(user_id).
+    type: str
+  user_id:
+    description:
+      - With I(rotate_keys), only rotate subscriptions of this user.
+    type: str
+  filter:
+    description:
+      - >-
+        With I(rotate_keys), OData filter selecting the subscriptions, e.g.
+        C(properties/state eq 'active').
+    type: str
+  keys_file:
+    description:
+      - >-
+        File receiving one encrypted record per rotated subscription, with
+        its id, name, scope, owner and new keys. Created with mode 0600.
+      - >-
+        The first line is a JSON header with the PBKDF2-HMAC-SHA256 salt and
+        iterations, every other line a Fernet token of a JSON record.
+      - Required with I(rotate_keys).
+    type: path
+  keys_passphrase:
+    description:
+      - Passphrase the key of I(keys_file) is derived from.
+      - Required with I(rotate_keys).
+    type: str
+  max_concurrency:
+    description:
+      - Maximum number of subscriptions rotated in parallel.
+    type: int
+    default: 8
+  rotation_rate:
+    description:
+      - >-
+        Maximum number of keys regenerated per second, shared by all tasks
+        rotating keys of the same API Management service on the controller.
+    type: float
+    default: 10
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
+requirements:
+  - cryptography, with I(rotate_keys)
 extends_documentation_fragment:
   - azure
 author:
@@ -167,9 +241,55 @@ EXAMPLES = '''
     sid: testsub
     state: absent
 
+- name: Rotate primary keys of all active subscriptions of a product
+  azure.rm.apimanagementsubscription:
+    resource_group: myResourceGroup
+    service_name: myService
+    rotate_keys: primary
+    product_id: myProduct
+    filter: "properties/state eq 'active'"
+    keys_file: /secure/rotated-keys.enc
+    keys_passphrase: "{{ rotation_passphrase }}"
+
 '''
 
 RETURN = '''
+rotation:
+  description:
+    - Outcome of I(rotate_keys). The keys themselves are only in I(keys_file).
+  returned: when rotate_keys is set
+  type: complex
+  contains:
+    selected:
+      description:
+        - Number of subscriptions selected for rotation.
+      returned: always
+      type: int
+      sample: 2500
+    rotated:
+      description:
+        - Number of subscriptions with rotated keys written to I(keys_file).
+      returned: always
+      type: int
+      sample: 2499
+    failed:
+      description:
+        - Subscriptions which failed, with the error.
+      returned: always
+      type: list
+      sample: [{"name": "sub1", "error": "..."}]
+    keys_file:
+      description:
+        - Path of the encrypted keys file.
+      returned: always
+      type: str
+      sample: /secure/rotated-keys.enc
+    elapsed:
+      description:
+        - Time in seconds spent listing and rotating.
+      returned: always
+      type: float
+      sample: 260.4
 id:
   description:
     - Resource ID.
@@ -312,6 +432,15 @@ import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import FileTokenBucket
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_secret_file import SecretRecordWriter, HAS_CRYPTOGRAPHY
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -341,8 +470,7 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
             ),
             sid=dict(
                 type='str',
-                updatable=False,
-                required=True
+                updatable=False
             ),
             owner_id=dict(
                 type='str',
@@ -354,8 +482,7 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
             ),
             display_name=dict(
                 type='str',
-                disposition='/properties/displayName',
-                required=True
+                disposition='/properties/displayName'
             ),
             primary_key=dict(
                 type='str',
@@ -387,16 +514,63 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            rotate_keys=dict(
+                type='str',
+                choices=['primary', 'secondary', 'both']
+            ),
+            product_id=dict(
+                type='str'
+            ),
+            user_id=dict(
+                type='str'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            keys_file=dict(
+                type='path'
+            ),
+            keys_passphrase=dict(
+                type='str',
+                no_log=True
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
+            ),
+            rotation_rate=dict(
+                type='float',
+                default=10
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
         self.resource_group = None
         self.service_name = None
         self.sid = None
+        self.rotate_keys = None
+        self.product_id = None
+        self.user_id = None
+        self.filter = None
+        self.keys_file = None
+        self.keys_passphrase = None
+        self.max_concurrency = None
+        self.rotation_rate = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -407,9 +581,14 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMSubscription, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                   supports_check_mode=True,
-                                                  supports_tags=True)
+                                                  supports_tags=True,
+                                                  mutually_exclusive=[['rotate_keys', 'sid'],
+                                                                      ['product_id', 'user_id']],
+                                                  required_if=[['rotate_keys', x, ['keys_file', 'keys_passphrase']]
+                                                               for x in ['primary', 'secondary', 'both']])
 
     def exec_module(self, **kwargs):
         for key in list(self.module_arg_spec.keys()):
@@ -426,9 +605,19 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
+        if self.rotate_keys:
+            return self.rotate_subscription_keys()
+
+        missing = [key for key in ['sid', 'display_name'] if kwargs[key] is None]
+        if missing:
+            self.fail('missing required arguments: {0}'.format(', '.join(missing)))
+
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
                     '/resourceGroups' +
@@ -489,11 +678,6 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('Subscription instance unchanged')
             self.results['changed'] = False
@@ -507,6 +691,106 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
 
         return self.results
 
+    def rotate_subscription_keys(self):
+        '''
+        Regenerate the keys of all selected subscriptions in parallel, within 'rotation_rate',
+        and stream the new keys to the encrypted 'keys_file' instead of the module result.
+        '''
+        if not HAS_CRYPTOGRAPHY:
+            self.fail('cryptography is required to write keys_file')
+        started = time.time()
+
+        self.url = ('/subscriptions' +
+                    '/{{ subscription_id }}' +
+                    '/resourceGroups' +
+                    '/{{ resource_group }}' +
+                    '/providers' +
+                    '/Microsoft.ApiManagement' +
+                    '/service' +
+                    '/{{ service_name }}')
+        self.url = self.url.replace('{{ subscription_id }}', self.subscription_id)
+        self.url = self.url.replace('{{ resource_group }}', self.resource_group)
+        self.url = self.url.replace('{{ service_name }}', self.service_name)
+
+        list_url = self.url
+        if self.product_id:
+            list_url += '/products/' + self.product_id
+        elif self.user_id:
+            list_url += '/users/' + self.user_id
+        list_url += '/subscriptions'
+        query_parameters = dict(self.query_parameters)
+        if self.filter:
+            query_parameters['$filter'] = self.filter
+
+        # only names are kept, listed bodies include the current keys
+        names = []
+        try:
+            for item in iter_pages(self.mgmt_client, list_url, query_parameters, dict(self.header_parameters), [200]):
+                names.append(item['name'])
+        except CloudError as e:
+            self.fail('Error listing subscriptions: {0}'.format(str(e)))
+
+        self.results['rotation'] = dict(selected=len(names),
+                                        rotated=0,
+                                        failed=[],
+                                        keys_file=self.keys_file)
+        self.results['changed'] = len(names) > 0
+        if self.check_mode or not names:
+            self.results['rotation']['elapsed'] = round(time.time() - started, 3)
+            return self.results
+
+        keys = ['primary', 'secondary'] if self.rotate_keys == 'both' else [self.rotate_keys]
+        bucket = FileTokenBucket('apim_key_rotation_' + self.service_name.lower(), self.rotation_rate, self.rotation_rate)
+
+        def rotate(name):
+            url = self.url + '/subscriptions/' + name
+            for key in keys:
+                bucket.acquire()
+                self.mgmt_client.query(url + '/regenerate' + key.capitalize() + 'Key',
+                                       'POST',
+                                       self.query_parameters,
+                                       dict(self.header_parameters),
+                                       None,
+                                       [200, 204],
+                                       0,
+                                       0)
+            response = self.mgmt_client.query(url,
+                                              'GET',
+                                              self.query_parameters,
+                                              dict(self.header_parameters),
+                                              None,
+                                              [200],
+                                              0,
+                                              0)
+            subscription = json.loads(response.text)
+            properties = subscription.get('properties', {})
+            record = dict(id=subscription.get('id'),
+                          name=name,
+                          scope=properties.get('scope'),
+                          owner_id=properties.get('ownerId'),
+                          rotated=keys,
+                          rotated_at=time.strftime('%Y-%m-%dT%H:%M:%SZ', time.gmtime()))
+            for key in keys:
+                record[key + '_key'] = properties.get(key + 'Key')
+            writer.write(record)
+            return True
+
+        try:
+            writer = SecretRecordWriter(self.keys_file, self.keys_passphrase)
+        except (IOError, OSError) as e:
+            self.fail('Error creating keys_file {0}: {1}'.format(self.keys_file, str(e)))
+        with writer:
+            for name, outcome in zip(names, run_concurrently(rotate, names, self.max_concurrency)):
+                if outcome[1] is not None:
+                    self.results['rotation']['failed'].append(dict(name=name, error=str(outcome[1])))
+            self.results['rotation']['rotated'] = writer.count
+
+        self.results['rotation']['elapsed'] = round(time.time() - started, 3)
+        if self.results['rotation']['failed']:
+            self.fail('Failed to rotate keys of {0} subscriptions'.format(len(self.results['rotation']['failed'])),
+                      **self.results)
+        return self.results
+
     def create_update_resource(self):
         # self.log('Creating / Updating the Subscription instance {0}'.format(self.))
 
@@ -514,7 +798,7 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -537,29 +821,33 @@ class AzureRMSubscription(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the Subscription instance.')
             self.fail('Error deleting the Subscription instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the Subscription instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the Subscription instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("Subscription instance : {0} found".format(response.name))
@@ -137,6 +137,34 @@ options:
     description:
       - Determines whether tracing is enabled
     type: boolean
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
+  filter:
+    description:
+      - >-
+        OData filter expression evaluated by the service for list operations,
+        for example C(state eq 'active'). Supported fields are C(name),
+        C(displayName), C(stateComment), C(ownerId), C(scope), C(userId),
+        C(productId), C(state).
+    type: str
+  top:
+    description:
+      - Number of records to return.
+    type: int
+  skip:
+    description:
+      - Number of records to skip.
+    type: int
+  order_by:
+    description:
+      - >-
+        OData order by expression for list operations, for example
+        C(name desc). Supports the same fields as I(filter).
+    type: str
 extends_documentation_fragment:
   - azure
 author:
@@ -200,10 +228,25 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_odata import odata_query_parameters, validate_odata_options
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
 
+FILTERABLE_FIELDS = ['name',
+                     'displayName',
+                     'stateComment',
+                     'ownerId',
+                     'scope',
+                     'userId',
+                     'productId',
+                     'state']
+
+
 class AzureRMSubscriptionInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -217,12 +260,32 @@ class AzureRMSubscriptionInfo(AzureRMModuleBase):
             ),
             sid=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            top=dict(
+                type='int'
+            ),
+            skip=dict(
+                type='int'
+            ),
+            order_by=dict(
+                type='str'
             )
         )
 
         self.resource_group = None
         self.service_name = None
         self.sid = None
+        self.max_items = None
+        self.filter = None
+        self.top = None
+        self.skip = None
+        self.order_by = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -236,6 +299,7 @@ class AzureRMSubscriptionInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMSubscriptionInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -243,8 +307,14 @@ class AzureRMSubscriptionInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
+        validate_odata_options(self, FILTERABLE_FIELDS, self.filter, self.top, self.skip, self.order_by)
+        if self.top is not None and (self.max_items is None or self.top < self.max_items):
+            self.max_items = self.top
+
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
@@ -291,8 +361,7 @@ class AzureRMSubscriptionInfo(AzureRMModuleBase):
         return results
 
     def list(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -307,21 +376,19 @@ class AzureRMSubscriptionInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def format_item(self, item):
         d = {
@@ -127,6 +127,34 @@ options:
             `aad://<tenant>.onmicrosoft.com/groups/<group object id>`; otherwise
             the value is null.
         type: str
+  max_items:
+    description:
+      - >-
+        Maximum number of items returned by list operations. All pages are
+        followed when not set.
+    type: int
+  filter:
+    description:
+      - >-
+        OData filter expression evaluated by the service for list operations,
+        for example C(email eq 'john@contoso.com'). Supported fields are
+        C(name), C(firstName), C(lastName), C(email), C(state),
+        C(registrationDate), C(note).
+    type: str
+  top:
+    description:
+      - Number of records to return.
+    type: int
+  skip:
+    description:
+      - Number of records to skip.
+    type: int
+  order_by:
+    description:
+      - >-
+        OData order by expression for list operations, for example
+        C(name desc). Supports the same fields as I(filter).
+    type: str
 extends_documentation_fragment:
   - azure
 author:
@@ -144,6 +172,11 @@ EXAMPLES = '''
     resource_group: myResourceGroup
     service_name: myService
     user_id: myUser
+- name: ApiManagementFindUserByEmail
+  azure.rm.apimanagementuser_info:
+    resource_group: myResourceGroup
+    service_name: myService
+    filter: "email eq 'john@contoso.com'"
 
 '''
 
@@ -190,6 +223,11 @@ import time
 import json
 from ansible.module_utils.azure_rm_common import AzureRMModuleBase
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_odata import odata_query_parameters, validate_odata_options
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
 from copy import deepcopy
 try:
   from msrestazure.azure_exceptions import CloudError
@@ -198,6 +236,15 @@ except ImportError:
   pass
 
 
+FILTERABLE_FIELDS = ['name',
+                     'firstName',
+                     'lastName',
+                     'email',
+                     'state',
+                     'registrationDate',
+                     'note']
+
+
 class AzureRMUserInfo(AzureRMModuleBase):
     def __init__(self):
         self.module_arg_spec = dict(
@@ -214,6 +261,21 @@ class AzureRMUserInfo(AzureRMModuleBase):
             ),
             user_id=dict(
                 type='str'
+            ),
+            max_items=dict(
+                type='int'
+            ),
+            filter=dict(
+                type='str'
+            ),
+            top=dict(
+                type='int'
+            ),
+            skip=dict(
+                type='int'
+            ),
+            order_by=dict(
+                type='str'
             )
         )
 
@@ -221,6 +283,11 @@ class AzureRMUserInfo(AzureRMModuleBase):
         self.service_name = None
         self.expand_groups = None
         self.user_id = None
+        self.max_items = None
+        self.filter = None
+        self.top = None
+        self.skip = None
+        self.order_by = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -234,6 +301,7 @@ class AzureRMUserInfo(AzureRMModuleBase):
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
         self.mgmt_client = None
+        install_token_cache()
         super(AzureRMUserInfo, self).__init__(self.module_arg_spec, supports_tags=True)
 
     def exec_module(self, **kwargs):
@@ -241,8 +309,14 @@ class AzureRMUserInfo(AzureRMModuleBase):
         for key in self.module_arg_spec:
             setattr(self, key, kwargs[key])
 
+        validate_odata_options(self, FILTERABLE_FIELDS, self.filter, self.top, self.skip, self.order_by)
+        if self.top is not None and (self.max_items is None or self.top < self.max_items):
+            self.max_items = self.top
+
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         if (self.resource_group is not None and
             self.service_name is not None and
@@ -289,8 +363,7 @@ class AzureRMUserInfo(AzureRMModuleBase):
         return self.format_item(results)
 
     def listbyservice(self):
-        response = None
-        results = {}
+        results = []
         # prepare url
         self.url = ('/subscriptions' +
                     '/{{ subscription_id }}' +
@@ -305,21 +378,19 @@ class AzureRMUserInfo(AzureRMModuleBase):
         self.url = self.url.replace('{{ resource_group }}', self.resource_group)
         self.url = self.url.replace('{{ service_name }}', self.service_name)
 
+        self.query_parameters.update(odata_query_parameters(self.filter, self.top, self.skip, self.order_by))
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
-            results = json.loads(response.text)
-            # self.log('Response : {0}'.format(response))
+            for item in iter_pages(self.mgmt_client,
+                                   self.url,
+                                   self.query_parameters,
+                                   self.header_parameters,
+                                   self.status_code,
+                                   self.max_items):
+                results.append(self.format_item(item))
         except CloudError as e:
             self.log('Could not get info for @(Model.ModuleOperationNameUpper).')
 
-        return [self.format_item(x) for x in results['value']] if results['value'] else []
+        return results
 
     def format_item(self, item):
         d = {
@@ -92,6 +92,52 @@ options:
               - The friendly name of the parent management group.
             returned: always
             type: str
+  tree:
+    description:
+      - >-
+        Desired management groups below the group I(name), which must exist.
+        The current hierarchy is read in a single request and compared in
+        memory, only groups which are missing, have another parent or another
+        display name are written.
+      - >-
+        Groups may be nested in I(children) or linked by I(parent), in any
+        order. They are written level by level, all groups at the same depth
+        concurrently.
+    type: list
+    suboptions:
+      name:
+        description:
+          - The name of the management group.
+        required: true
+        type: str
+      display_name:
+        description:
+          - The friendly name of the management group.
+        type: str
+      parent:
+        description:
+          - >-
+            The name of the parent management group. The enclosing group for
+            groups in I(children), otherwise I(name) when not specified.
+        type: str
+      children:
+        description:
+          - Child management groups, with the same options as I(tree).
+          - Every child must have a I(name).
+        type: list
+        elements: dict
+  exclusive:
+    description:
+      - >-
+        With I(tree), delete the management groups below I(name) which are
+        not in I(tree), deepest first.
+    type: bool
+    default: false
+  max_concurrency:
+    description:
+      - Maximum number of management groups written in parallel with I(tree).
+    type: int
+    default: 8
   state:
     description:
       - Assert the state of the ManagementGroup.
@@ -102,6 +148,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -127,6 +189,31 @@ EXAMPLES = '''
   azure.rm.managementgroup:
     group_id: ChildGroup
     state: absent
+- name: Set the management groups below RootGroup
+  azure.rm.managementgroup:
+    name: RootGroup
+    tree:
+      - name: Platform
+      - name: LandingZones
+        display_name: Landing Zones
+      - name: Corp
+        parent: LandingZones
+      - name: Online
+        parent: LandingZones
+- name: Rebuild a landing zone hierarchy and delete all other groups
+  azure.rm.managementgroup:
+    name: RootGroup
+    exclusive: true
+    tree:
+      - name: Platform
+        children:
+          - name: Identity
+          - name: Connectivity
+      - name: LandingZones
+        children:
+          - name: Corp
+          - name: Online
+      - name: Sandbox
 
 '''
 
@@ -138,6 +225,56 @@ id:
       /providers/Microsoft.Management/managementGroups/0000000-0000-0000-0000-000000000000
   returned: always
   type: str
+tree:
+  description:
+    - >-
+      Outcome for every group of I(tree), parents before children, followed
+      by the groups deleted with I(exclusive).
+  returned: when tree is set
+  type: complex
+  contains:
+    name:
+      description:
+        - The name of the management group.
+      returned: always
+      type: str
+      sample: Corp
+    parent:
+      description:
+        - The name of the parent management group.
+      returned: always
+      type: str
+      sample: LandingZones
+    action:
+      description:
+        - >-
+          One of C(create), C(move), C(update), C(delete), C(unchanged),
+          C(failed), or C(skipped) when not applied because an earlier level
+          failed.
+        - >-
+          C(move) includes groups which exist elsewhere in the tenant and are
+          moved below I(name).
+      returned: always
+      type: str
+      sample: create
+    error:
+      description:
+        - Error message when the group failed.
+      returned: when failed
+      type: str
+      sample: null
+summary:
+  description:
+    - Number of management groups per action.
+  returned: when tree is set
+  type: dict
+  sample: {"create": 4, "unchanged": 3, "delete": 1}
+elapsed:
+  description:
+    - Seconds spent writing the changes.
+  returned: when tree is set
+  type: float
+  sample: 84.2
 
 '''
 
@@ -146,6 +283,16 @@ import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_managementgroup import (get_hierarchy, flatten_hierarchy, flatten_tree,
+                                                                                        tree_levels, diff_tree, stale_groups,
+                                                                                        get_management_group, put_management_group,
+                                                                                        delete_management_group)
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -174,11 +321,33 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
               )
             )
           ),
+          tree=dict(
+            type='list',
+            options=dict(
+              name=dict(type='str', required=True),
+              display_name=dict(type='str'),
+              parent=dict(type='str'),
+              children=dict(type='list', elements='dict')
+            )
+          ),
+          exclusive=dict(type='bool', default=False),
+          max_concurrency=dict(type='int', default=8),
           state=dict(type='str', default='present', choices=['present', 'absent']),  
+          polling_timeout=dict(type='int', default=600),
+            etag_cache=dict(
+                type='bool',
+                default=False
+            )
         )
 
         self.name = None
+        self.tree = None
+        self.exclusive = None
+        self.max_concurrency = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -191,6 +360,7 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMManagementGroups, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                       supports_check_mode=True,
                                                       supports_tags=True)
@@ -210,6 +380,12 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
+
+        if self.tree is not None:
+            return self.apply_tree()
 
         self.url = ('/providers' +
                     '/Microsoft.Management' +
@@ -260,11 +436,6 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ManagementGroup instance unchanged')
             self.results['changed'] = False
@@ -275,6 +446,92 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
 
         return self.results
 
+    def apply_tree(self):
+        '''
+        Compare 'tree' with the current hierarchy below 'name' and write the differences,
+        one depth level at a time, all groups of a level concurrently.
+        '''
+        if not self.name:
+            self.fail('name is required with tree')
+        try:
+            hierarchy = flatten_hierarchy(get_hierarchy(self.mgmt_client,
+                                                        self.name,
+                                                        self.query_parameters,
+                                                        self.header_parameters))
+        except CloudError as e:
+            self.fail('Error getting management group {0}: {1}'.format(self.name, str(e)))
+
+        try:
+            desired = flatten_tree(self.tree)
+            levels = tree_levels(hierarchy, desired, self.name)
+        except ValueError as e:
+            self.fail(str(e))
+
+        changes = dict((x['name'].lower(), x) for x in diff_tree(hierarchy, desired, self.name))
+        # groups missing below 'name' may exist elsewhere in the tenant, the PUT moves those
+        missing = [x for x in changes.values() if x['action'] == 'create']
+        for change, outcome in zip(missing, run_concurrently(self.get_group, missing, self.max_concurrency)):
+            if outcome[1] is not None:
+                self.fail('Error getting management group {0}: {1}'.format(change['name'], str(outcome[1])))
+            if outcome[0] is not None:
+                change['action'] = 'move'
+                change['display_name'] = change['display_name'] or (outcome[0].get('properties') or {}).get('displayName')
+        levels = [[changes[x['name'].lower()] for x in level] for level in levels]
+        groups = dict((x['name'].lower(), x) for x in hierarchy['nodes'].values() if x['type'] == 'group')
+        deletions = []
+        if self.exclusive:
+            deletions = [[dict(name=name,
+                               parent=groups[name.lower()]['parent'],
+                               display_name=groups[name.lower()]['display_name'],
+                               action='delete') for name in level] for level in stale_groups(hierarchy, desired)]
+
+        self.results['tree'] = [x for level in levels + deletions for x in level]
+        self.results['changed'] = any(x['action'] != 'unchanged' for x in self.results['tree'])
+        self.results['summary'] = {}
+        self.results['elapsed'] = 0
+
+        started = time.time()
+        failed = False
+        if not self.check_mode:
+            for level in levels + deletions:
+                pending = [x for x in level if x['action'] != 'unchanged']
+                if failed:
+                    for change in pending:
+                        change['action'] = 'skipped'
+                    continue
+                for change, outcome in zip(pending, run_concurrently(self.apply_group, pending, self.max_concurrency)):
+                    if outcome[1] is not None:
+                        change['action'] = 'failed'
+                        change['error'] = str(outcome[1])
+                        failed = True
+        self.results['elapsed'] = round(time.time() - started, 1)
+
+        for change in self.results['tree']:
+            self.results['summary'][change['action']] = self.results['summary'].get(change['action'], 0) + 1
+        if failed:
+            self.fail('Error writing management groups: {0}'.format(', '.join(x['name'] for x in self.results['tree']
+                                                                             if x['action'] == 'failed')),
+                      **self.results)
+        return self.results
+
+    def get_group(self, change):
+        return get_management_group(self.mgmt_client, change['name'], self.query_parameters, self.header_parameters)
+
+    def apply_group(self, change):
+        if change['action'] == 'delete':
+            return delete_management_group(self.mgmt_client,
+                                           change['name'],
+                                           self.query_parameters,
+                                           self.header_parameters,
+                                           self.polling_timeout)
+        return put_management_group(self.mgmt_client,
+                                    change['name'],
+                                    change['parent'],
+                                    change['display_name'],
+                                    self.query_parameters,
+                                    self.header_parameters,
+                                    self.polling_timeout)
+
     def create_update_resource(self):
         # self.log('Creating / Updating the ManagementGroup instance {0}'.format(self.))
 
@@ -282,7 +539,7 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
                                               600,
@@ -305,29 +562,33 @@ class AzureRMManagementGroups(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ManagementGroup instance.')
             self.fail('Error deleting the ManagementGroup instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ManagementGroup instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ManagementGroup instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ManagementGroup instance : {0} found".format(response.name))
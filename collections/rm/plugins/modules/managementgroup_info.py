@@ -0,0 +1,191 @@
+#!/usr/bin/python
+#
+# Copyright (c) 2019 Zim Kalinowski, (@zikalino)
+#
+# GNU General Public License v3.0+ (see COPYING or https://www.gnu.org/licenses/gpl-3.0.txt)
+
+from __future__ import absolute_import, division, print_function
+__metaclass__ = type
+
+
+ANSIBLE_METADATA = {'metadata_version': '1.1',
+                    'status': ['preview'],
+                    'supported_by': 'community'}
+
+
+DOCUMENTATION = '''
+---
+module: managementgroup_info
+version_added: '2.9'
+short_description: Get ManagementGroup hierarchy info.
+description:
+  - >-
+    Get a management group with all its descendant groups and subscriptions
+    in a single request, as a flat structure indexed by id, parent and depth.
+options:
+  name:
+    description:
+      - >-
+        The name of the management group at the top of the hierarchy. For
+        the whole tenant, the tenant root group, which is named after the
+        tenant id.
+    required: true
+    type: str
+  recurse:
+    description:
+      - Get all descendants, otherwise only the direct children.
+    type: bool
+    default: true
+extends_documentation_fragment:
+  - azure
+author:
+  - Zim Kalinowski (@zikalino)
+
+'''
+
+EXAMPLES = '''
+- name: Get the management group hierarchy of the tenant
+  azure.rm.managementgroup_info:
+    name: 20000000-0000-0000-0000-000000000000
+  register: hierarchy
+- name: Show the groups at depth 1
+  debug:
+    msg: "{{ hierarchy.levels[1] | map('extract', hierarchy.management_groups, 'name') | list }}"
+
+'''
+
+RETURN = '''
+management_groups:
+  description:
+    - >-
+      The management group and all its descendant groups and subscriptions,
+      keyed by their fully qualified ID.
+  returned: always
+  type: complex
+  contains:
+    id:
+      description:
+        - >-
+          The fully qualified ID. For example,
+          /providers/Microsoft.Management/managementGroups/ChildGroup
+      returned: always
+      type: str
+      sample: /providers/Microsoft.Management/managementGroups/ChildGroup
+    name:
+      description:
+        - The name of the group, or the subscription id.
+      returned: always
+      type: str
+      sample: ChildGroup
+    type:
+      description:
+        - C(group) or C(subscription).
+      returned: always
+      type: str
+      sample: group
+    display_name:
+      description:
+        - The friendly name.
+      returned: always
+      type: str
+      sample: Child Group
+    parent:
+      description:
+        - The name of the parent management group.
+      returned: always
+      type: str
+      sample: RootGroup
+    parent_id:
+      description:
+        - The fully qualified ID of the parent management group.
+      returned: always
+      type: str
+      sample: /providers/Microsoft.Management/managementGroups/RootGroup
+    depth:
+      description:
+        - Depth below the requested group, which has depth 0.
+      returned: always
+      type: int
+      sample: 1
+children:
+  description:
+    - IDs of the children of every management group, keyed by the group ID.
+  returned: always
+  type: dict
+  sample: {"/providers/Microsoft.Management/managementGroups/RootGroup": ["/providers/Microsoft.Management/managementGroups/ChildGroup"]}
+levels:
+  description:
+    - IDs of the groups and subscriptions at every depth.
+  returned: always
+  type: list
+  sample: [["/providers/Microsoft.Management/managementGroups/RootGroup"], ["/providers/Microsoft.Management/managementGroups/ChildGroup"]]
+
+'''
+
+from ansible.module_utils.azure_rm_common import AzureRMModuleBase
+from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_managementgroup import get_hierarchy, flatten_hierarchy
+from msrestazure.azure_exceptions import CloudError
+
+
+class AzureRMManagementGroupsInfo(AzureRMModuleBase):
+    def __init__(self):
+        self.module_arg_spec = dict(
+            name=dict(
+                type='str',
+                required=True
+            ),
+            recurse=dict(
+                type='bool',
+                default=True
+            )
+        )
+
+        self.name = None
+        self.recurse = None
+
+        self.results = dict(changed=False)
+        self.mgmt_client = None
+
+        self.query_parameters = {}
+        self.query_parameters['api-version'] = '2018-03-01-preview'
+        self.header_parameters = {}
+        self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
+
+        install_token_cache()
+        super(AzureRMManagementGroupsInfo, self).__init__(self.module_arg_spec, supports_tags=True)
+
+    def exec_module(self, **kwargs):
+
+        for key in self.module_arg_spec:
+            setattr(self, key, kwargs[key])
+
+        self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
+                                                    base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+
+        try:
+            hierarchy = flatten_hierarchy(get_hierarchy(self.mgmt_client,
+                                                        self.name,
+                                                        self.query_parameters,
+                                                        self.header_parameters,
+                                                        self.recurse))
+        except CloudError as e:
+            self.fail('Error getting management group {0}: {1}'.format(self.name, str(e)))
+
+        self.results['management_groups'] = hierarchy['nodes']
+        self.results['children'] = hierarchy['children']
+        self.results['levels'] = hierarchy['levels']
+        return self.results
+
+
+def main():
+    AzureRMManagementGroupsInfo()
+
+
+if __name__ == '__main__':
+    main()
@@ -24,7 +24,40 @@ options:
   group_id:
     description:
       - Management Group ID.
-    required: true
+      - >-
+        Required unless I(placements) is set, where it is the default group
+        of the placements.
+  placements:
+    description:
+      - >-
+        Subscriptions to place. The current placements are read once from
+        the descendants of I(root_group), only subscriptions which are in
+        another group are moved, up to I(max_concurrency) in parallel.
+      - With I(state=absent), the subscriptions are moved out of their group.
+    type: list
+    suboptions:
+      subscription_id:
+        description:
+          - The subscription ID.
+        required: true
+        type: str
+      group_id:
+        description:
+          - Management Group ID, I(group_id) when not specified.
+        type: str
+  root_group:
+    description:
+      - >-
+        Management group whose descendants are read to find the current
+        placements, usually the tenant root group, which is named after the
+        tenant ID.
+      - Required with I(placements).
+    type: str
+  max_concurrency:
+    description:
+      - Maximum number of subscriptions moved in parallel with I(placements).
+    type: int
+    default: 8
   state:
     description:
       - Assert the state of the ManagementGroupSubscription.
@@ -35,6 +68,22 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for a long running operation, such as
+        deletion, to complete.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
 author:
@@ -50,11 +99,69 @@ EXAMPLES = '''
   azure.rm.managementgroupsubscription:
     group_id: myManagementGroup
     state: absent
+- name: Place the onboarded subscriptions
+  azure.rm.managementgroupsubscription:
+    root_group: 20000000-0000-0000-0000-000000000000
+    group_id: Corp
+    placements:
+      - subscription_id: 30000000-0000-0000-0000-000000000001
+      - subscription_id: 30000000-0000-0000-0000-000000000002
+      - subscription_id: 30000000-0000-0000-0000-000000000003
+        group_id: Online
 
 '''
 
 RETURN = '''
-{}
+placements:
+  description:
+    - Outcome for every subscription of I(placements), in the same order.
+  returned: when placements is set
+  type: complex
+  contains:
+    subscription_id:
+      description:
+        - The subscription ID.
+      returned: always
+      type: str
+      sample: 30000000-0000-0000-0000-000000000001
+    group_id:
+      description:
+        - The requested management group.
+      returned: always
+      type: str
+      sample: Corp
+    previous:
+      description:
+        - >-
+          The management group containing the subscription before, null when
+          the subscription was not found below I(root_group).
+      returned: always
+      type: str
+      sample: 20000000-0000-0000-0000-000000000000
+    action:
+      description:
+        - One of C(move), C(remove), C(unchanged) or C(failed).
+      returned: always
+      type: str
+      sample: move
+    error:
+      description:
+        - Error message when the subscription failed.
+      returned: when failed
+      type: str
+      sample: null
+summary:
+  description:
+    - Number of subscriptions per action.
+  returned: when placements is set
+  type: dict
+  sample: {"move": 120, "unchanged": 380}
+elapsed:
+  description:
+    - Seconds spent moving the subscriptions.
+  returned: when placements is set
+  type: float
+  sample: 95.3
 
 '''
 
@@ -63,6 +170,14 @@ import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_managementgroup import (get_hierarchy, flatten_hierarchy,
+                                                                                        subscription_placements, place_subscription)
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
@@ -77,21 +192,53 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
             group_id=dict(
                 type='str',
                 updatable=False,
-                disposition='groupId',
-                required=True
+                disposition='groupId'
+            ),
+            placements=dict(
+                type='list',
+                options=dict(
+                    subscription_id=dict(
+                        type='str',
+                        required=True
+                    ),
+                    group_id=dict(
+                        type='str'
+                    )
+                )
+            ),
+            root_group=dict(
+                type='str'
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
             ),
             state=dict(
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
         self.group_id = None
+        self.placements = None
+        self.root_group = None
+        self.max_concurrency = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -102,6 +249,7 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMManagementGroupSubscriptions, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                                   supports_check_mode=True,
                                                                   supports_tags=True)
@@ -120,6 +268,14 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
+
+        if self.placements is not None:
+            return self.apply_placements()
+        if not self.group_id:
+            self.fail('group_id is required unless placements is set')
 
         self.url = ('/providers' +
                     '/Microsoft.Management' +
@@ -172,11 +328,6 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('ManagementGroupSubscription instance unchanged')
             self.results['changed'] = False
@@ -184,6 +335,67 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
 
         return self.results
 
+    def apply_placements(self):
+        '''
+        Read the current placements below 'root_group' once and move the subscriptions
+        of 'placements' which are elsewhere, up to 'max_concurrency' at a time.
+        '''
+        if not self.root_group:
+            self.fail('root_group is required with placements')
+        placements = []
+        for item in self.placements:
+            group = item.get('group_id') or self.group_id
+            if not group:
+                self.fail('group_id is required for subscription {0}'.format(item['subscription_id']))
+            placements.append(dict(subscription_id=item['subscription_id'],
+                                   group_id=group))
+
+        try:
+            current = subscription_placements(flatten_hierarchy(get_hierarchy(self.mgmt_client,
+                                                                              self.root_group,
+                                                                              self.query_parameters,
+                                                                              self.header_parameters)))
+        except CloudError as e:
+            self.fail('Error getting management group {0}: {1}'.format(self.root_group, str(e)))
+
+        for placement in placements:
+            previous = current.get(placement['subscription_id'].lower())
+            placed = previous is not None and previous.lower() == placement['group_id'].lower()
+            placement['previous'] = previous
+            if self.state == 'present':
+                placement['action'] = 'unchanged' if placed else 'move'
+            else:
+                placement['action'] = 'remove' if placed else 'unchanged'
+
+        pending = [x for x in placements if x['action'] != 'unchanged']
+        self.results['placements'] = placements
+        self.results['changed'] = len(pending) > 0
+        self.results['summary'] = {}
+        self.results['elapsed'] = 0
+
+        started = time.time()
+        if not self.check_mode:
+            for placement, outcome in zip(pending, run_concurrently(self.place, pending, self.max_concurrency)):
+                if outcome[1] is not None:
+                    placement['action'] = 'failed'
+                    placement['error'] = str(outcome[1])
+        self.results['elapsed'] = round(time.time() - started, 1)
+
+        for placement in placements:
+            self.results['summary'][placement['action']] = self.results['summary'].get(placement['action'], 0) + 1
+        if self.results['summary'].get('failed'):
+            self.fail('Error placing {0} subscriptions'.format(self.results['summary']['failed']), **self.results)
+        return self.results
+
+    def place(self, placement):
+        return place_subscription(self.mgmt_client,
+                                  placement['group_id'],
+                                  placement['subscription_id'],
+                                  self.query_parameters,
+                                  self.header_parameters,
+                                  self.state,
+                                  self.polling_timeout)
+
     def create_update_resource(self):
         # self.log('Creating / Updating the ManagementGroupSubscription instance {0}'.format(self.))
 
@@ -191,7 +403,7 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                                 'PUT',
                                                 self.query_parameters,
-                                                self.header_parameters,
+                                                self.etags.write_headers(self.url, self.header_parameters),
                                                 self.body,
                                                 self.status_code,
                                                 600,
@@ -214,29 +426,33 @@ class AzureRMManagementGroupSubscriptions(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the ManagementGroupSubscription instance.')
             self.fail('Error deleting the ManagementGroupSubscription instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the ManagementGroupSubscription instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the ManagementGroupSubscription instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("ManagementGroupSubscription instance : {0} found".format(response.name))
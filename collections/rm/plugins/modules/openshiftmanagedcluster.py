@@ -222,6 +222,23 @@ options:
     choices:
       - absent
       - present
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for creation, update or deletion of
+        the cluster to complete. Scaling agent pools may take much longer
+        than the default.
+    type: int
+    default: 600
+  etag_cache:
+    description:
+      - >-
+        Keep a local cache of resource bodies and ETags. Reads send
+        If-None-Match and reuse the cached body when the resource is not
+        modified, and writes send If-Match, so changes made by others since
+        the resource was read are not overwritten.
+    type: bool
+    default: false
 extends_documentation_fragment:
   - azure
   - azure_tags
@@ -538,11 +555,14 @@ properties:
 
 '''
 
-import time
-import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_etag import EtagCache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller, AsyncOperationError, TERMINAL_STATES
 from copy import deepcopy
 try:
     from msrestazure.azure_exceptions import CloudError
@@ -767,6 +787,14 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                 type='str',
                 default='present',
                 choices=['present', 'absent']
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=600
+            ),
+            etag_cache=dict(
+                type='bool',
+                default=False
             )
         )
 
@@ -776,6 +804,9 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
         self.results = dict(changed=False)
         self.mgmt_client = None
         self.state = None
+        self.polling_timeout = None
+        self.etag_cache = None
+        self.etags = None
         self.url = None
         self.status_code = [200, 201, 202]
         self.to_do = Actions.NoAction
@@ -786,6 +817,7 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMOpenShiftManagedClusters, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                               supports_check_mode=True,
                                                               supports_tags=True)
@@ -804,6 +836,9 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
+        self.etags = EtagCache(self.etag_cache)
 
         resource_group = self.get_resource_group(self.resource_group)
 
@@ -867,11 +902,6 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
                 return self.results
 
             self.delete_resource()
-
-            # make sure instance is actually deleted, for some Azure resources, instance is hanging around
-            # for some time after deletion -- this should be really fixed in Azure
-            while self.get_resource():
-                time.sleep(20)
         else:
             self.log('OpenShiftManagedCluster instance unchanged')
             self.results['changed'] = False
@@ -894,23 +924,26 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'PUT',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               self.body,
                                               self.status_code,
-                                              600,
-                                              30)
+                                              0,
+                                              0)
         except CloudError as exc:
             self.log('Error attempting to create the OpenShiftManagedCluster instance.')
             self.fail('Error creating the OpenShiftManagedCluster instance: {0}'.format(str(self.body)))
             self.fail('Error creating the OpenShiftManagedCluster instance: {0}'.format(str(exc)))
 
+        # follow Azure-AsyncOperation or Location with Retry-After, then read the cluster back once it settled
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
         try:
-            response = json.loads(response.text)
-        except Exception:
-            response = {'text': response.text}
-            pass
-
-        return response
+            poller.wait(response)
+            return poller.wait_for(self.url,
+                                   self.query_parameters,
+                                   lambda x: ((x.get('properties') or {}).get('provisioningState') or
+                                              'Succeeded').lower() in TERMINAL_STATES)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for creation or update of the OpenShiftManagedCluster instance: {0}'.format(str(e)))
 
     def delete_resource(self):
         # self.log('Deleting the OpenShiftManagedCluster instance {0}'.format(self.))
@@ -918,29 +951,33 @@ class AzureRMOpenShiftManagedClusters(AzureRMModuleBaseExt):
             response = self.mgmt_client.query(self.url,
                                               'DELETE',
                                               self.query_parameters,
-                                              self.header_parameters,
+                                              self.etags.write_headers(self.url, self.header_parameters),
                                               None,
-                                              self.status_code,
-                                              600,
-                                              30)
+                                              [200, 202, 204],
+                                              0,
+                                              0)
         except CloudError as e:
             self.log('Error attempting to delete the OpenShiftManagedCluster instance.')
             self.fail('Error deleting the OpenShiftManagedCluster instance: {0}'.format(str(e)))
 
+        # some Azure resources are hanging around for some time after the operation completes
+        poller = AsyncOperationPoller(self.mgmt_client, self.header_parameters, self.polling_timeout)
+        try:
+            poller.wait(response, self.url, self.query_parameters, wait_for_absence=True)
+        except (CloudError, AsyncOperationError) as e:
+            self.fail('Error waiting for deletion of the OpenShiftManagedCluster instance: {0}'.format(str(e)))
+
         return True
 
     def get_resource(self):
         # self.log('Checking if the OpenShiftManagedCluster instance {0} is present'.format(self.))
         found = False
         try:
-            response = self.mgmt_client.query(self.url,
-                                              'GET',
-                                              self.query_parameters,
-                                              self.header_parameters,
-                                              None,
-                                              self.status_code,
-                                              600,
-                                              30)
+            response = self.etags.get(self.mgmt_client,
+                                      self.url,
+                                      self.query_parameters,
+                                      self.header_parameters,
+                                      self.status_code)
             found = True
             self.log("Response : {0}".format(response))
             # self.log("OpenShiftManagedCluster instance : {0} found".format(response.name))
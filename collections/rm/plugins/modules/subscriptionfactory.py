@@ -57,6 +57,63 @@ options:
   subscription_link:
     description:
       - The link to the new subscription.
+  subscriptions:
+    description:
+      - >-
+        Subscriptions to create in the enrollment account, all submitted
+        concurrently. Every creation is followed until the subscription is
+        enabled.
+      - >-
+        Subscriptions are identified by display name. Subscriptions which
+        already exist with the same display name are not created again.
+      - >-
+        Only subscriptions the caller has access to can be found. When the
+        caller is not one of the I(owners), new subscriptions are reported as
+        C(created) without waiting for them to be enabled, and a later run
+        does not see them and creates them again. Include the caller in
+        I(owners) to make runs idempotent.
+      - >-
+        I(offer_type), I(owners) and I(additional_parameters) are used for
+        subscriptions which do not set them.
+    type: list
+    suboptions:
+      display_name:
+        description:
+          - The display name of the subscription.
+        required: true
+        type: str
+      offer_type:
+        description:
+          - The offer type of the subscription.
+        type: str
+        choices:
+          - MS-AZR-0017P
+          - MS-AZR-0148P
+      owners:
+        description:
+          - The principals granted Owner access on the subscription.
+        type: list
+        suboptions:
+          object_id:
+            description:
+              - Object id of the Principal
+            required: true
+      additional_parameters:
+        description:
+          - Additional, untyped parameters.
+        type: raw
+  max_concurrency:
+    description:
+      - Maximum number of subscriptions created in parallel with I(subscriptions).
+    type: int
+    default: 8
+  polling_timeout:
+    description:
+      - >-
+        Maximum time in seconds to wait for every subscription of
+        I(subscriptions) to be enabled.
+    type: int
+    default: 1800
   state:
     description:
       - Assert the state of the SubscriptionFactory.
@@ -87,15 +144,79 @@ EXAMPLES = '''
         customData:
           key1: value1
           key2: true
+- name: Create the subscriptions of the new landing zones
+  azure.rm.subscriptionfactory:
+    enrollment_account_name: myEnrollmentAccount
+    offer_type: MS-AZR-0017P
+    owners:
+      - object_id: 973034ff-acb7-409c-b731-e789672c7b31
+    subscriptions:
+      - display_name: corp-prod-001
+      - display_name: corp-dev-001
+        offer_type: MS-AZR-0148P
+      - display_name: online-prod-001
+  register: created
 '''
 
 RETURN = '''
 subscription_link:
   description:
     - The link to the new subscription.
-  returned: always
+  returned: when subscriptions is not set
   type: str
   sample: null
+subscriptions:
+  description:
+    - Outcome for every subscription of I(subscriptions), in the same order.
+  returned: when subscriptions is set
+  type: complex
+  contains:
+    display_name:
+      description:
+        - The display name of the subscription.
+      returned: always
+      type: str
+      sample: corp-prod-001
+    subscription_id:
+      description:
+        - The subscription ID, null when the creation failed.
+      returned: always
+      type: str
+      sample: 30000000-0000-0000-0000-000000000001
+    state:
+      description:
+        - >-
+          The state of the subscription, for example C(Enabled), null when
+          it is not visible to the caller.
+      returned: always
+      type: str
+      sample: Enabled
+    action:
+      description:
+        - >-
+          One of C(create), C(exists), C(failed), or C(created) when the
+          subscription was created but is not visible to the caller.
+      returned: always
+      type: str
+      sample: create
+    error:
+      description:
+        - Error message when the subscription failed.
+      returned: when failed
+      type: str
+      sample: null
+summary:
+  description:
+    - Number of subscriptions per action.
+  returned: when subscriptions is set
+  type: dict
+  sample: {"create": 3, "exists": 12}
+elapsed:
+  description:
+    - Seconds spent creating the subscriptions.
+  returned: when subscriptions is set
+  type: float
+  sample: 412.7
 
 '''
 
@@ -104,10 +225,20 @@ import json
 import re
 from ansible.module_utils.azure_rm_common_ext import AzureRMModuleBaseExt
 from ansible.module_utils.azure_rm_common_rest import GenericRestClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_token_cache import install_token_cache
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_throttling import ThrottledClient
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_instrumentation import instrument_client
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_lro import AsyncOperationPoller
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_paging import iter_pages
+from ansible_collections.azure.rm.plugins.module_utils.azure_rm_concurrency import run_concurrently
 from copy import deepcopy
 from msrestazure.azure_exceptions import CloudError
 
 
+SUBSCRIPTIONS_API_VERSION = '2016-06-01'
+NOT_VISIBLE_TIMEOUT = 300
+
+
 class Actions:
     NoAction, Create, Update, Delete = range(4)
 
@@ -149,6 +280,40 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                 updatable=False,
                 disposition='/additionalParameters'
             ),
+            subscriptions=dict(
+                type='list',
+                options=dict(
+                    display_name=dict(
+                        type='str',
+                        required=True
+                    ),
+                    offer_type=dict(
+                        type='str',
+                        choices=['MS-AZR-0017P',
+                                 'MS-AZR-0148P']
+                    ),
+                    owners=dict(
+                        type='list',
+                        options=dict(
+                            object_id=dict(
+                                type='str',
+                                required=True
+                            )
+                        )
+                    ),
+                    additional_parameters=dict(
+                        type='raw'
+                    )
+                )
+            ),
+            max_concurrency=dict(
+                type='int',
+                default=8
+            ),
+            polling_timeout=dict(
+                type='int',
+                default=1800
+            ),
             state=dict(
                 type='str',
                 default='present',
@@ -158,6 +323,9 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
 
         self.enrollment_account_name = None
         self.subscription_link = None
+        self.subscriptions = None
+        self.max_concurrency = None
+        self.polling_timeout = None
 
         self.results = dict(changed=False)
         self.mgmt_client = None
@@ -172,6 +340,7 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
         self.header_parameters = {}
         self.header_parameters['Content-Type'] = 'application/json; charset=utf-8'
 
+        install_token_cache()
         super(AzureRMSubscriptionFactory, self).__init__(derived_arg_spec=self.module_arg_spec,
                                                          supports_check_mode=True,
                                                          supports_tags=True)
@@ -189,6 +358,8 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
 
         self.mgmt_client = self.get_mgmt_svc_client(GenericRestClient,
                                                     base_url=self._cloud_environment.endpoints.resource_manager)
+        self.mgmt_client = ThrottledClient(self.mgmt_client, self.subscription_id)
+        self.mgmt_client = instrument_client(self.mgmt_client, self.results)
 
         self.url = ('/providers' +
                     '/Microsoft.Billing' +
@@ -199,6 +370,9 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
                     '/createSubscription')
         self.url = self.url.replace('{{ enrollment_account_name }}', self.enrollment_account_name)
 
+        if self.subscriptions is not None:
+            return self.create_subscriptions()
+
         if self.check_mode:
             self.results['changed'] = True
             return self.results
@@ -211,6 +385,93 @@ class AzureRMSubscriptionFactory(AzureRMModuleBaseExt):
 
         return self.results
 
+    def create_subscriptions(self):
+        '''
+        Create the subscriptions of 'subscriptions' whose display name does not exist yet,
+        'max_concurrency' at a time, and wait until every one of them is enabled.
+        '''
+        query_parameters = {'api-version': SUBSCRIPTIONS_API_VERSION}
+        existing = {}
+        try:
+            for item in iter_pages(self.mgmt_client, '/subscriptions', query_parameters, self.header_parameters, [200]):
+                existing.setdefault((item.get('displayName') or '').lower(), item)
+        except CloudError as e:
+            self.fail('Error listing subscriptions: {0}'.format(str(e)))
+
+        subscriptions = []
+        names = set()
+        for item in self.subscriptions:
+            if item['display_name'].lower() in names:
+                self.fail('subscription {0} is listed twice'.format(item['display_name']))
+            names.add(item['display_name'].lower())
+            current = existing.get(item['display_name'].lower())
+            subscriptions.append(dict(display_name=item['display_name'],
+                                      subscription_id=current.get('subscriptionId') if current else None,
+                                      state=current.get('state') if current else None,
+                                      action='exists' if current else 'create'))
+
+        pending = [(x, y) for x, y in zip(subscriptions, self.subscriptions) if x['action'] == 'create']
+        self.results['subscriptions'] = subscriptions
+        self.results['changed'] = len(pending) > 0
+        self.results['summary'] = {}
+        self.results['elapsed'] = 0
+
+        started = time.time()
+        if not self.check_mode:
+            for item, outcome in zip(pending, run_concurrently(self.create_subscription, pending, self.max_concurrency)):
+                if outcome[1] is not None:
+                    item[0]['action'] = 'failed'
+                    item[0]['error'] = str(outcome[1])
+        self.results['elapsed'] = round(time.time() - started, 1)
+
+        for subscription in subscriptions:
+            self.results['summary'][subscription['action']] = self.results['summary'].get(subscription['action'], 0) + 1
+        if self.results['summary'].get('failed'):
+            self.fail('Error creating {0} subscriptions'.format(self.results['summary']['failed']), **self.results)
+        return self.results
+
+    def create_subscription(self, item):
+        subscription, options = item
+        body = dict(displayName=options['display_name'])
+        offer_type = options.get('offer_type') or self.body.get('offerType')
+        if offer_type:
+            body['offerType'] = offer_type
+        if options.get('owners') is not None:
+            body['owners'] = [dict(objectId=x['object_id']) for x in options['owners']]
+        elif self.body.get('owners') is not None:
+            body['owners'] = self.body['owners']
+        additional_parameters = options.get('additional_parameters') or self.body.get('additionalParameters')
+        if additional_parameters:
+            body['additionalParameters'] = additional_parameters
+
+        # the operation ends with the link to the subscription, which is enabled a bit later
+        poller = AsyncOperationPoller(self.mgmt_client, dict(self.header_parameters), self.polling_timeout)
+        response = self.mgmt_client.query(self.url,
+                                          'POST',
+                                          self.query_parameters,
+                                          dict(self.header_parameters),
+                                          body,
+                                          self.status_code,
+                                          0,
+                                          0)
+        response = poller.wait(response)
+        link = json.loads(response.text).get('subscriptionLink')
+        if not link:
+            raise ValueError('No subscription link returned')
+        subscription['subscription_id'] = link.rstrip('/').rsplit('/', 1)[-1]
+
+        poller = AsyncOperationPoller(self.mgmt_client, dict(self.header_parameters), self.polling_timeout)
+        body = poller.wait_for('/subscriptions/' + subscription['subscription_id'],
+                               {'api-version': SUBSCRIPTIONS_API_VERSION},
+                               lambda x: (x.get('state') or '').lower() == 'enabled',
+                               NOT_VISIBLE_TIMEOUT)
+        if body is None:
+            # the caller is not an owner of the new subscription and can't read it
+            subscription['action'] = 'created'
+            return subscription
+        subscription['state'] = body.get('state')
+        return subscription
+
     def create_update_resource(self):
         # self.log('Creating / Updating the SubscriptionFactory instance {0}'.format(self.))
 